@@ -7,6 +7,26 @@ from .routes.lobby import lobby_bp
 from .routes.game import game_bp  # Import our new game blueprint
 from .sockets.lobby import register_lobby_socket_handlers  # Import our lobby socket handlers
 from .sockets.game import register_game_socket_handlers  # Import our game socket handlers
+from .utils import metrics, serialization, store
+from .utils.message_queue import create_client_manager
+from .utils.commands import command_queues
+from .utils.dedup import command_results
+from .utils.game import DEFAULT_BOARD, board_pool
+from .utils.presence import presence
+from .utils.reaper import Reaper
+from .utils.replay import event_log
+from .utils.rooms import spectator_count
+from .utils.scheduler import scheduler
+from .utils.words import word_packs
+from .utils.watchdog import Watchdog
+from .utils.store import (
+    configure_stores,
+    get_game_store,
+    get_journal,
+    get_lobby_store,
+    recovered_lobbies,
+    snapshot_documents,
+)
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -14,7 +34,66 @@ app.config.from_object(Config)
 # Configure CORS with allowed origins from config
 CORS(app, origins=app.config.get('ALLOWED_ORIGINS', '*'))
 
-socketio = SocketIO(app, cors_allowed_origins=app.config.get('ALLOWED_ORIGINS', '*'), async_mode='eventlet')
+# Encode REST responses with the configured JSON library
+serialization.init_app(app, Config)
+
+# Share lobby and game state between workers when a shared backend is configured
+configure_stores(Config)
+
+# Fan out emits through a message queue so clients on other workers receive them
+socketio_options = {}
+client_manager = create_client_manager(Config)
+if client_manager is not None:
+    socketio_options['client_manager'] = client_manager
+
+socketio = SocketIO(
+    app,
+    cors_allowed_origins=app.config.get('ALLOWED_ORIGINS', '*'),
+    async_mode='eventlet',
+    json=serialization.SocketIOJSON,
+    **socketio_options,
+)
+
+# Send events only once the state change they announce is committed
+store.init_app(socketio)
+
+# Delayed game transitions are timed by one background task of this server
+# and run on their lobby's command queue
+scheduler.init_app(socketio, dispatch=command_queues.submit)
+
+# Track participants' connections; the disconnected, and everyone restored
+# from the journal at startup, are removed after a grace period
+presence.init_app(socketio, Config.PRESENCE_GRACE_SECONDS)
+presence.recover(recovered_lobbies())
+
+# Keep recent lobby events so reconnecting clients only get what they missed
+event_log.capacity = Config.EVENT_LOG_SIZE
+event_log.ttl = Config.EVENT_LOG_TTL_SECONDS
+# Keep command results to answer retried commands
+command_results.capacity = Config.COMMAND_RESULTS_SIZE
+command_results.ttl = Config.COMMAND_RESULTS_TTL_SECONDS
+
+# Word packs are read from files the first time a board needs them
+word_packs.init_app(Config.WORD_PACK_DIR)
+
+# Generate boards ahead of time so starting a game doesn't have to
+board_pool.size = Config.BOARD_POOL_SIZE
+board_pool.interval = Config.BOARD_POOL_REFILL_SECONDS
+board_pool.seed = Config.BOARD_SEED
+board_pool.init_app(socketio, configs=[DEFAULT_BOARD])
+
+# Evict abandoned lobbies so a long-running worker's memory stays bounded
+reaper = Reaper(
+    Config.LOBBY_IDLE_TTL_SECONDS,
+    Config.MAX_LOBBIES,
+    Config.REAPER_INTERVAL_SECONDS,
+)
+reaper.init_app(socketio)
+
+# Write journaled state changes in batches and snapshot it periodically
+journal = get_journal()
+if journal is not None:
+    journal.init_app(socketio, snapshot_documents)
 
 # Health check endpoint for ALB
 @app.route('/health', methods=['GET'])
@@ -27,11 +106,118 @@ def health_check():
 
 # Register REST API routes
 app.register_blueprint(lobby_bp, url_prefix='/api')
-app.register_blueprint(game_bp, url_prefix='/api')  # Register game routes
+app.register_blueprint(game_bp, url_prefix='/api/game')  # Register game routes
 
 # Register socket handlers
 register_lobby_socket_handlers(socketio)
 register_game_socket_handlers(socketio)  # Register our new game socket handlers
 
+# Prometheus metrics at /metrics; instruments the handlers registered above
+if Config.METRICS_ENABLED:
+    metrics.init_app(app, socketio)
+    metrics.sources.gauge(
+        "lockout_active_lobbies", "Lobbies in the state store", lambda: len(get_lobby_store())
+    )
+    metrics.sources.gauge(
+        "lockout_active_games", "Games in the state store", lambda: len(get_game_store())
+    )
+    metrics.sources.gauge(
+        "lockout_registered_connections",
+        "Participant connections registered on this worker",
+        lambda: len(presence.connections),
+    )
+    metrics.sources.gauge(
+        "lockout_spectators",
+        "Spectators connected to this worker",
+        lambda: spectator_count(socketio.server),
+    )
+    metrics.sources.gauge(
+        "lockout_pending_timers", "Scheduled game timers on this worker", scheduler.pending
+    )
+    metrics.sources.gauge(
+        "lockout_command_queue_depth",
+        "Commands waiting in lobby queues on this worker",
+        command_queues.depth,
+    )
+    metrics.sources.gauge(
+        "lockout_command_queue_max_depth",
+        "Commands waiting in the busiest lobby queue on this worker",
+        command_queues.max_depth,
+    )
+    metrics.sources.gauge(
+        "lockout_command_queues_active",
+        "Lobbies with commands being processed on this worker",
+        command_queues.active,
+    )
+    metrics.sources.counter(
+        "lockout_lobbies_evicted",
+        "Lobbies removed by the reaper",
+        lambda: {"idle": reaper.stats["evicted_idle"], "lru": reaper.stats["evicted_lru"]},
+        label="reason",
+    )
+    metrics.sources.counter(
+        "lockout_resumes",
+        "Reconnects served by replaying missed events or by snapshots",
+        lambda: {
+            "replay": event_log.stats["replays"],
+            "snapshot": event_log.stats["snapshots"],
+        },
+        label="result",
+    )
+    metrics.sources.counter(
+        "lockout_replayed_events",
+        "Missed events re-sent to reconnecting clients",
+        lambda: event_log.stats["replayed_events"],
+    )
+    metrics.sources.counter(
+        "lockout_board_pool_lookups",
+        "Boards taken from the pool, or generated inline when it was empty",
+        lambda: {"hit": board_pool.stats["hits"], "miss": board_pool.stats["misses"]},
+        label="result",
+    )
+    metrics.sources.gauge(
+        "lockout_board_pool_size",
+        "Boards ready in the pool",
+        lambda: len(board_pool),
+    )
+    metrics.sources.counter(
+        "lockout_command_id_lookups",
+        "Commands sent with a command_id, by whether they were retries",
+        lambda: {
+            "duplicate": command_results.stats["hits"],
+            "new": command_results.stats["misses"],
+        },
+        label="result",
+    )
+    metrics.sources.counter(
+        "lockout_view_cache_lookups",
+        "Encoded lobby and game view lookups",
+        lambda: dict(serialization.view_cache.stats),
+        label="result",
+    )
+    if journal is not None:
+        metrics.sources.counter(
+            "lockout_journal_records",
+            "State changes written to the journal",
+            lambda: journal.stats["records"],
+        )
+        metrics.sources.gauge(
+            "lockout_journal_recovery_seconds",
+            "Time spent rebuilding state from the journal at startup",
+            lambda: journal.stats["recovery_seconds"],
+        )
+
+# Report event loop stalls and handlers that run over budget
+if Config.WATCHDOG_ENABLED:
+    watchdog = Watchdog(
+        Config.HANDLER_BUDGET_MS / 1000,
+        Config.WATCHDOG_INTERVAL_MS / 1000,
+    )
+    watchdog.init_app(app, socketio)
+
+# Run each lobby's socket events in order on its own command queue; wraps
+# the handlers last so the metrics above exclude time spent queued
+command_queues.init_app(socketio)
+
 if __name__ == '__main__':
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
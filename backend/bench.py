@@ -0,0 +1,246 @@
+# backend/bench.py
+"""
+Microbenchmarks for the game engine and lobby helpers.
+
+Each benchmark times one function on freshly prepared inputs and reports
+the best per-call time over several repeats. Benchmarks run as cases over
+lobby sizes, board presets and numbers of card selections, each named like
+``get_sanitized_game_state[preset=large,lobby=50]``. Results can be saved
+as a baseline and later runs compared against it; the run fails when any
+case is slower than its baseline by more than the threshold, or has no
+baseline at all. Both are best-of-repeats times, and a slowdown smaller
+than the noise floor never counts, so sub-microsecond cases don't fail on
+timer jitter.
+
+Usage:
+    python -m backend.bench --save              # record a baseline
+    python -m backend.bench                     # compare against it
+    python -m backend.bench --threshold 0.5 --only submit_guess
+"""
+import argparse
+import json
+import os
+import time
+
+from .constants import (
+    BOARD_PRESETS,
+    DEFAULT_BOARD_PRESET,
+    DEFAULT_WORD_PACK,
+    FIELD_IS_HOST,
+    FIELD_IS_TEAM_LEAD,
+    FIELD_TEAM,
+    TEAM1,
+    TEAM2,
+)
+from .utils.board import TEAM_CARD_TYPES
+from .utils.game import (
+    end_turn,
+    generate_game_board,
+    get_sanitized_game_state,
+    handle_card_selection,
+    new_game_state,
+    submit_guess,
+    submit_keyword,
+)
+from .utils.lobby import Lobby
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+# Slowdowns below this many seconds per call are treated as noise
+NOISE_FLOOR = 0.25e-6
+LOBBY_SIZES = (4, 10, 50, 200)
+SELECTION_COUNTS = (0, 4, 16)
+
+
+def board_config(preset):
+    return (preset, DEFAULT_WORD_PACK)
+
+
+def make_lobby(size):
+    """A lobby with two even teams, one lead each and everyone ready."""
+    participants = []
+    for i in range(size):
+        team = TEAM1 if i % 2 == 0 else TEAM2
+        participants.append({
+            "id": f"user-{i}",
+            "display_name": f"User {i}",
+            "ready": True,
+            FIELD_TEAM: team,
+            FIELD_IS_TEAM_LEAD: i < 2,
+            FIELD_IS_HOST: i == 0,
+        })
+    return Lobby({"lobby_name": "Bench", "participants": participants})
+
+
+def guessing_state(preset):
+    """A game waiting for the first team's guess on a one-card keyword."""
+    game_state = new_game_state("bench", board_config(preset))
+    submit_keyword(game_state, {"word": "BENCH", "point_count": 1, "team": TEAM1})
+    game_state["pending_ops"] = []
+    return game_state
+
+
+def first_team_card(game_state):
+    card_type = TEAM_CARD_TYPES[game_state["active_team"]]
+    return next(card.id for card in game_state["board"] if card.type == card_type)
+
+
+def prepare_guess(preset):
+    game_state = guessing_state(preset)
+    return game_state, {"card_ids": [first_team_card(game_state)]}
+
+
+def prepare_card_selection(selections):
+    """The user already has `selections` cards selected and picks one more."""
+    game_state = guessing_state(DEFAULT_BOARD_PRESET)
+    card_type = TEAM_CARD_TYPES[game_state["active_team"]]
+    others = [card.id for card in game_state["board"] if card.type != card_type]
+    game_state["selected_cards"] = {"user-2": others[:selections]}
+    return game_state, "user-2", first_team_card(game_state), True
+
+
+def case_name(name, **params):
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def build_benchmarks():
+    """Return {case name: (prepare() -> args, function)}."""
+    cases = {}
+    for preset in BOARD_PRESETS:
+        config = board_config(preset)
+        cases[case_name("generate_game_board", preset=preset)] = (
+            lambda config=config: (config,),
+            generate_game_board,
+        )
+        cases[case_name("submit_keyword", preset=preset)] = (
+            lambda config=config: (
+                new_game_state("bench", config),
+                {"word": "BENCH", "point_count": 2, "team": TEAM1},
+            ),
+            submit_keyword,
+        )
+        cases[case_name("submit_guess", preset=preset)] = (
+            lambda preset=preset: prepare_guess(preset),
+            submit_guess,
+        )
+        cases[case_name("end_turn", preset=preset)] = (
+            lambda config=config: (new_game_state("bench", config),),
+            end_turn,
+        )
+        for size in LOBBY_SIZES:
+            cases[case_name("get_sanitized_game_state", preset=preset, lobby=size)] = (
+                lambda config=config, size=size: (
+                    new_game_state("bench", config),
+                    "user-2",
+                    make_lobby(size),
+                ),
+                get_sanitized_game_state,
+            )
+    for selections in SELECTION_COUNTS:
+        cases[case_name("handle_card_selection", selections=selections)] = (
+            lambda selections=selections: prepare_card_selection(selections),
+            handle_card_selection,
+        )
+    for size in LOBBY_SIZES:
+        cases[case_name("smaller_team", lobby=size)] = (
+            lambda size=size: (make_lobby(size),),
+            Lobby.smaller_team,
+        )
+        cases[case_name("can_start", lobby=size)] = (
+            lambda size=size: (make_lobby(size),),
+            Lobby.can_start,
+        )
+    return cases
+
+
+# case name -> (prepare() -> args, function); prepare runs outside the timed loop
+BENCHMARKS = build_benchmarks()
+
+
+def run_benchmark(prepare, function, number, repeat):
+    """Return the best per-call time in seconds over `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        inputs = [prepare() for _ in range(number)]
+        started = time.perf_counter()
+        for args in inputs:
+            function(*args)
+        per_call = (time.perf_counter() - started) / number
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def compare(results, baseline, threshold, noise_floor=NOISE_FLOOR):
+    """Return [(name, seconds, baseline_seconds, ratio)] of regressions."""
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        if (
+            previous
+            and seconds > previous * (1 + threshold)
+            and seconds - previous > noise_floor
+        ):
+            regressions.append((name, seconds, previous, seconds / previous))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument(
+        "--noise-floor", type=float, default=NOISE_FLOOR * 1e6,
+        help="smallest slowdown that counts, in microseconds per call",
+    )
+    parser.add_argument("--number", type=int, default=2000, help="calls per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", action="append", help="run a case, or every case of a function"
+    )
+    args = parser.parse_args(argv)
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not args.only or any(name == only or name.startswith(f"{only}[") for only in args.only)
+    ]
+    if not names:
+        parser.error(f"no benchmark matches {args.only}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.save:
+        print(f"No baseline at {args.baseline}; record one with --save")
+        return 2
+
+    results = {}
+    width = max(len(name) for name in names)
+    for name in names:
+        prepare, function = BENCHMARKS[name]
+        results[name] = run_benchmark(prepare, function, args.number, args.repeat)
+        previous = baseline.get(name)
+        change = f"{(results[name] / previous - 1) * 100:+.1f}%" if previous else "no baseline"
+        print(f"{name:<{width}} {results[name] * 1e6:>10.2f} us  ({change})")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.noise_floor / 1e6)
+    for name, seconds, previous, ratio in regressions:
+        print(
+            f"REGRESSION {name}: {seconds * 1e6:.2f} us vs {previous * 1e6:.2f} us "
+            f"baseline ({ratio:.2f}x)"
+        )
+    missing = [name for name in results if not baseline.get(name)]
+    for name in missing:
+        print(f"MISSING {name}: not in the baseline; record it with --save")
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
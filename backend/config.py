@@ -26,3 +26,76 @@ class Config:
     # Server configuration
     PORT = int(os.getenv('PORT', 5000))
     HOST = os.getenv('HOST', '0.0.0.0')
+
+    # Lobby and game state storage
+    # 'memory' keeps state inside one worker process; 'sqlite' shares it
+    # between all workers on the host through a WAL-mode database file
+    STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+    STATE_DB_PATH = os.getenv('STATE_DB_PATH', '/tmp/lockout-state.db')
+
+    # Socket.IO message queue for fan-out between workers and hosts
+    # e.g. redis://localhost:6379/0, or local:// for the in-process test broker
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+    SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'lockout-game')
+    # How long remote emits for a lobby are buffered before being published
+    EMIT_BATCH_INTERVAL_MS = float(os.getenv('EMIT_BATCH_INTERVAL_MS', '5'))
+
+    # Game timing
+    # How long guess results stay on screen before the turn passes
+    REVEAL_DELAY_SECONDS = float(os.getenv('REVEAL_DELAY_SECONDS', '3'))
+
+    # Card selection broadcasts
+    # Selection clicks in a lobby are merged over this window into one frame
+    SELECTION_WINDOW_MS = float(os.getenv('SELECTION_WINDOW_MS', '75'))
+    # Per-connection token bucket for selection clicks
+    SELECTION_RATE_PER_SECOND = float(os.getenv('SELECTION_RATE_PER_SECOND', '10'))
+    SELECTION_BURST = int(os.getenv('SELECTION_BURST', '20'))
+
+    # Seconds a disconnected participant stays 'away' before being removed
+    PRESENCE_GRACE_SECONDS = float(os.getenv('PRESENCE_GRACE_SECONDS', '60'))
+
+    # Recent lobby events kept per lobby for replay to reconnecting clients
+    EVENT_LOG_SIZE = int(os.getenv('EVENT_LOG_SIZE', '128'))
+    EVENT_LOG_TTL_SECONDS = float(os.getenv('EVENT_LOG_TTL_SECONDS', '120'))
+
+    # Results of commands sent with a command_id, kept per lobby to answer retries
+    COMMAND_RESULTS_SIZE = int(os.getenv('COMMAND_RESULTS_SIZE', '256'))
+    COMMAND_RESULTS_TTL_SECONDS = float(os.getenv('COMMAND_RESULTS_TTL_SECONDS', '60'))
+
+    # Spectators of one game connected to a single worker
+    MAX_SPECTATORS_PER_GAME = int(os.getenv('MAX_SPECTATORS_PER_GAME', '5000'))
+
+    # Directory of word packs, one <theme>.txt file per theme
+    WORD_PACK_DIR = os.getenv('WORD_PACK_DIR') or os.path.join(os.path.dirname(__file__), 'words')
+
+    # Boards generated ahead of time per board configuration
+    BOARD_POOL_SIZE = int(os.getenv('BOARD_POOL_SIZE', '32'))
+    BOARD_POOL_REFILL_SECONDS = float(os.getenv('BOARD_POOL_REFILL_SECONDS', '5'))
+    # Seed for reproducible boards; unset for random ones
+    BOARD_SEED = os.getenv('BOARD_SEED') or None
+
+    # Eviction of abandoned lobbies and their games
+    LOBBY_IDLE_TTL_SECONDS = float(os.getenv('LOBBY_IDLE_TTL_SECONDS', '7200'))
+    MAX_LOBBIES = int(os.getenv('MAX_LOBBIES', '10000'))
+    REAPER_INTERVAL_SECONDS = float(os.getenv('REAPER_INTERVAL_SECONDS', '60'))
+
+    # Journal for the memory backend so games survive restarts and deploys
+    # Unset JOURNAL_DIR to keep state in memory only
+    JOURNAL_DIR = os.getenv('JOURNAL_DIR') or None
+    JOURNAL_FSYNC = os.getenv('JOURNAL_FSYNC', 'false').lower() == 'true'
+    JOURNAL_FLUSH_INTERVAL_MS = float(os.getenv('JOURNAL_FLUSH_INTERVAL_MS', '50'))
+    JOURNAL_SNAPSHOT_SECONDS = float(os.getenv('JOURNAL_SNAPSHOT_SECONDS', '300'))
+
+    # JSON encoding: 'orjson' when installed, or 'json' for the standard library
+    JSON_LIBRARY = os.getenv('JSON_LIBRARY', 'orjson')
+    # Encoded lobby and game views kept for reuse until their state changes
+    VIEW_CACHE_SIZE = int(os.getenv('VIEW_CACHE_SIZE', '4096'))
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Event loop lag and slow handler detection
+    WATCHDOG_ENABLED = os.getenv('WATCHDOG_ENABLED', 'true').lower() == 'true'
+    # Handlers running longer than this, or a hub blocked this long, are logged
+    HANDLER_BUDGET_MS = float(os.getenv('HANDLER_BUDGET_MS', '100'))
+    WATCHDOG_INTERVAL_MS = float(os.getenv('WATCHDOG_INTERVAL_MS', '50'))
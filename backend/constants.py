@@ -15,6 +15,9 @@ LOBBY_START_GAME = "lobby:start_game"
 LOBBY_FORCE_START = "lobby:force_start"
 LOBBY_CHANGE_TEAM = "lobby:change_team"
 LOBBY_END_GAME = "lobby:end_game"
+LOBBY_PATCH = "lobby:patch"     # Sends the roster changes of one lobby version
+LOBBY_SYNC = "lobby:sync"       # Client requests a full snapshot after a gap
+LOBBY_READY = "lobby:ready"     # Whether the game can be started changed
 
 # Game-related socket events
 GAME_UPDATE = "game:update"               # Sends updated game state
@@ -23,6 +26,8 @@ GAME_SUBMIT_GUESS = "game:submit_guess"   # Team members submit their card guess
 GAME_SELECT_CARD = "game:select_card"     # Team member selects/deselects a card
 GAME_CARD_SELECTION_UPDATE = "game:card_selection_update" # Broadcast card selection changes
 GAME_ERROR = "game:error"                 # Game-related errors
+GAME_PATCH = "game:patch"                 # Sends a seq-numbered delta of the game state
+GAME_SYNC = "game:sync"                   # Client requests a full snapshot after a gap
 
 # Game card types
 CARD_TYPE_TEAM1 = "team1_card"   # Team 1 cards
@@ -36,6 +41,34 @@ TEAM2_CARD_COUNT = 5    # Number of Team 2 cards
 PENALTY_CARD_COUNT = 1  # Number of Penalty cards
 NEUTRAL_CARD_COUNT = 4  # Number of Neutral cards
 
+# Board presets: grid columns, cards of each type and longest word allowed
+BOARD_PRESET_CLASSIC = "classic"  # 4x4, 16 cards
+BOARD_PRESET_LARGE = "large"      # 5x5, 25 cards
+BOARD_PRESETS = {
+    BOARD_PRESET_CLASSIC: {
+        "columns": 4,
+        "cards": (
+            (CARD_TYPE_TEAM1, TEAM1_CARD_COUNT),
+            (CARD_TYPE_TEAM2, TEAM2_CARD_COUNT),
+            (CARD_TYPE_PENALTY, PENALTY_CARD_COUNT),
+            (CARD_TYPE_NEUTRAL, NEUTRAL_CARD_COUNT),
+        ),
+        "max_word_length": None,
+    },
+    BOARD_PRESET_LARGE: {
+        "columns": 5,
+        "cards": (
+            (CARD_TYPE_TEAM1, 9),
+            (CARD_TYPE_TEAM2, 8),
+            (CARD_TYPE_PENALTY, 1),
+            (CARD_TYPE_NEUTRAL, 7),
+        ),
+        "max_word_length": 10,  # Keeps words readable on smaller tiles
+    },
+}
+DEFAULT_BOARD_PRESET = BOARD_PRESET_CLASSIC
+DEFAULT_WORD_PACK = "security"
+
 # Game phases
 GAME_PHASE_KEYWORD_ENTRY = "keyword_entry"  # Team lead provides a keyword
 GAME_PHASE_TEAM_GUESSING = "team_guessing"  # Team members make guesses
@@ -50,6 +83,21 @@ TEAM2 = "team2"
 FIELD_TEAM = "team"
 FIELD_IS_TEAM_LEAD = "is_team_lead"
 FIELD_IS_HOST = "is_host"
+FIELD_PRESENCE = "presence"
+FIELD_READY = "ready"
+
+# Lobby field keys
+FIELD_CAN_START = "can_start"
+
+# Participant presence (see utils/presence.py)
+PRESENCE_CONNECTED = "connected"  # Has at least one open connection
+PRESENCE_AWAY = "away"            # Disconnected, within the grace period
+PRESENCE_GONE = "gone"            # Grace period over; removed from the lobby
+
+# Game view roles; each role has its own broadcast room per lobby
+ROLE_LEADS = "leads"      # Team leads see unrevealed card types
+ROLE_MEMBERS = "members"  # Team members only see revealed card types
+ROLE_SPECTATORS = "spectators"  # Watchers outside the lobby; get the members view
 
 # Default values
 DEFAULT_TEAM = TEAM1
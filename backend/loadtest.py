@@ -0,0 +1,472 @@
+# backend/loadtest.py
+"""
+Load-test harness that plays complete games against a running server.
+
+Every simulated lobby creates a lobby over REST, connects its players with
+the python-socketio client, assigns team leads, has every player ready up,
+starts the game once the server reports it can start and plays it to the
+end: the active lead gives a one-card keyword and a member
+of the active team selects and guesses one of the team's cards.
+
+Reported at the end:
+- round-trip time percentiles per command (emit until the resulting patch
+  comes back to the sender)
+- commands and received patches per second
+- dropped patches (seq gaps seen by clients) and late patches (delivered
+  to a player more than --late-ms after the command was sent)
+- server RSS at start, peak and end when --server-pid is given (Linux)
+
+Usage:
+    pip install -r backend/requirements-loadtest.txt
+    REVEAL_DELAY_SECONDS=0.2 python -m backend.app  # in another shell
+    python -m backend.loadtest --url http://localhost:5000 --lobbies 50
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+import uuid
+
+import socketio
+
+from .constants import (
+    CARD_TYPE_TEAM1,
+    CARD_TYPE_TEAM2,
+    GAME_ERROR,
+    GAME_PATCH,
+    GAME_PHASE_KEYWORD_ENTRY,
+    GAME_PHASE_REVEAL_RESULTS,
+    GAME_PHASE_TEAM_GUESSING,
+    GAME_SELECT_CARD,
+    GAME_SUBMIT_GUESS,
+    GAME_SUBMIT_KEYWORD,
+    GAME_UPDATE,
+    LOBBY_ASSIGN_TEAM_LEAD,
+    LOBBY_ERROR,
+    LOBBY_JOIN,
+    LOBBY_PATCH,
+    LOBBY_READY,
+    LOBBY_START_GAME,
+    LOBBY_TOGGLE_READY,
+    LOBBY_UPDATE,
+    TEAM1,
+    TEAM2,
+)
+
+TEAM_CARD_TYPES = {TEAM1: CARD_TYPE_TEAM1, TEAM2: CARD_TYPE_TEAM2}
+
+# What makes a simulated lobby fail: connection and HTTP errors (OSError
+# covers URLError and timeouts), Socket.IO client errors and replies
+# that don't match what the game should do
+LOBBY_ERRORS = (OSError, socketio.exceptions.SocketIOError, RuntimeError, KeyError, ValueError)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def read_rss(pid):
+    """Resident set size of a process in bytes, from /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class Stats:
+    """Counters shared by every simulated lobby."""
+
+    def __init__(self, late_ms):
+        self.late = late_ms / 1000
+        self._lock = threading.Lock()
+        self.rtts = {}  # command -> [seconds]
+        self.commands = 0
+        self.patches = 0
+        self.dropped = 0
+        self.late_patches = 0
+        self.errors = []
+        self.games_finished = 0
+        self.games_failed = 0
+
+    def command(self, name, rtt):
+        with self._lock:
+            self.commands += 1
+            self.rtts.setdefault(name, []).append(rtt)
+
+    def patch(self, delay):
+        with self._lock:
+            self.patches += 1
+            if delay is not None and delay > self.late:
+                self.late_patches += 1
+
+    def error(self, message):
+        with self._lock:
+            self.errors.append(message)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+
+class Player:
+    """One socket.io connection playing as one user."""
+
+    def __init__(self, url, lobby_id, user_id, stats, sent):
+        self.url = url
+        self.lobby_id = lobby_id
+        self.user_id = user_id
+        self.stats = stats
+        self.sent = sent  # seq -> when the command producing it was sent
+        self.team = None
+        self.is_team_lead = False
+        self.can_start = False
+        self.started = False
+        self.board = {}  # card id -> card dict from the last snapshot
+        self.seq = None
+        self.snapshot_seq = None
+        self.seqs = set()
+        self.active_team = None
+        self.game_phase = None
+        self.game_over = False
+        self.cond = threading.Condition()
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on(LOBBY_UPDATE, self._on_lobby_update)
+        self.sio.on(LOBBY_PATCH, self._on_lobby_patch)
+        self.sio.on(LOBBY_READY, self._on_lobby_ready)
+        self.sio.on(LOBBY_START_GAME, self._on_start_game)
+        self.sio.on(GAME_UPDATE, self._on_game_update)
+        self.sio.on(GAME_PATCH, self._on_game_patch)
+        self.sio.on(LOBBY_ERROR, self._on_error)
+        self.sio.on(GAME_ERROR, self._on_error)
+
+    def _notify(self):
+        self.cond.notify_all()
+
+    def _on_lobby_update(self, lobby, _position=None):
+        with self.cond:
+            for participant in lobby["participants"]:
+                if participant["id"] == self.user_id:
+                    self.team = participant["team"]
+                    self.is_team_lead = participant["is_team_lead"]
+            self.can_start = lobby.get("can_start", False)
+            self._notify()
+
+    def _on_lobby_patch(self, patch, _position=None):
+        with self.cond:
+            for op in patch["ops"]:
+                if op["op"] == "participant_updated" and op["id"] == self.user_id:
+                    self.team = op["fields"].get("team", self.team)
+                    self.is_team_lead = op["fields"].get("is_team_lead", self.is_team_lead)
+            self._notify()
+
+    def _on_lobby_ready(self, data, _position=None):
+        with self.cond:
+            self.can_start = data["can_start"]
+            self._notify()
+
+    def _on_start_game(self, _data, _position=None):
+        with self.cond:
+            self.started = True
+            self._notify()
+
+    def _on_game_update(self, state, _position=None):
+        with self.cond:
+            self.board = {card["id"]: card for card in state["board"]}
+            self.seq = state["seq"]
+            if self.snapshot_seq is None:
+                self.snapshot_seq = state["seq"]
+            self.active_team = state["active_team"]
+            self.game_phase = state["game_phase"]
+            self.game_over = state["game_over"]
+            self._notify()
+
+    def _on_game_patch(self, patch, _position=None):
+        received = time.monotonic()
+        sent_at = self.sent.get(patch["seq"])
+        with self.cond:
+            self.seqs.add(patch["seq"])
+            self.seq = max(self.seq or 0, patch["seq"])
+            for op in patch["ops"]:
+                if op["op"] == "reveal":
+                    for card in op["cards"]:
+                        self.board.setdefault(card["id"], {}).update(card, revealed=True)
+                elif op["op"] == "phase":
+                    self.game_phase = op["game_phase"]
+                elif op["op"] == "turn":
+                    self.active_team = op["active_team"]
+                elif op["op"] == "game_over":
+                    self.game_over = True
+            self._notify()
+        self.stats.patch(None if sent_at is None else received - sent_at)
+
+    def _on_error(self, error):
+        self.stats.error(f"{self.user_id}: {error.get('message')}")
+
+    def connect(self):
+        self.sio.connect(self.url, transports=["websocket"])
+
+    def emit(self, event, data):
+        self.sio.emit(event, {"lobby_id": self.lobby_id, "user_id": self.user_id, **data})
+
+    def wait_for(self, predicate, timeout):
+        with self.cond:
+            if not self.cond.wait_for(predicate, timeout):
+                raise TimeoutError(f"{self.user_id} timed out")
+
+    def disconnect(self):
+        self.sio.disconnect()
+
+
+class LobbyRun(threading.Thread):
+    """Plays one complete game in its own lobby."""
+
+    def __init__(self, url, players, stats, timeout, max_turns):
+        super().__init__(daemon=True)
+        self.url = url
+        self.player_count = players
+        self.stats = stats
+        self.timeout = timeout
+        self.max_turns = max_turns
+        self.players = []
+        self.sent = {}
+
+    def _create_lobby(self, host_id):
+        request = urllib.request.Request(
+            f"{self.url}/api/lobby",
+            data=json.dumps({
+                "host_id": host_id,
+                "host_display_name": "Host",
+                "lobby_name": "Load test",
+            }).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["lobby_id"]
+
+    def run(self):
+        try:
+            self._play()
+            self.stats.add(games_finished=1)
+        except LOBBY_ERRORS as exc:
+            self.stats.add(games_failed=1)
+            self.stats.error(f"lobby failed: {exc!r}")
+        finally:
+            for player in self.players:
+                try:
+                    player.disconnect()
+                except socketio.exceptions.SocketIOError as exc:
+                    self.stats.error(f"{player.user_id}: disconnect failed: {exc!r}")
+
+    def _timed(self, name, player, event, data, phase):
+        """Send a command and wait for the sender to see the phase it leads to."""
+        started = time.monotonic()
+        # The command's patch is the next one; later turn ends aren't timed
+        self.sent[player.seq + 1] = started
+        player.emit(event, data)
+        player.wait_for(lambda: player.game_phase == phase, self.timeout)
+        self.stats.command(name, time.monotonic() - started)
+
+    def _play(self):
+        host_id = f"host-{uuid.uuid4().hex[:8]}"
+        lobby_id = self._create_lobby(host_id)
+        user_ids = [host_id] + [
+            f"p{i}-{uuid.uuid4().hex[:8]}" for i in range(1, self.player_count)
+        ]
+
+        for user_id in user_ids:
+            player = Player(self.url, lobby_id, user_id, self.stats, self.sent)
+            player.connect()
+            self.players.append(player)
+            player.sio.emit(LOBBY_JOIN, {
+                "lobby_id": lobby_id,
+                "user": {"id": user_id, "display_name": user_id},
+            })
+            player.wait_for(lambda p=player: p.team is not None, self.timeout)
+
+        # Last joiner has seen every team assignment by now
+        host = self.players[0]
+        teams = {TEAM1: [], TEAM2: []}
+        for player in self.players:
+            teams[player.team].append(player)
+        if any(len(members) < 2 for members in teams.values()):
+            raise RuntimeError("each team needs a lead and a member")
+        if len(teams[TEAM1]) != len(teams[TEAM2]):
+            raise RuntimeError("a game can only start with even teams")
+
+        leads = {team: members[0] for team, members in teams.items()}
+        guessers = {team: members[1] for team, members in teams.items()}
+        for team, lead in leads.items():
+            host.sio.emit(LOBBY_ASSIGN_TEAM_LEAD, {
+                "lobby_id": lobby_id, "user_id": lead.user_id, "team": team,
+            })
+        # Events from one connection may be handled concurrently, so wait
+        # for each step to land before sending the next
+        for lead in leads.values():
+            lead.wait_for(lambda p=lead: p.is_team_lead, self.timeout)
+        # Becoming a lead clears ready, so everyone readies up afterwards
+        for player in self.players:
+            player.emit(LOBBY_TOGGLE_READY, {})
+        host.wait_for(lambda: host.can_start, self.timeout)
+        host.emit(LOBBY_START_GAME, {})
+
+        for player in self.players:
+            player.wait_for(lambda p=player: p.started, self.timeout)
+            player.emit("join_game", {})
+        for player in self.players:
+            player.wait_for(lambda p=player: p.seq is not None, self.timeout)
+
+        active_team = TEAM1
+        for _ in range(self.max_turns):
+            lead = leads[active_team]
+            guesser = guessers[active_team]
+            for player in (lead, guesser):
+                player.wait_for(
+                    lambda p=player, team=active_team: p.active_team == team
+                    and p.game_phase == GAME_PHASE_KEYWORD_ENTRY,
+                    self.timeout,
+                )
+            card_id = next(
+                (
+                    card["id"]
+                    for card in lead.board.values()
+                    if not card["revealed"] and card.get("type") == TEAM_CARD_TYPES[active_team]
+                ),
+                None,
+            )
+            if card_id is None:
+                raise RuntimeError(f"{active_team} has no unrevealed card left")
+
+            self._timed(
+                GAME_SUBMIT_KEYWORD, lead, GAME_SUBMIT_KEYWORD,
+                {"keyword": {"word": "LOAD", "point_count": 1}},
+                GAME_PHASE_TEAM_GUESSING,
+            )
+
+            guesser.wait_for(lambda p=guesser: p.game_phase == GAME_PHASE_TEAM_GUESSING, self.timeout)
+            guesser.emit(GAME_SELECT_CARD, {"card_id": card_id, "is_selected": True})
+            self._timed(
+                GAME_SUBMIT_GUESS, guesser, GAME_SUBMIT_GUESS,
+                {"card_ids": [card_id]},
+                GAME_PHASE_REVEAL_RESULTS,
+            )
+            if guesser.game_over:
+                break
+
+            # The server ends the turn once the results have been shown
+            active_team = TEAM2 if active_team == TEAM1 else TEAM1
+
+        # Let the last patch reach everyone, then count what went missing
+        time.sleep(0.5)
+        final_seq = max(player.seq for player in self.players)
+        for player in self.players:
+            expected = set(range(player.snapshot_seq + 1, final_seq + 1))
+            self.stats.add(dropped=len(expected - player.seqs))
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.start_rss = read_rss(pid)
+        self.peak_rss = self.start_rss
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = read_rss(self.pid)
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def stop(self):
+        self.stopped.set()
+        return read_rss(self.pid)
+
+
+def report(stats, duration, lobbies, rss=None):
+    """Build the summary printed at the end of a run."""
+    summary = {
+        "lobbies": lobbies,
+        "games_finished": stats.games_finished,
+        "games_failed": stats.games_failed,
+        "duration_seconds": round(duration, 3),
+        "commands_per_second": round(stats.commands / duration, 1) if duration else 0,
+        "patches_per_second": round(stats.patches / duration, 1) if duration else 0,
+        "dropped_patches": stats.dropped,
+        "late_patches": stats.late_patches,
+        "errors": len(stats.errors),
+        "rtt_ms": {
+            name: {
+                pct: round(percentile(values, value) * 1000, 2)
+                for pct, value in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+            }
+            for name, values in stats.rtts.items()
+        },
+    }
+    if rss:
+        summary["server_rss_bytes"] = rss
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--lobbies", type=int, default=10)
+    parser.add_argument("--players", type=int, default=4, help="players per lobby (even, >= 4)")
+    parser.add_argument("--ramp", type=float, default=0.05, help="seconds between lobby starts")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds to wait for a reply")
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--late-ms", type=float, default=250.0)
+    parser.add_argument("--server-pid", type=int, help="sample this process's RSS")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    if args.players < 4 or args.players % 2:
+        parser.error("--players must be an even number of at least 4")
+
+    stats = Stats(args.late_ms)
+    sampler = None
+    if args.server_pid:
+        sampler = RssSampler(args.server_pid)
+        sampler.start()
+
+    started = time.monotonic()
+    runs = []
+    for _ in range(args.lobbies):
+        run = LobbyRun(args.url, args.players, stats, args.timeout, args.max_turns)
+        run.start()
+        runs.append(run)
+        time.sleep(args.ramp)
+    for run in runs:
+        run.join()
+    duration = time.monotonic() - started
+
+    rss = None
+    if sampler:
+        end_rss = sampler.stop()
+        rss = {"start": sampler.start_rss, "peak": sampler.peak_rss, "end": end_rss}
+
+    summary = report(stats, duration, args.lobbies, rss)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+        for error in stats.errors[:10]:
+            print(f"error: {error}")
+    return 0 if not stats.games_failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,8 +2,9 @@
 
 from flask import Blueprint, jsonify, request
 
-from ..utils.game import get_game, get_sanitized_game_state
-from ..routes.lobby import get_lobbies
+from ..utils.game import encoded_game_view, game_etag, get_user_role
+from ..utils.serialization import conditional_response
+from ..utils.store import state_session
 
 # Create a Blueprint for game routes
 game_bp = Blueprint('game', __name__, url_prefix='/game')
@@ -15,6 +16,10 @@ def get_game_state(lobby_id):
     
     This endpoint is useful for initially loading the game state
     or for reconnecting to an ongoing game.
+    
+    Each role's view has its own ETag, derived from the state's version; a
+    request whose If-None-Match matches it gets a 304 before the state is
+    sanitized or encoded.
     """
     # Get the user_id from query parameters
     user_id = request.args.get('user_id')
@@ -22,21 +27,20 @@ def get_game_state(lobby_id):
     if not user_id:
         return jsonify({"error": "user_id query parameter is required"}), 400
     
-    # Get the game state
-    game_state = get_game(lobby_id)
+    # Get the game state and the lobby (for participants) in one read
+    with state_session(readonly=True) as state:
+        lobby, game_state = state.load(lobby_id)
     
     if not game_state:
         return jsonify({"error": "Game not found"}), 404
     
-    # Get the lobby to access participants
-    lobbies = get_lobbies()
-    if lobby_id not in lobbies:
+    if not lobby:
         return jsonify({"error": "Associated lobby not found"}), 404
     
-    lobby = lobbies[lobby_id]
-    
-    # Sanitize the game state based on user role
-    sanitized_state = get_sanitized_game_state(game_state, user_id, lobby['participants'])
-    
-    # Return the sanitized game state
-    return jsonify(sanitized_state)
\ No newline at end of file
+    # Return the game state sanitized for the user's role; each role's view
+    # is encoded once per version of the state
+    role = get_user_role(lobby, user_id)
+    return conditional_response(
+        game_etag(game_state, role),
+        lambda: encoded_game_view(game_state, role),
+    )
\ No newline at end of file
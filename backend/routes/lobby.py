@@ -5,19 +5,28 @@ import uuid
 
 from ..config import Config
 from ..constants import (
+    BOARD_PRESETS,
+    DEFAULT_BOARD_PRESET,
     DEFAULT_TEAM,
+    DEFAULT_WORD_PACK,
     FIELD_IS_HOST,
     FIELD_IS_TEAM_LEAD,
     FIELD_TEAM,
 )
+from ..utils.lobby import Lobby, encoded_lobby_view, lobby_etag
+from ..utils.serialization import conditional_response
+from ..utils.store import get_lobby_store, state_session
+from ..utils.words import word_packs
 
 lobby_bp = Blueprint("lobby_bp", __name__)
 
-# In-memory store for lobbies
+# Lobby documents kept in the lobby store (see utils/store.py)
 # {
 #   lobby_id: {
 #     'host': str,
 #     'lobby_name': str,
+#     'board_preset': str,  # Key of BOARD_PRESETS
+#     'word_pack': str,  # Theme of the word pack boards are drawn from
 #     'participants': [
 #       {
 #         'id': str,
@@ -36,12 +45,10 @@ lobby_bp = Blueprint("lobby_bp", __name__)
 #   'host': str,
 #   // ...other fields as above
 # }
-lobbies = {}
-
 
 def get_lobbies():
     """Returns the current lobby store."""
-    return lobbies
+    return get_lobby_store()
 
 
 @lobby_bp.route("/lobby", methods=["POST"])
@@ -51,9 +58,15 @@ def create_lobby():
     host_id = data.get("host_id")
     host_name = data.get("host_display_name", "Host")
     lobby_name = data.get("lobby_name", "Default Lobby")
+    board_preset = data.get("board_preset", DEFAULT_BOARD_PRESET)
+    word_pack = data.get("word_pack", DEFAULT_WORD_PACK)
 
     if not host_id:
         return jsonify({"error": "host_id is required"}), 400
+    if board_preset not in BOARD_PRESETS:
+        return jsonify({"error": f"Unknown board_preset, use one of {sorted(BOARD_PRESETS)}"}), 400
+    if word_packs.get(word_pack) is None:
+        return jsonify({"error": f"Unknown word_pack, use one of {word_packs.themes()}"}), 400
 
     lobby_id = str(uuid.uuid4())
     team = DEFAULT_TEAM
@@ -67,11 +80,14 @@ def create_lobby():
         FIELD_IS_HOST: True,
     }
 
-    lobbies[lobby_id] = {
-        "host": host_id,
-        "lobby_name": lobby_name,
-        "participants": [participant],
-    }
+    with state_session() as state:
+        state.add_lobby(lobby_id, Lobby({
+            "host": host_id,
+            "lobby_name": lobby_name,
+            "board_preset": board_preset,
+            "word_pack": word_pack,
+            "participants": [participant],
+        }))
 
     lobby_url = f"{Config.FRONTEND_URL}/game/{lobby_id}"
 
@@ -87,12 +103,36 @@ def create_lobby():
     )
 
 
+@lobby_bp.route("/lobby/options", methods=["GET"])
+def get_lobby_options():
+    """Returns the board presets and word packs a lobby can be created with."""
+    return jsonify(
+        {
+            "board_presets": {
+                name: {
+                    "columns": preset["columns"],
+                    "card_count": sum(count for _, count in preset["cards"]),
+                }
+                for name, preset in BOARD_PRESETS.items()
+            },
+            "word_packs": word_packs.themes(),
+        }
+    )
+
+
 @lobby_bp.route("/lobby/<lobby_id>", methods=["GET"])
 def get_lobby(lobby_id):
-    """Returns a lobby by ID."""
-    lobby = lobbies.get(lobby_id)
+    """
+    Returns a lobby by ID.
+
+    Responses carry an ETag of the lobby's version; a request whose
+    If-None-Match matches it gets a 304 without the lobby being encoded.
+    """
+    lobby = get_lobby_store().get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
-    # Return lobby data with the ID included
-    response_data = {**lobby, "id": lobby_id}
-    return jsonify(response_data), 200
+    # Return lobby data with the ID included, encoded once per version
+    return conditional_response(
+        lobby_etag(lobby_id, lobby),
+        lambda: encoded_lobby_view(lobby_id, lobby),
+    )
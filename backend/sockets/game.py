@@ -1,93 +1,288 @@
 # backend/sockets/game.py
+import functools
 
-from flask_socketio import emit, join_room, leave_room
+from flask import request
+from flask_socketio import emit, join_room
 
 from ..constants import (
     GAME_ERROR,
     GAME_UPDATE,
+    GAME_PATCH,
+    GAME_SYNC,
     GAME_SUBMIT_KEYWORD,
     GAME_SUBMIT_GUESS,
     GAME_SELECT_CARD,
     GAME_CARD_SELECTION_UPDATE,
     FIELD_IS_TEAM_LEAD,
     FIELD_TEAM,
+    GAME_PHASE_REVEAL_RESULTS,
+    ROLE_MEMBERS,
+    ROLE_SPECTATORS,
 )
-from ..routes.lobby import get_lobbies
+from ..config import Config
 from ..utils.game import (
+    board_config,
     create_game,
-    get_game,
-    get_sanitized_game_state,
+    encoded_game_view,
+    get_user_role,
     submit_keyword,
     submit_guess,
     end_turn,
-    handle_card_selection
+    handle_card_selection,
+    take_game_patch,
+    TIMER_END_TURN,
 )
+from ..utils.dedup import command_key, command_results
+from ..utils.lobby import broadcast_lobby_update, send_lobby_snapshot
+from ..utils.metrics import SPECTATOR_JOINS
+from ..utils.presence import presence
+from ..utils.rooms import (
+    STREAM_ROLES,
+    join_role_room,
+    leave_game_rooms,
+    player_room,
+    role_room,
+    room_size,
+)
+from ..utils.ratelimit import RateLimiter
+from ..utils.scheduler import scheduler
+from ..utils.selection import SelectionCoalescer
+from ..utils.replay import STATE_GAME, STATE_LOBBY, broadcast, event_log
+from ..utils.store import state_session
+
+# Acknowledgement of an accepted command
+ACCEPTED = {"ok": True}
+
+
+def reject(message):
+    """Send a game error to the requesting client and return it as the result."""
+    emit(GAME_ERROR, {"message": message})
+    return {"ok": False, "message": message}
+
+
+def idempotent(event):
+    """
+    Answer retries of a command that carries a ``command_id`` with the
+    result of its first run, instead of running it again.
+
+    A retried rejection is sent its error again; a retried success only
+    gets its acknowledgement, as its changes were already broadcast.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(data):
+            lobby_id = data.get('lobby_id')
+            key = command_key(event, data.get('user_id'), data.get('command_id'))
+            if not lobby_id or key is None:
+                return handler(data)
+
+            seen, result = command_results.get(lobby_id, key)
+            if seen:
+                if not result["ok"]:
+                    emit(GAME_ERROR, {"message": result["message"]})
+                return result
+
+            result = handler(data)
+            command_results.put(lobby_id, key, result)
+            return result
+
+        return wrapper
+
+    return decorator
 
 
 def register_game_socket_handlers(socketio):
     """Registers game-specific socket events."""
     
-    def send_game_update(lobby_id, game_state, participants):
-        """Send game state updates to all players in the room, sanitizing as needed."""
-        for participant in participants:
-            user_id = participant["id"]
-            sanitized_state = get_sanitized_game_state(game_state, user_id, participants)
+    def send_game_update(lobby_id, game_state):
+        """
+        Send the changes since the last update to all players in the game.
+        
+        Changes go out as one seq-numbered patch that is the same for every
+        role; it is encoded once and emitted once to each role room,
+        spectators included, so the cost does not grow with the number of
+        players or viewers.
+        """
+        patch = take_game_patch(game_state)
+        if not patch:
+            return
+        rooms = [role_room(lobby_id, role) for role in STREAM_ROLES]
+        broadcast(socketio, lobby_id, GAME_PATCH, patch, rooms=rooms, state=(STATE_GAME, patch["seq"]))
+    
+    def end_turn_after_reveal(lobby_id):
+        """Scheduled end of a turn once guess results have been shown."""
+        with state_session() as state:
+            lobby, game_state = state.load(lobby_id)
+            if not lobby or not game_state:
+                return
+            
+            # The turn may have been ended by hand in the meantime
+            if game_state.get("game_over") or game_state["game_phase"] != GAME_PHASE_REVEAL_RESULTS:
+                return
             
-            # Send personalized game state to each player
-            emit(GAME_UPDATE, sanitized_state, to=f"{lobby_id}_{user_id}")
+            end_turn(game_state)
+            send_game_update(lobby_id, game_state)
+    
+    def send_selection_update(lobby_id, frame):
+        """Broadcast a merged card selection diff to the lobby."""
+        broadcast(socketio, lobby_id, GAME_CARD_SELECTION_UPDATE, frame)
+    
+    selections = SelectionCoalescer(Config.SELECTION_WINDOW_MS / 1000, send_selection_update)
+    selection_limiter = RateLimiter(Config.SELECTION_RATE_PER_SECOND, Config.SELECTION_BURST)
+    
+    def send_game_snapshot(lobby, user_id, game_state):
+        """Send the full game state for the user's role to the requester."""
+        # Fold any unsent changes into the state first so seq stays in step
+        lobby_id = game_state["lobby_id"]
+        send_game_update(lobby_id, game_state)
+        emit(
+            GAME_UPDATE,
+            (encoded_game_view(game_state, get_user_role(lobby, user_id)), event_log.position(lobby_id)),
+        )
+    
+    def resume_game(lobby, user_id, game_state, position):
+        """
+        Catch a reconnecting player up from the last event position they saw.
+        
+        Missed events are re-sent as they were broadcast. When some are no
+        longer kept, or another worker changed the lobby or game meanwhile,
+        the lobby and game are sent as snapshots instead; so is
+        the game when the player's role changed while they were away.
+        """
+        lobby_id = game_state["lobby_id"]
+        # Unsent changes go into the log first so they are part of the replay
+        send_game_update(lobby_id, game_state)
+        events = event_log.since(
+            lobby_id,
+            position,
+            {STATE_LOBBY: lobby.version, STATE_GAME: game_state.get("seq", 0)},
+        )
+        if events is None:
+            send_lobby_snapshot(lobby_id, lobby)
+            send_game_snapshot(lobby, user_id, game_state)
+            return
+        for event_position, event, payload in events:
+            emit(event, (payload, event_position))
+        if event_log.role_changed_since(lobby_id, user_id, position):
+            send_game_snapshot(lobby, user_id, game_state)
+    
+    def join_as_spectator(lobby_id):
+        """
+        Add the connection to the game's spectator room.
+
+        Spectators are not lobby participants; they get the members' view,
+        which is encoded once per state version however many are watching.
+        The cap is per worker, as only local connections can be counted.
+        """
+        with state_session(readonly=True) as state:
+            lobby, game_state = state.load(lobby_id)
+        if not lobby or not game_state:
+            emit(GAME_ERROR, {"message": "Game not found"})
+            return
+        
+        room = role_room(lobby_id, ROLE_SPECTATORS)
+        if room_size(socketio.server, room, namespace=request.namespace) >= Config.MAX_SPECTATORS_PER_GAME:
+            SPECTATOR_JOINS.labels("rejected").inc()
+            emit(GAME_ERROR, {"message": "This game has reached its spectator limit"})
+            return
+        
+        SPECTATOR_JOINS.labels("accepted").inc()
+        join_room(lobby_id)  # Card selections are broadcast to the lobby room
+        join_room(room)
+        emit(GAME_UPDATE, (encoded_game_view(game_state, ROLE_MEMBERS), event_log.position(lobby_id)))
     
     @socketio.on('connect')
     def handle_connect():
         """Handle client connections"""
         pass
     
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        """Handle client disconnections"""
+        selection_limiter.forget(request.sid)
+        # Socket.IO drops the connection from its rooms; the player is
+        # marked away and removed if they don't return within the grace
+        presence.disconnected(request.sid)
+    
     @socketio.on('join_game')
     def handle_join_game(data):
-        """Handle a player joining a game"""
+        """Handle a player joining a game, or a spectator when spectator is set"""
         lobby_id = data.get('lobby_id')
         user_id = data.get('user_id')
         
+        if lobby_id and data.get('spectator'):
+            join_as_spectator(lobby_id)
+            return
+        
         if not lobby_id or not user_id:
             emit(GAME_ERROR, {"message": "Missing lobby_id or user_id"})
             return
             
         # Create a unique room for this player in this lobby
-        # This allows us to send personalized game states
-        player_room = f"{lobby_id}_{user_id}"
-        join_room(player_room)
+        # This lets role changes find all of the player's connections
+        join_room(player_room(lobby_id, user_id))
         join_room(lobby_id)  # Also join the lobby room for broadcast messages
         
-        # Get the lobby data
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(GAME_ERROR, {"message": "Lobby not found"})
-            return
+        with state_session() as state:
+            # Get the lobby data
+            lobby = state.lobby(lobby_id)
+            if not lobby:
+                emit(GAME_ERROR, {"message": "Lobby not found"})
+                return
+            
+            # Get or create game state
+            game_state = create_game(lobby_id, state, board_config(lobby))
+            
+            # Game updates are broadcast per role, so join the room for ours
+            role = get_user_role(lobby, user_id)
+            join_role_room(socketio.server, request.sid, lobby_id, role, namespace=request.namespace)
+            
+            presence_changed = presence.connected(request.sid, lobby_id, lobby, user_id)
             
-        lobby = lobbies[lobby_id]
+            # Send the initial game state to this player, or only what they
+            # missed when resuming after a reconnect
+            resume = data.get('resume')
+            if resume is not None:
+                resume_game(lobby, user_id, game_state, resume)
+            else:
+                send_game_snapshot(lobby, user_id, game_state)
+            
+            # After the catch-up, so the player gets events in order
+            if presence_changed:
+                broadcast_lobby_update(socketio, lobby_id, lobby)
+    
+    @socketio.on(GAME_SYNC)
+    def handle_game_sync(data):
+        """Send a full snapshot to a player who missed a patch"""
+        lobby_id = data.get('lobby_id')
+        user_id = data.get('user_id')
         
-        # Get or create game state
-        game_state = get_game(lobby_id)
-        if not game_state:
-            game_state = create_game(lobby_id)
+        if not lobby_id or not user_id:
+            emit(GAME_ERROR, {"message": "Missing lobby_id or user_id"})
+            return
+        
+        with state_session() as state:
+            lobby, game_state = state.load(lobby_id)
+            if not lobby or not game_state:
+                emit(GAME_ERROR, {"message": "Game not found"})
+                return
             
-        # Send the initial game state to this player
-        sanitized_state = get_sanitized_game_state(game_state, user_id, lobby['participants'])
-        emit(GAME_UPDATE, sanitized_state)
+            send_game_snapshot(lobby, user_id, game_state)
     
     @socketio.on('leave_game')
     def handle_leave_game(data):
-        """Handle a player leaving a game"""
+        """Handle a player or spectator leaving a game"""
         lobby_id = data.get('lobby_id')
         user_id = data.get('user_id')
         
-        if not lobby_id or not user_id:
+        if not lobby_id:
             return
             
-        player_room = f"{lobby_id}_{user_id}"
-        leave_room(player_room)
+        leave_game_rooms(socketio.server, request.sid, lobby_id, user_id, namespace=request.namespace)
         # Don't leave the lobby room as they may still be in the lobby
     
     @socketio.on(GAME_SUBMIT_KEYWORD)
+    @idempotent(GAME_SUBMIT_KEYWORD)
     def handle_submit_keyword(data):
         """Handle a team lead submitting a keyword"""
         lobby_id = data.get('lobby_id')
@@ -95,50 +290,43 @@ def register_game_socket_handlers(socketio):
         keyword = data.get('keyword')
         
         if not lobby_id or not user_id or not keyword:
-            emit(GAME_ERROR, {"message": "Invalid keyword submission"})
-            return
-            
-        # Get the game state
-        game_state = get_game(lobby_id)
-        if not game_state:
-            emit(GAME_ERROR, {"message": "Game not found"})
-            return
-            
-        # Get the lobby data
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(GAME_ERROR, {"message": "Lobby not found"})
-            return
+            return reject("Invalid keyword submission")
             
-        lobby = lobbies[lobby_id]
+        with state_session() as state:
+            # Get the lobby and game state in one read
+            lobby, game_state = state.load(lobby_id)
+            if not game_state:
+                return reject("Game not found")
+                
+            if not lobby:
+                return reject("Lobby not found")
         
-        # Verify the user is a team lead for their team
-        user_participant = next((p for p in lobby['participants'] if p['id'] == user_id), None)
-        if not user_participant or not user_participant.get(FIELD_IS_TEAM_LEAD):
-            emit(GAME_ERROR, {"message": "Only team leads can submit keywords"})
-            return
+            # Verify the user is a team lead for their team
+            user_participant = lobby.get_participant(user_id)
+            if not user_participant or not user_participant.get(FIELD_IS_TEAM_LEAD):
+                return reject("Only team leads can submit keywords")
             
-        # Verify it's this team's turn
-        user_team = user_participant.get(FIELD_TEAM)
-        if user_team != game_state['active_team']:
-            emit(GAME_ERROR, {"message": "It's not your team's turn"})
-            return
+            # Verify it's this team's turn
+            user_team = user_participant.get(FIELD_TEAM)
+            if user_team != game_state['active_team']:
+                return reject("It's not your team's turn")
         
-        # Process the keyword
-        result = submit_keyword(game_state, {
-            "word": keyword.get('word'),
-            "point_count": keyword.get('point_count'),
-            "team": user_team
-        })
+            # Process the keyword
+            result = submit_keyword(game_state, {
+                "word": keyword.get('word'),
+                "point_count": keyword.get('point_count'),
+                "team": user_team
+            })
         
-        if not result:
-            emit(GAME_ERROR, {"message": "Invalid keyword"})
-            return
+            if not result:
+                return reject("Invalid keyword")
         
-        # Send updated game state to all players
-        send_game_update(lobby_id, game_state, lobby['participants'])
+            # Send updated game state to all players
+            send_game_update(lobby_id, game_state)
+        return ACCEPTED
     
     @socketio.on(GAME_SUBMIT_GUESS)
+    @idempotent(GAME_SUBMIT_GUESS)
     def handle_submit_guess(data):
         """Handle team members submitting card guesses"""
         lobby_id = data.get('lobby_id')
@@ -146,60 +334,51 @@ def register_game_socket_handlers(socketio):
         card_ids = data.get('card_ids')
         
         if not lobby_id or not user_id or not isinstance(card_ids, list):
-            emit(GAME_ERROR, {"message": "Invalid guess submission"})
-            return
-            
-        # Get the game state
-        game_state = get_game(lobby_id)
-        if not game_state:
-            emit(GAME_ERROR, {"message": "Game not found"})
-            return
-            
-        # Get the lobby data
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(GAME_ERROR, {"message": "Lobby not found"})
-            return
+            return reject("Invalid guess submission")
             
-        lobby = lobbies[lobby_id]
+        with state_session() as state:
+            # Get the lobby and game state in one read
+            lobby, game_state = state.load(lobby_id)
+            if not game_state:
+                return reject("Game not found")
+                
+            if not lobby:
+                return reject("Lobby not found")
         
-        # Verify the user is on the active team but is not a team lead
-        user_participant = next((p for p in lobby['participants'] if p['id'] == user_id), None)
-        if not user_participant:
-            emit(GAME_ERROR, {"message": "User not found in lobby"})
-            return
+            # Verify the user is on the active team but is not a team lead
+            user_participant = lobby.get_participant(user_id)
+            if not user_participant:
+                return reject("User not found in lobby")
             
-        user_team = user_participant.get(FIELD_TEAM)
-        is_team_lead = user_participant.get(FIELD_IS_TEAM_LEAD, False)
+            user_team = user_participant.get(FIELD_TEAM)
+            is_team_lead = user_participant.get(FIELD_IS_TEAM_LEAD, False)
         
-        if user_team != game_state['active_team'] or is_team_lead:
-            emit(GAME_ERROR, {"message": "Only team members on the active team can submit guesses"})
-            return
+            if user_team != game_state['active_team'] or is_team_lead:
+                return reject("Only team members on the active team can submit guesses")
         
-        # Process the guess
-        success, result = submit_guess(game_state, {"card_ids": card_ids})
+            # Process the guess
+            success, result = submit_guess(game_state, {"card_ids": card_ids})
         
-        if not success:
-            emit(GAME_ERROR, {"message": "Invalid guess"})
-            return
+            if not success:
+                return reject("Invalid guess")
         
-        # Send updated game state to all players
-        send_game_update(lobby_id, game_state, lobby['participants'])
+            # Send updated game state to all players
+            send_game_update(lobby_id, game_state)
         
-        # If the game is over, don't process turn end
-        if game_state.get("game_over", False):
-            return
+            # If the game is over, don't process turn end
+            if game_state.get("game_over", False):
+                return ACCEPTED
             
-        # Wait a moment to show the results, then end the turn
-        # In a real application, this would be triggered by a frontend action
-        # or would use a delayed task queue
-        socketio.sleep(3)  # Small delay to show results
-        
-        # End the turn if a penalty was triggered or after results are shown
-        end_turn(game_state)
-        
-        # Send the updated game state again
-        send_game_update(lobby_id, game_state, lobby['participants'])
+        # Show the results for a moment, then end the turn from the
+        # scheduler so this handler returns right away
+        scheduler.schedule(
+            lobby_id,
+            TIMER_END_TURN,
+            Config.REVEAL_DELAY_SECONDS,
+            end_turn_after_reveal,
+            lobby_id,
+        )
+        return ACCEPTED
     
     @socketio.on('end_turn')
     def handle_end_turn(data):
@@ -211,25 +390,23 @@ def register_game_socket_handlers(socketio):
             emit(GAME_ERROR, {"message": "Missing lobby_id or user_id"})
             return
             
-        # Get the game state
-        game_state = get_game(lobby_id)
-        if not game_state:
-            emit(GAME_ERROR, {"message": "Game not found"})
-            return
-            
-        # Get the lobby data
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(GAME_ERROR, {"message": "Lobby not found"})
-            return
-            
-        lobby = lobbies[lobby_id]
+        with state_session() as state:
+            # Get the lobby and game state in one read
+            lobby, game_state = state.load(lobby_id)
+            if not game_state:
+                emit(GAME_ERROR, {"message": "Game not found"})
+                return
+                
+            if not lobby:
+                emit(GAME_ERROR, {"message": "Lobby not found"})
+                return
         
-        # End the turn
-        end_turn(game_state)
+            # End the turn, dropping the one scheduled after a guess
+            scheduler.cancel(lobby_id, TIMER_END_TURN)
+            end_turn(game_state)
         
-        # Send updated game state to all players
-        send_game_update(lobby_id, game_state, lobby['participants'])
+            # Send updated game state to all players
+            send_game_update(lobby_id, game_state)
     
     @socketio.on(GAME_SELECT_CARD)
     def handle_select_card(data):
@@ -242,46 +419,42 @@ def register_game_socket_handlers(socketio):
         if not lobby_id or not user_id or card_id is None:
             emit(GAME_ERROR, {"message": "Invalid card selection data"})
             return
-            
-        # Get the game state
-        game_state = get_game(lobby_id)
-        if not game_state:
-            emit(GAME_ERROR, {"message": "Game not found"})
-            return
-            
-        # Get the lobby data
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(GAME_ERROR, {"message": "Lobby not found"})
+        
+        # Limit how fast a single connection can click through cards
+        if not selection_limiter.allow(request.sid):
+            emit(GAME_ERROR, {"message": "Too many card selections, slow down"})
             return
             
-        lobby = lobbies[lobby_id]
+        with state_session() as state:
+            # Get the lobby and game state in one read
+            lobby, game_state = state.load(lobby_id)
+            if not game_state:
+                emit(GAME_ERROR, {"message": "Game not found"})
+                return
+                
+            if not lobby:
+                emit(GAME_ERROR, {"message": "Lobby not found"})
+                return
         
-        # Verify the user is on the active team but is not a team lead
-        user_participant = next((p for p in lobby['participants'] if p['id'] == user_id), None)
-        if not user_participant:
-            emit(GAME_ERROR, {"message": "User not found in lobby"})
-            return
+            # Verify the user is on the active team but is not a team lead
+            user_participant = lobby.get_participant(user_id)
+            if not user_participant:
+                emit(GAME_ERROR, {"message": "User not found in lobby"})
+                return
             
-        user_team = user_participant.get(FIELD_TEAM)
-        is_team_lead = user_participant.get(FIELD_IS_TEAM_LEAD, False)
+            user_team = user_participant.get(FIELD_TEAM)
+            is_team_lead = user_participant.get(FIELD_IS_TEAM_LEAD, False)
         
-        if user_team != game_state['active_team'] or is_team_lead:
-            emit(GAME_ERROR, {"message": "Only team members on the active team can select cards"})
-            return
+            if user_team != game_state['active_team'] or is_team_lead:
+                emit(GAME_ERROR, {"message": "Only team members on the active team can select cards"})
+                return
         
-        # Handle the card selection
-        success = handle_card_selection(game_state, user_id, card_id, is_selected)
+            # Handle the card selection
+            success = handle_card_selection(game_state, user_id, card_id, is_selected)
         
-        if not success:
-            emit(GAME_ERROR, {"message": "Invalid card selection"})
-            return
+            if not success:
+                emit(GAME_ERROR, {"message": "Invalid card selection"})
+                return
         
-        # Broadcast the card selection update to all players in the lobby
-        emit(GAME_CARD_SELECTION_UPDATE, {
-            "selected_cards": game_state.get("selected_cards", {}),
-            "user_id": user_id,
-            "card_id": card_id,
-            "is_selected": is_selected,
-            "user_name": user_participant.get('display_name', 'Unknown')
-        }, room=lobby_id)
+            # Queue the change; merged changes go out once per window
+            selections.add(lobby_id, user_id, card_id, is_selected)
@@ -1,11 +1,14 @@
 # backend/sockets/lobby.py
 
+from flask import request
 from flask_socketio import emit, join_room, leave_room
 
 from ..constants import (
     FIELD_IS_HOST,
     FIELD_IS_TEAM_LEAD,
     FIELD_TEAM,
+    ROLE_LEADS,
+    ROLE_MEMBERS,
     LOBBY_ASSIGN_TEAM_LEAD,
     LOBBY_DEMOTE_TEAM_LEAD,
     LOBBY_ERROR,
@@ -13,27 +16,28 @@ from ..constants import (
     LOBBY_JOIN,
     LOBBY_LEAVE,
     LOBBY_START_GAME,
+    LOBBY_SYNC,
     LOBBY_TOGGLE_READY,
-    LOBBY_UPDATE,
     LOBBY_UPDATE_DISPLAY_NAME,
     LOBBY_CHANGE_TEAM,
     LOBBY_END_GAME,
-    TEAM1,
-    TEAM2,
 )
-from ..routes.lobby import get_lobbies
-from ..utils.helpers import auto_assign_team
-from ..utils.game import create_game, get_game
+from ..utils.game import TIMER_END_TURN, board_config, create_game
+from ..utils.lobby import broadcast_lobby_update, send_lobby_snapshot
+from ..utils.presence import presence
+from ..utils.replay import broadcast
+from ..utils.rooms import move_player_to_role
+from ..utils.scheduler import scheduler
+from ..utils.selection import TIMER_SELECTION_FLUSH
+from ..utils.store import state_session
 
 
 def register_lobby_socket_handlers(socketio):
     """Registers lobby socket events."""
 
     def send_lobby_update(lobby_id, lobby):
-        """Helper function to send consistent lobby updates with ID included"""
-        # Include the lobby_id in all lobby updates
-        update_data = {**lobby, "id": lobby_id}
-        emit(LOBBY_UPDATE, update_data, room=lobby_id)
+        """Send the lobby's changes to everyone in it as a patch"""
+        broadcast_lobby_update(socketio, lobby_id, lobby)
 
     @socketio.on(LOBBY_JOIN)
     def handle_join_lobby(data):
@@ -44,261 +48,261 @@ def register_lobby_socket_handlers(socketio):
             emit(LOBBY_ERROR, {"message": "User id and display_name required"})
             return
 
-        lobbies = get_lobbies()
-        if lobby_id not in lobbies:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
+
+            user_id = user["id"]
+            existing_user = lobby.get_participant(user_id)
+
+            if existing_user:
+                lobby.update_participant(user_id, display_name=user["display_name"])
+            else:
+                team = lobby.smaller_team()
+                participant = {
+                    "id": user_id,
+                    "display_name": user["display_name"],
+                    "ready": False,
+                    FIELD_TEAM: team,
+                    FIELD_IS_TEAM_LEAD: False,
+                    # The host may be rejoining after being removed as gone
+                    FIELD_IS_HOST: lobby.get("host") == user_id,
+                }
+                lobby.add_participant(participant)
+
+            presence.connected(request.sid, lobby_id, lobby, user_id)
+            # Others get the change as a patch; the joining client gets
+            # the whole lobby, which already includes it
+            send_lobby_update(lobby_id, lobby)
+            join_room(lobby_id)
+            send_lobby_snapshot(lobby_id, lobby)
+
+    @socketio.on(LOBBY_SYNC)
+    def handle_lobby_sync(data):
+        """Send a full snapshot to a client that missed a patch"""
+        lobby_id = data.get("lobby_id")
+        with state_session(readonly=True) as state:
+            lobby = state.lobby(lobby_id)
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        user_id = user["id"]
-        lobby = lobbies[lobby_id]
-        existing_user = next(
-            (p for p in lobby["participants"] if p["id"] == user_id), None
-        )
-
-        if existing_user:
-            existing_user["display_name"] = user["display_name"]
-        else:
-            team = auto_assign_team(lobby["participants"])
-            participant = {
-                "id": user_id,
-                "display_name": user["display_name"],
-                "ready": False,
-                FIELD_TEAM: team,
-                FIELD_IS_TEAM_LEAD: False,
-                FIELD_IS_HOST: False,
-            }
-            lobby["participants"].append(participant)
-
-        join_room(lobby_id)
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_snapshot(lobby_id, lobby)
 
     @socketio.on(LOBBY_LEAVE)
     def handle_leave_lobby(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
-        lobby = get_lobbies().get(lobby_id)
 
-        if not lobby:
-            return
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
+            if not lobby:
+                return
 
-        lobby["participants"] = [p for p in lobby["participants"] if p["id"] != user_id]
-        leave_room(lobby_id)
-        send_lobby_update(lobby_id, lobby)
+            lobby.remove_participant(user_id)
+            presence.left(request.sid)
+            leave_room(lobby_id)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_UPDATE_DISPLAY_NAME)
     def handle_update_display_name(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
         new_name = data.get("new_display_name")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        for p in lobby["participants"]:
-            if p["id"] == user_id:
-                p["display_name"] = new_name
-                break
+            lobby.update_participant(user_id, display_name=new_name)
 
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_TOGGLE_READY)
     def handle_toggle_ready(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        for p in lobby["participants"]:
-            if p["id"] == user_id:
-                p["ready"] = not p.get("ready", False)
-                break
+            p = lobby.get_participant(user_id)
+            if p:
+                lobby.update_participant(user_id, ready=not p.get("ready", False))
 
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_ASSIGN_TEAM_LEAD)
     def handle_assign_team_lead(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        # Remove current team lead from user's team
-        for p in lobby["participants"]:
-            if p[FIELD_TEAM] == data.get("team") and p.get(FIELD_IS_TEAM_LEAD):
-                p[FIELD_IS_TEAM_LEAD] = False
+            # Remove current team lead from user's team
+            for demoted_id in lobby.demote_team_leads(data.get("team")):
+                move_player_to_role(socketio.server, lobby_id, demoted_id, ROLE_MEMBERS)
 
-        for p in lobby["participants"]:
-            if p["id"] == user_id:
-                p[FIELD_IS_TEAM_LEAD] = True
-                p["ready"] = False
-                break
+            p = lobby.set_team_lead(user_id, True)
+            if p:
+                lobby.update_participant(user_id, ready=False)
+                move_player_to_role(socketio.server, lobby_id, user_id, ROLE_LEADS)
 
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_DEMOTE_TEAM_LEAD)
     def handle_demote_team_lead(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        for p in lobby["participants"]:
-            if p["id"] == user_id:
-                p[FIELD_IS_TEAM_LEAD] = False
-                p["ready"] = False
-                break
+            p = lobby.set_team_lead(user_id, False)
+            if p:
+                lobby.update_participant(user_id, ready=False)
+                move_player_to_role(socketio.server, lobby_id, user_id, ROLE_MEMBERS)
 
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_CHANGE_TEAM)
     def handle_change_team(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
         new_team = data.get("new_team")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        for p in lobby["participants"]:
-            if p["id"] == user_id:
-                # Demote team lead status if switching teams
-                if p.get(FIELD_IS_TEAM_LEAD):
-                    p[FIELD_IS_TEAM_LEAD] = False
-                p[FIELD_TEAM] = new_team
-                p["ready"] = False
-                break
+            # Demote team lead status if switching teams
+            p = lobby.set_team(user_id, new_team)
+            if p:
+                lobby.update_participant(user_id, ready=False)
+                move_player_to_role(socketio.server, lobby_id, user_id, ROLE_MEMBERS)
 
-        send_lobby_update(lobby_id, lobby)
+            send_lobby_update(lobby_id, lobby)
 
     @socketio.on(LOBBY_START_GAME)
     def handle_start_game(data):
         lobby_id = data.get("lobby_id")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby or not _can_start_game(lobby):
-            emit(LOBBY_ERROR, {"message": "Cannot start game"})
-            return
-        
-        # Initialize the game board and state
-        game = get_game(lobby_id)
-        if not game:
-            game = create_game(lobby_id)
-        
-        if not game:
-            emit(LOBBY_ERROR, {"message": "Failed to create game"})
-            return
-        
-        # Set game in progress flag in lobby data
-        lobby["game_in_progress"] = True
-        
-        # Send updated lobby info to all clients
-        send_lobby_update(lobby_id, lobby)
-        
-        # Emit game start event
-        emit(LOBBY_START_GAME, {}, room=lobby_id)
+            if not lobby or not lobby.can_start():
+                emit(LOBBY_ERROR, {"message": "Cannot start game"})
+                return
+
+            # Initialize the game board and state; a finished game is
+            # replaced by a new one that doesn't repeat its words
+            game = create_game(
+                lobby_id,
+                state,
+                board_config(lobby),
+                replace=not lobby.get("game_in_progress"),
+            )
+
+            if not game:
+                emit(LOBBY_ERROR, {"message": "Failed to create game"})
+                return
+
+            # Set game in progress flag in lobby data
+            lobby.update_fields(game_in_progress=True)
+
+            # Send updated lobby info to all clients
+            send_lobby_update(lobby_id, lobby)
+
+            # Emit game start event
+            broadcast(socketio, lobby_id, LOBBY_START_GAME, {})
 
     @socketio.on(LOBBY_FORCE_START)
     def handle_force_start_game(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id", None)
-        lobby = get_lobbies().get(lobby_id)
-
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        # Check if user is the host (only hosts can force start)
-        is_host = False
-        if user_id:
-            for p in lobby["participants"]:
-                if p["id"] == user_id and p[FIELD_IS_HOST]:
-                    is_host = True
-                    break
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-            if not is_host:
-                emit(LOBBY_ERROR, {"message": "Only the host can force start the game"})
+            # Check if user is the host (only hosts can force start)
+            if user_id:
+                p = lobby.get_participant(user_id)
+                if not p or not p[FIELD_IS_HOST]:
+                    emit(LOBBY_ERROR, {"message": "Only the host can force start the game"})
+                    return
+
+            # Initialize the game board and state; a finished game is
+            # replaced by a new one that doesn't repeat its words
+            game = create_game(
+                lobby_id,
+                state,
+                board_config(lobby),
+                replace=not lobby.get("game_in_progress"),
+            )
+
+            if not game:
+                emit(LOBBY_ERROR, {"message": "Failed to create game"})
                 return
 
-        # Initialize the game board and state
-        game = get_game(lobby_id)
-        if not game:
-            game = create_game(lobby_id)
-        
-        if not game:
-            emit(LOBBY_ERROR, {"message": "Failed to create game"})
-            return
-        
-        # Set game in progress flag in lobby data
-        lobby["game_in_progress"] = True
-        
-        # Send updated lobby info to all clients
-        send_lobby_update(lobby_id, lobby)
+            # Set game in progress flag in lobby data
+            lobby.update_fields(game_in_progress=True)
+
+            # Send updated lobby info to all clients
+            send_lobby_update(lobby_id, lobby)
 
-        # No other checks - the host can force start anytime
-        emit(LOBBY_START_GAME, {}, room=lobby_id)
+            # No other checks - the host can force start anytime
+            broadcast(socketio, lobby_id, LOBBY_START_GAME, {})
 
     @socketio.on(LOBBY_END_GAME)
     def handle_end_game(data):
         lobby_id = data.get("lobby_id")
         user_id = data.get("user_id")
-        lobby = get_lobbies().get(lobby_id)
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
 
-        if not lobby:
-            emit(LOBBY_ERROR, {"message": "Lobby not found"})
-            return
+            if not lobby:
+                emit(LOBBY_ERROR, {"message": "Lobby not found"})
+                return
 
-        # Check if user is the host (only hosts can end games)
-        is_host = False
-        for p in lobby["participants"]:
-            if p["id"] == user_id and p[FIELD_IS_HOST]:
-                is_host = True
-                break
+            # Check if user is the host (only hosts can end games)
+            p = lobby.get_participant(user_id)
+            if not p or not p[FIELD_IS_HOST]:
+                emit(LOBBY_ERROR, {"message": "Only the host can end the game"})
+                return
+
+            # Set game in progress flag to false
+            lobby.update_fields(game_in_progress=False)
+
+            # Drop any pending timers for the finished game; presence
+            # timers of away players keep running
+            scheduler.cancel(lobby_id, TIMER_END_TURN)
+            scheduler.cancel(lobby_id, TIMER_SELECTION_FLUSH)
+
+            # Reset all players' ready status to false
+            for p in lobby["participants"]:
+                lobby.update_participant(p["id"], ready=False)
+
+            # Broadcast end game event to all clients in the lobby
+            broadcast(socketio, lobby_id, LOBBY_END_GAME, {})
+
+            # Also send a lobby update to refresh player states
+            send_lobby_update(lobby_id, lobby)
 
-        if not is_host:
-            emit(LOBBY_ERROR, {"message": "Only the host can end the game"})
-            return
-        
-        # Set game in progress flag to false
-        lobby["game_in_progress"] = False
-
-        # Reset all players' ready status to false
-        for p in lobby["participants"]:
-            p["ready"] = False
-
-        # Broadcast end game event to all clients in the lobby
-        emit(LOBBY_END_GAME, {}, room=lobby_id)
-        
-        # Also send a lobby update to refresh player states
-        send_lobby_update(lobby_id, lobby)
-
-    def _can_start_game(lobby):
-        p = lobby["participants"]
-        leads = {TEAM1: 0, TEAM2: 0}
-        counts = {TEAM1: 0, TEAM2: 0}
-        for x in p:
-            t = x[FIELD_TEAM]
-            counts[t] += 1
-            if x[FIELD_IS_TEAM_LEAD]:
-                leads[t] += 1
-        return (
-            leads[TEAM1] == 1
-            and leads[TEAM2] == 1
-            and counts[TEAM1] == counts[TEAM2]
-            and _all_ready(p)
-        )
-
-    def _all_ready(participants):
-        return all(p.get("ready") for p in participants)
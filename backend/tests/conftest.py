@@ -0,0 +1,50 @@
+# backend/tests/conftest.py
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils import store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def configure_state():
+    """
+    Return configure(**settings), which swaps in stores built from the
+    given settings; the previous stores are put back afterwards.
+    """
+    saved = (store._lobby_store, store._game_store, store._recovered_lobbies)
+
+    def configure(**settings):
+        store.configure_stores(SimpleNamespace(**settings))
+
+    yield configure
+    store._lobby_store, store._game_store, store._recovered_lobbies = saved
+
+
+@pytest.fixture
+def memory_state(configure_state):
+    configure_state(STATE_BACKEND=store.STATE_BACKEND_MEMORY)
+
+
+def run_worker(script, env):
+    """
+    Run script in a new process that has imported the app like a worker,
+    and return its stdout.
+    """
+    code = "import eventlet\neventlet.monkey_patch()\nfrom backend.app import app, socketio\n" + script
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
@@ -0,0 +1,65 @@
+# backend/tests/test_board.py
+import json
+
+from backend.constants import (
+    CARD_TYPE_NEUTRAL,
+    CARD_TYPE_PENALTY,
+    CARD_TYPE_TEAM1,
+    CARD_TYPE_TEAM2,
+    TEAM1,
+    TEAM2,
+)
+from backend.utils.board import Board
+
+CARDS = [
+    (1, "APPLE", CARD_TYPE_TEAM1),
+    (2, "BRIDGE", CARD_TYPE_TEAM2),
+    (3, "CLOUD", CARD_TYPE_TEAM1),
+    (4, "DRUM", CARD_TYPE_NEUTRAL),
+    (5, "EAGLE", CARD_TYPE_PENALTY),
+    (6, "FROST", CARD_TYPE_TEAM2),
+    (7, "GLASS", CARD_TYPE_TEAM1),
+]
+
+
+def test_reveal_updates_remaining_counts():
+    board = Board.from_cards(CARDS)
+    assert (board.remaining(TEAM1), board.remaining(TEAM2)) == (3, 2)
+
+    card = board.reveal(3)
+    assert (card.id, card.word, card.type, card.revealed) == (3, "CLOUD", CARD_TYPE_TEAM1, True)
+    assert board.reveal(3) is None  # Already revealed
+    assert board.reveal(99) is None  # Unknown id
+    board.reveal(4)
+    board.reveal(6)
+    assert (board.remaining(TEAM1), board.remaining(TEAM2)) == (2, 1)
+    assert board.team_data() == {
+        TEAM1: {"remaining_cards": 2},
+        TEAM2: {"remaining_cards": 1},
+    }
+    assert [card.id for card in board if card.revealed] == [3, 4, 6]
+
+
+def test_member_view_hides_unrevealed_types():
+    board = Board.from_cards(CARDS)
+    board.reveal(5)
+    lead_board, member_board = board.views()
+    assert all("type" in card for card in lead_board)
+    assert [card.get("type") for card in member_board] == [
+        None, None, None, None, CARD_TYPE_PENALTY, None, None,
+    ]
+
+
+def test_dict_round_trip_keeps_reveals_and_counts():
+    board = Board.from_cards(CARDS)
+    board.reveal(1)
+    board.reveal(2)
+
+    restored = Board.from_dict(json.loads(json.dumps(board.to_dict())))
+
+    assert restored.to_dict() == board.to_dict()
+    assert [card.to_dict() for card in restored] == [card.to_dict() for card in board]
+    assert (restored.remaining(TEAM1), restored.remaining(TEAM2)) == (2, 1)
+    assert restored.reveal(1) is None
+    assert restored.reveal(7).type == CARD_TYPE_TEAM1
+    assert restored.remaining(TEAM1) == 1
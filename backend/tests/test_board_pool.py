@@ -0,0 +1,23 @@
+# backend/tests/test_board_pool.py
+from backend.utils.board_pool import BoardPool
+
+
+def generate(config, rng):
+    return [rng.random() for _ in range(3)]
+
+
+def boards(pool, count, draws=0):
+    taken = []
+    for _ in range(count):
+        taken.append(pool.take("classic"))
+        for _ in range(draws):
+            pool.draw("classic", lambda rng: rng.random())
+    return taken
+
+
+def test_seeded_boards_repeat():
+    assert boards(BoardPool(generate, seed=7), 4) == boards(BoardPool(generate, seed=7), 4)
+
+
+def test_changes_do_not_shift_later_boards():
+    assert boards(BoardPool(generate, seed=7), 4, draws=3) == boards(BoardPool(generate, seed=7), 4)
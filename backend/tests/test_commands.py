@@ -0,0 +1,68 @@
+# backend/tests/test_commands.py
+import threading
+
+import pytest
+from flask import Flask
+from flask_socketio import SocketIO
+
+from backend.utils.commands import CommandQueues
+
+
+@pytest.fixture
+def queues():
+    queues = CommandQueues()
+    queues.init_app(SocketIO(Flask(__name__), async_mode="threading"))
+    return queues
+
+
+def test_commands_for_a_lobby_run_in_order(queues):
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def blocking():
+        started.set()
+        release.wait(2)
+        order.append("first")
+
+    queues.submit("L1", blocking)
+    assert started.wait(2)
+    commands = [queues.submit("L1", order.append, i, wait=True) for i in range(5)]
+    assert queues.depth() == 5
+    # Another lobby is not held up behind L1
+    assert queues.run("L2", lambda: "other") == "other"
+    assert order == []
+
+    release.set()
+    for command in commands:
+        assert command.done.wait(2)
+    assert order == ["first", 0, 1, 2, 3, 4]
+    assert queues.depth() == 0
+
+
+def test_command_running_a_command_for_its_own_lobby_runs_it_inline(queues):
+    def outer():
+        return queues.run("L1", lambda: "inner") + "+" + queues.run("L2", lambda: "other")
+
+    assert queues.run("L1", outer) == "inner+other"
+    assert queues.active() == 0
+
+
+def test_run_raises_the_command_error(queues):
+    def failing():
+        raise ValueError("bad command")
+
+    with pytest.raises(ValueError, match="bad command"):
+        queues.run("L1", failing)
+    # The queue keeps working afterwards
+    assert queues.run("L1", lambda: 1) == 1
+
+
+def test_without_a_server_commands_run_in_the_caller():
+    queues = CommandQueues()
+    caller = threading.current_thread()
+    ran_in = []
+
+    queues.submit("L1", lambda: ran_in.append(threading.current_thread()))
+
+    assert ran_in == [caller]
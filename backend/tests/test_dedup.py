@@ -0,0 +1,85 @@
+# backend/tests/test_dedup.py
+import pytest
+
+from backend.sockets import game as game_sockets
+from backend.utils import dedup
+from backend.utils.dedup import MAX_COMMAND_ID_LENGTH, CommandResults, command_key
+
+
+@pytest.fixture
+def results(monkeypatch):
+    results = CommandResults()
+    monkeypatch.setattr(game_sockets, "command_results", results)
+    return results
+
+
+@pytest.fixture
+def errors(monkeypatch):
+    errors = []
+    monkeypatch.setattr(game_sockets, "emit", lambda event, data: errors.append((event, data)))
+    return errors
+
+
+def counting_handler(result):
+    calls = []
+
+    @game_sockets.idempotent("game:guess")
+    def handler(data):
+        calls.append(data)
+        return result
+
+    return handler, calls
+
+
+def test_replayed_command_id_returns_first_result_without_running(results, errors):
+    handler, calls = counting_handler({"ok": True})
+    data = {"lobby_id": "L1", "user_id": "u1", "command_id": "c1"}
+
+    assert handler(data) == {"ok": True}
+    assert handler(dict(data)) == {"ok": True}
+    assert len(calls) == 1
+    assert errors == []
+
+    # Another command id, user or lobby runs again
+    handler({**data, "command_id": "c2"})
+    handler({**data, "user_id": "u2"})
+    handler({**data, "lobby_id": "L2"})
+    assert len(calls) == 4
+
+
+def test_replayed_rejection_sends_its_error_again(results, errors):
+    handler, calls = counting_handler({"ok": False, "message": "Not your turn"})
+    data = {"lobby_id": "L1", "user_id": "u1", "command_id": "c1"}
+
+    handler(data)
+    assert handler(data) == {"ok": False, "message": "Not your turn"}
+    assert len(calls) == 1
+    assert errors == [(game_sockets.GAME_ERROR, {"message": "Not your turn"})]
+
+
+@pytest.mark.parametrize("command_id", [None, "", 7, "x" * (MAX_COMMAND_ID_LENGTH + 1)])
+def test_commands_without_a_usable_id_always_run(results, errors, command_id):
+    handler, calls = counting_handler({"ok": True})
+    data = {"lobby_id": "L1", "user_id": "u1", "command_id": command_id}
+
+    handler(data)
+    handler(data)
+
+    assert command_key("game:guess", "u1", command_id) is None
+    assert len(calls) == 2
+    assert len(results) == 0
+
+
+def test_results_expire_and_are_bounded_per_lobby(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(dedup.time, "monotonic", lambda: now[0])
+    results = CommandResults(capacity=2, ttl=60)
+    for i in range(3):
+        results.put("L1", i, i)
+    assert results.get("L1", 0) == (False, None)
+    assert results.get("L1", 2) == (True, 2)
+
+    now[0] += 61
+    assert results.get("L1", 2) == (False, None)
+    results.prune()
+    assert len(results) == 0
@@ -0,0 +1,28 @@
+# backend/tests/test_game.py
+from backend.constants import TEAM1
+from backend.utils.board import TEAM_CARD_TYPES
+from backend.utils.game import new_game_state, submit_guess, submit_keyword
+
+
+def guessing_state():
+    game_state = new_game_state("test")
+    submit_keyword(game_state, {"word": "TEST", "point_count": 1, "team": TEAM1})
+    return game_state
+
+
+def test_guess_reveals_team_card():
+    game_state = guessing_state()
+    card = next(c for c in game_state["board"] if c.type == TEAM_CARD_TYPES[TEAM1])
+
+    success, result = submit_guess(game_state, {"card_ids": [card.id]})
+
+    assert success
+    assert result["correct_guesses"] == 1
+    assert game_state["board"].card(card.id).revealed
+
+
+def test_guess_rejects_boolean_card_ids():
+    game_state = guessing_state()
+
+    assert submit_guess(game_state, {"card_ids": [True]}) == (False, None)
+    assert not game_state["board"].card(1).revealed
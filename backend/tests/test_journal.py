@@ -0,0 +1,144 @@
+# backend/tests/test_journal.py
+import os
+import shutil
+
+import pytest
+
+from backend.utils import journal as journal_module
+from backend.utils.game import bump_version, new_game_state
+from backend.utils.journal import (
+    JOURNAL_FILE,
+    LOCK_FILE,
+    ROTATED_JOURNAL_FILE,
+    SNAPSHOT_FILE,
+    Journal,
+    _format,
+    _parse,
+)
+from backend.utils.lobby import Lobby
+from backend.utils.store import STATE_BACKEND_MEMORY, get_lobby_store, state_session
+
+
+def journaled(directory):
+    """Return (kind, key) of every record in the journal file, in order."""
+    get_lobby_store().backend.journal.flush()
+    with open(directory / JOURNAL_FILE, encoding="utf-8") as f:
+        return [_parse(line)[1:3] for line in f]
+
+
+def test_only_changed_documents_are_journaled(configure_state, tmp_path):
+    configure_state(STATE_BACKEND=STATE_BACKEND_MEMORY, JOURNAL_DIR=str(tmp_path))
+    with state_session() as state:
+        state.add_lobby("L1", Lobby({"lobby_name": "Journal"}))
+        state.add_game("L1", new_game_state("L1"))
+    assert journaled(tmp_path) == [("lobby", "L1"), ("game", "L1")]
+
+    # Loading documents without changing them writes nothing
+    with state_session() as state:
+        state.load("L1")
+    assert len(journaled(tmp_path)) == 2
+
+    with state_session() as state:
+        game = state.game("L1")
+        bump_version(game)
+    assert journaled(tmp_path)[2:] == [("game", "L1")]
+
+    with state_session() as state:
+        lobby = state.lobby("L1")
+        lobby.update_fields(lobby_name="Renamed")
+        lobby.take_patch("L1")
+    assert journaled(tmp_path)[3:] == [("lobby", "L1")]
+
+
+def recover_copy(directory, tmp_path):
+    """Recover from a copy of a journal directory, as a restarted process."""
+    copy = tmp_path / "restarted"
+    shutil.copytree(directory, copy, ignore=shutil.ignore_patterns(LOCK_FILE))
+    return Journal(str(copy)).recover()
+
+
+def test_recovery_stops_at_torn_tail(tmp_path):
+    journal = Journal(str(tmp_path / "journal"))
+    journal.record("lobby", "L1", '{"v": 1}')
+    journal.record("lobby", "L2", '{"v": 1}')
+    journal.record("lobby", "L1", '{"v": 2}')
+    journal.flush()
+    with open(tmp_path / "journal" / JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write(_format(4, "lobby", "L2", '{"v": 2}')[:-6])
+
+    state = recover_copy(tmp_path / "journal", tmp_path)
+
+    assert state == {("lobby", "L1"): '{"v": 2}', ("lobby", "L2"): '{"v": 1}'}
+
+
+def test_recovery_after_crash_between_snapshot_and_journal_cleanup(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    journal = Journal(str(directory))
+    journal.record("lobby", "L1", '{"v": 1}')
+    journal.record("lobby", "L2", '{"v": 1}')
+    journal.record("lobby", "L2", None)
+
+    def crash(path):
+        raise OSError("crashed")
+
+    # The snapshot is in place but the rotated journal is never removed
+    monkeypatch.setattr(journal_module.os, "remove", crash)
+    with pytest.raises(OSError):
+        journal.snapshot(lambda: [("lobby", "L1", '{"v": 1}')])
+    assert (directory / ROTATED_JOURNAL_FILE).exists()
+    assert (directory / SNAPSHOT_FILE).exists()
+
+    state = recover_copy(directory, tmp_path)
+
+    assert state == {("lobby", "L1"): '{"v": 1}'}
+
+
+def test_recovery_after_crash_between_rotation_and_snapshot(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    journal = Journal(str(directory))
+    journal.record("lobby", "L1", '{"v": 1}')
+    journal.snapshot(lambda: [("lobby", "L1", '{"v": 1}')])
+    journal.record("lobby", "L1", '{"v": 2}')
+    journal.record("lobby", "L2", '{"v": 1}')
+
+    def crash(fd):
+        raise OSError("crashed")
+
+    # The journal is rotated but the new snapshot is never renamed into place
+    monkeypatch.setattr(journal_module.os, "fsync", crash)
+    with pytest.raises(OSError):
+        journal.snapshot(lambda: [("lobby", "L1", '{"v": 2}'), ("lobby", "L2", '{"v": 1}')])
+    assert (directory / ROTATED_JOURNAL_FILE).exists()
+
+    state = recover_copy(directory, tmp_path)
+
+    assert state == {("lobby", "L1"): '{"v": 2}', ("lobby", "L2"): '{"v": 1}'}
+
+
+def test_failed_snapshots_keep_every_rotated_record(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    journal = Journal(str(directory))
+    journal.record("lobby", "L1", '{"v": 1}')
+    journal.snapshot(lambda: [("lobby", "L1", '{"v": 1}')])
+
+    replace = os.replace
+
+    def fail_snapshot(src, dst):
+        if dst.endswith(SNAPSHOT_FILE):
+            raise OSError("disk full")
+        replace(src, dst)
+
+    # Snapshots keep failing while the process carries on journaling
+    monkeypatch.setattr(journal_module.os, "replace", fail_snapshot)
+    journal.record("lobby", "L1", '{"v": 2}')
+    with pytest.raises(OSError):
+        journal.snapshot(list)
+    journal.record("lobby", "L2", '{"v": 1}')
+    journal.flush()
+    with pytest.raises(OSError):
+        journal.snapshot(list)
+    monkeypatch.undo()
+
+    state = recover_copy(directory, tmp_path)
+
+    assert state == {("lobby", "L1"): '{"v": 2}', ("lobby", "L2"): '{"v": 1}'}
@@ -0,0 +1,86 @@
+# backend/tests/test_lobby.py
+import random
+
+from backend.constants import FIELD_IS_TEAM_LEAD, FIELD_READY, FIELD_TEAM, TEAM1, TEAM2
+from backend.utils.lobby import Lobby
+
+
+def can_start_by_scan(lobby):
+    """The original participant-scanning _can_start_game check."""
+    leads = {TEAM1: 0, TEAM2: 0}
+    counts = {TEAM1: 0, TEAM2: 0}
+    for participant in lobby["participants"]:
+        counts[participant[FIELD_TEAM]] += 1
+        if participant[FIELD_IS_TEAM_LEAD]:
+            leads[participant[FIELD_TEAM]] += 1
+    return (
+        leads[TEAM1] == 1
+        and leads[TEAM2] == 1
+        and counts[TEAM1] == counts[TEAM2]
+        and all(p.get(FIELD_READY) for p in lobby["participants"])
+    )
+
+
+def assert_indexes_consistent(lobby):
+    """The incrementally kept indexes match ones rebuilt from scratch."""
+    rebuilt = Lobby(lobby)
+    assert set(lobby._by_id) == {p["id"] for p in lobby["participants"]}
+    for user_id, participant in lobby._by_id.items():
+        assert participant is lobby.get_participant(user_id)
+    for team in (TEAM1, TEAM2):
+        assert set(lobby.team_members(team)) == set(rebuilt.team_members(team))
+        assert set(lobby.team_leads(team)) == set(rebuilt.team_leads(team))
+    assert lobby._ready == rebuilt._ready
+    assert lobby.can_start() == can_start_by_scan(lobby)
+
+
+def participant(user_id, team, is_team_lead=False, ready=False):
+    return {"id": user_id, FIELD_TEAM: team, FIELD_IS_TEAM_LEAD: is_team_lead, FIELD_READY: ready}
+
+
+def test_can_start_needs_one_lead_per_team_even_teams_and_everyone_ready():
+    lobby = Lobby()
+    lobby.add_participant(participant("a", TEAM1, is_team_lead=True, ready=True))
+    lobby.add_participant(participant("b", TEAM2, is_team_lead=True, ready=True))
+    assert lobby.can_start()
+
+    lobby.add_participant(participant("c", TEAM1, ready=True))
+    assert not lobby.can_start()  # Uneven teams
+    lobby.add_participant(participant("d", TEAM2))
+    assert not lobby.can_start()  # d is not ready
+    lobby.update_participant("d", ready=True)
+    assert lobby.can_start()
+    lobby.set_team_lead("c", True)
+    assert not lobby.can_start()  # Two leads on team1
+    lobby.set_team("a", TEAM2)
+    assert not lobby.can_start()  # Moving a demotes them and unbalances teams
+    assert_indexes_consistent(lobby)
+
+
+def test_indexes_stay_consistent_through_random_changes():
+    rng = random.Random(3)
+    lobby = Lobby()
+    user_ids = [f"u{i}" for i in range(8)]
+    for _ in range(2000):
+        user_id = rng.choice(user_ids)
+        action = rng.randrange(6)
+        if action == 0:
+            lobby.add_participant(participant(
+                user_id,
+                rng.choice((TEAM1, TEAM2)),
+                is_team_lead=rng.random() < 0.3,
+                ready=rng.random() < 0.7,
+            ))
+        elif action == 1:
+            lobby.remove_participant(user_id)
+        elif action == 2:
+            lobby.set_team(user_id, rng.choice((TEAM1, TEAM2)))
+        elif action == 3:
+            lobby.set_team_lead(user_id, rng.random() < 0.5)
+        elif action == 4:
+            lobby.update_participant(user_id, ready=rng.random() < 0.7)
+        else:
+            lobby.demote_team_leads(rng.choice((TEAM1, TEAM2)))
+        assert_indexes_consistent(lobby)
+        teams = [p[FIELD_TEAM] for p in lobby["participants"]]
+        assert lobby.smaller_team() == (TEAM1 if teams.count(TEAM1) <= teams.count(TEAM2) else TEAM2)
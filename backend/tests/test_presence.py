@@ -0,0 +1,74 @@
+# backend/tests/test_presence.py
+import json
+
+from backend.constants import PRESENCE_AWAY, PRESENCE_CONNECTED
+from backend.utils.journal import JOURNAL_FILE, _format
+from backend.utils.lobby import Lobby
+from backend.utils.store import (
+    KIND_LOBBY,
+    STATE_BACKEND_MEMORY,
+    STATE_BACKEND_SQLITE,
+    get_lobby_store,
+    state_session,
+)
+
+from .conftest import run_worker
+
+GRACE = "0.2"
+
+# Prints the lobby's participants right after startup and after the grace
+PRINT_PARTICIPANTS = """
+import json
+from backend.utils.store import state_session
+def participants():
+    with state_session(readonly=True) as state:
+        lobby = state.lobby("L1")
+    return [(p["id"], p.get("presence")) for p in lobby["participants"]] if lobby else None
+started = participants()
+eventlet.sleep(1.0)
+print(json.dumps([started, participants()]))
+"""
+
+
+def connected_lobby():
+    return Lobby({
+        "lobby_name": "Presence",
+        "participants": [
+            {"id": "h", "display_name": "H", "presence": PRESENCE_CONNECTED},
+            {"id": "a", "display_name": "A", "presence": PRESENCE_CONNECTED},
+        ],
+    })
+
+
+def test_second_worker_leaves_shared_lobby_alone(configure_state, tmp_path):
+    path = str(tmp_path / "state.db")
+    configure_state(STATE_BACKEND=STATE_BACKEND_SQLITE, STATE_DB_PATH=path)
+    with state_session() as state:
+        state.add_lobby("L1", connected_lobby())
+
+    output = run_worker(PRINT_PARTICIPANTS, {
+        "STATE_BACKEND": STATE_BACKEND_SQLITE,
+        "STATE_DB_PATH": path,
+        "PRESENCE_GRACE_SECONDS": GRACE,
+    })
+
+    started, later = json.loads(output)
+    live = [["h", PRESENCE_CONNECTED], ["a", PRESENCE_CONNECTED]]
+    assert started == live
+    assert later == live
+
+
+def test_journal_restore_starts_grace_period(configure_state, tmp_path):
+    configure_state(STATE_BACKEND=STATE_BACKEND_MEMORY)
+    encoded = get_lobby_store().encode(connected_lobby())
+    (tmp_path / JOURNAL_FILE).write_text(_format(1, KIND_LOBBY, "L1", encoded))
+
+    output = run_worker(PRINT_PARTICIPANTS, {
+        "STATE_BACKEND": STATE_BACKEND_MEMORY,
+        "JOURNAL_DIR": str(tmp_path),
+        "PRESENCE_GRACE_SECONDS": GRACE,
+    })
+
+    started, later = json.loads(output)
+    assert started == [["h", PRESENCE_AWAY], ["a", PRESENCE_AWAY]]
+    assert later == []
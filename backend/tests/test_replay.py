@@ -0,0 +1,41 @@
+# backend/tests/test_replay.py
+from backend.utils.replay import EPOCH, STATE_GAME, STATE_LOBBY, EventLog
+
+
+def test_replays_events_after_position():
+    log = EventLog()
+    first = log.record("L1", "lobby:patch", "a", state=(STATE_LOBBY, 1))
+    log.record("L1", "game:patch", "b", state=(STATE_GAME, 1))
+
+    events = log.since("L1", first, {STATE_LOBBY: 1, STATE_GAME: 1})
+
+    assert [(event, payload) for _, event, payload in events] == [("game:patch", "b")]
+
+
+def test_position_from_another_process_gets_snapshot():
+    log = EventLog()
+    log.record("L1", "lobby:patch", "a")
+
+    assert log.since("L1", {"epoch": "elsewhere", "seq": 1}) is None
+    assert log.stats["snapshots"] == 1
+
+
+def test_changes_broadcast_elsewhere_get_snapshot():
+    log = EventLog()
+    position = log.record("L1", "game:patch", "a", state=(STATE_GAME, 3))
+
+    # Another worker broadcast game seq 4 and 5; this log never saw them
+    assert log.since("L1", position, {STATE_GAME: 5}) is None
+    # Nor a lobby patch, though the lobby has one
+    assert log.since("L1", position, {STATE_LOBBY: 1, STATE_GAME: 3}) is None
+    assert log.since("L1", position, {STATE_LOBBY: 0, STATE_GAME: 3}) == []
+
+
+def test_evicted_events_get_snapshot():
+    log = EventLog(capacity=2)
+    position = log.record("L1", "lobby:patch", "a")
+    for payload in "bcd":
+        log.record("L1", "lobby:patch", payload)
+
+    assert log.since("L1", position) is None
+    assert log.since("L1", {"epoch": EPOCH, "seq": 2}) is not None
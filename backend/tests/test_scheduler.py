@@ -0,0 +1,74 @@
+# backend/tests/test_scheduler.py
+import threading
+
+import pytest
+from flask import Flask
+from flask_socketio import SocketIO
+
+from backend.utils.scheduler import Scheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    scheduler.init_app(SocketIO(Flask(__name__), async_mode="threading"))
+    return scheduler
+
+
+class Calls:
+    """Callback that records its calls and signals each one."""
+
+    def __init__(self):
+        self.calls = []
+        self.called = threading.Event()
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        self.called.set()
+
+
+def test_timers_fire_in_due_order(scheduler):
+    calls = Calls()
+    scheduler.schedule("L1", "late", 0.1, calls, "late")
+    scheduler.schedule("L1", "early", 0.02, calls, "early")
+    scheduler.schedule("L2", "other", 0.05, calls, "other")
+    assert scheduler.pending() == 3
+    assert scheduler.pending("L1") == 2
+
+    last = Calls()
+    scheduler.schedule("L3", "last", 0.15, last)
+    assert last.called.wait(2)
+    assert calls.calls == [("early",), ("other",), ("late",)]
+    assert scheduler.pending() == 0
+
+
+def test_schedule_replaces_pending_timer_with_same_key(scheduler):
+    calls = Calls()
+    scheduler.schedule("L1", "turn", 0.02, calls, "first")
+    scheduler.schedule("L1", "turn", 0.05, calls, "second")
+    kept = scheduler.schedule("L1", "turn", 0.01, calls, "third", replace=False)
+    assert kept.args == ("second",)
+    assert scheduler.pending("L1") == 1
+
+    assert calls.called.wait(2)
+    last = Calls()
+    scheduler.schedule("L1", "last", 0.05, last)
+    assert last.called.wait(2)
+    assert calls.calls == [("second",)]
+
+
+def test_cancel_by_key_and_by_lobby(scheduler):
+    calls = Calls()
+    scheduler.schedule("L1", "a", 0.02, calls, "L1a")
+    scheduler.schedule("L1", "b", 0.02, calls, "L1b")
+    scheduler.schedule("L2", "a", 0.02, calls, "L2a")
+
+    assert scheduler.cancel("L2", "a") == 1
+    assert scheduler.cancel("L2", "a") == 0
+    assert scheduler.cancel("L1") == 2
+    assert scheduler.pending() == 0
+
+    last = Calls()
+    scheduler.schedule("L3", "last", 0.05, last)
+    assert last.called.wait(2)
+    assert calls.calls == []
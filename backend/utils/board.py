@@ -0,0 +1,155 @@
+# backend/utils/board.py
+from ..constants import (
+    CARD_TYPE_NEUTRAL,
+    CARD_TYPE_PENALTY,
+    CARD_TYPE_TEAM1,
+    CARD_TYPE_TEAM2,
+    TEAM1,
+    TEAM2,
+)
+
+# Card types are stored as their index in this tuple
+CARD_TYPES = (CARD_TYPE_TEAM1, CARD_TYPE_TEAM2, CARD_TYPE_PENALTY, CARD_TYPE_NEUTRAL)
+CARD_TYPE_CODES = {card_type: code for code, card_type in enumerate(CARD_TYPES)}
+
+# Card type that counts towards each team's remaining cards
+TEAM_CARD_TYPES = {TEAM1: CARD_TYPE_TEAM1, TEAM2: CARD_TYPE_TEAM2}
+
+
+class Card:
+    """Read-only view of one card of a Board."""
+
+    __slots__ = ("_board", "_index")
+
+    def __init__(self, board, index):
+        self._board = board
+        self._index = index
+
+    @property
+    def id(self):
+        return self._board.ids[self._index]
+
+    @property
+    def word(self):
+        return self._board.words[self._index]
+
+    @property
+    def type(self):
+        return CARD_TYPES[self._board.types[self._index]]
+
+    @property
+    def revealed(self):
+        return self._board.is_revealed(self._index)
+
+    def to_dict(self, include_type=True):
+        """Card as sent to clients; members don't get unrevealed types."""
+        card = {"id": self.id, "word": self.word, "revealed": self.revealed}
+        if include_type or card["revealed"]:
+            card["type"] = self.type
+        return card
+
+
+class Board:
+    """
+    Game board stored as parallel arrays.
+
+    Card ids, words and type codes are kept in lists indexed by board
+    position, revealed cards in a bitmask, and card ids map to positions.
+    The number of unrevealed cards for each team is kept up to date as cards
+    are revealed, so nothing needs to rescan the board.
+    """
+
+    __slots__ = ("_index", "_remaining", "ids", "revealed", "types", "words")
+
+    def __init__(self, ids, words, types, revealed=0):
+        self.ids = list(ids)
+        self.words = list(words)
+        self.types = bytearray(types)
+        self.revealed = revealed
+        self._index = {card_id: i for i, card_id in enumerate(self.ids)}
+        self._remaining = {TEAM1: 0, TEAM2: 0}
+        for team, card_type in TEAM_CARD_TYPES.items():
+            code = CARD_TYPE_CODES[card_type]
+            self._remaining[team] = sum(
+                1
+                for i, type_code in enumerate(self.types)
+                if type_code == code and not self.is_revealed(i)
+            )
+
+    @classmethod
+    def from_cards(cls, cards):
+        """Build a board from (id, word, card_type) tuples in board order."""
+        ids, words, types = [], [], []
+        for card_id, word, card_type in cards:
+            ids.append(card_id)
+            words.append(word)
+            types.append(CARD_TYPE_CODES[card_type])
+        return cls(ids, words, types)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["ids"], data["words"], data["types"], data["revealed"])
+
+    def to_dict(self):
+        """Compact JSON-friendly form, used by the game store."""
+        return {
+            "ids": self.ids,
+            "words": self.words,
+            "types": list(self.types),
+            "revealed": self.revealed,
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (Card(self, i) for i in range(len(self.ids)))
+
+    def card(self, card_id):
+        """Return the Card view for an id, or None."""
+        index = self._index.get(card_id)
+        return None if index is None else Card(self, index)
+
+    def is_revealed(self, index):
+        return bool(self.revealed >> index & 1)
+
+    def reveal(self, card_id):
+        """
+        Reveal a card and update the remaining counts.
+
+        Returns the Card, or None if the id is unknown or already revealed.
+        """
+        index = self._index.get(card_id)
+        if index is None or self.is_revealed(index):
+            return None
+        self.revealed |= 1 << index
+        card_type = CARD_TYPES[self.types[index]]
+        for team, team_card_type in TEAM_CARD_TYPES.items():
+            if card_type == team_card_type:
+                self._remaining[team] -= 1
+        return Card(self, index)
+
+    def remaining(self, team):
+        """Number of unrevealed cards for a team."""
+        return self._remaining.get(team, 0)
+
+    def team_data(self):
+        return {
+            TEAM1: {"remaining_cards": self._remaining[TEAM1]},
+            TEAM2: {"remaining_cards": self._remaining[TEAM2]},
+        }
+
+    def views(self):
+        """Return (lead_board, member_board) as lists of card dicts."""
+        lead_board = []
+        member_board = []
+        for card in self:
+            lead_card = card.to_dict()
+            lead_board.append(lead_card)
+            if lead_card["revealed"]:
+                member_board.append(lead_card.copy())
+            else:
+                member_board.append(
+                    {"id": lead_card["id"], "word": lead_card["word"], "revealed": False}
+                )
+        return lead_board, member_board
@@ -0,0 +1,119 @@
+# backend/utils/board_pool.py
+"""
+Pool of pre-generated game boards.
+
+Starting a game takes a ready-made board from the pool for its board
+configuration instead of generating one on the request path. A background
+task tops each configuration's pool back up. It runs at low priority: it
+yields to other tasks after every board and pauses while lobby commands are
+queued, so a burst of games starting at once is served from the pool and
+refilled afterwards. When a pool runs dry, boards are generated inline.
+
+Each configuration draws boards from its own random generator. With a seed
+configured, the n-th board handed out for a configuration is always the
+same, whether it came from the pool or was generated inline. Later changes
+to a board, such as replacing words repeated from the last game, use a
+second generator per configuration, so they don't shift the boards that
+follow.
+"""
+import logging
+import random
+import threading
+from collections import deque
+
+from .commands import command_queues
+
+logger = logging.getLogger(__name__)
+
+
+class BoardPool:
+    def __init__(self, generate, size=32, interval=5.0, seed=None):
+        """
+        generate: generate(config, rng) -> Board
+        size: boards kept ready per configuration
+        interval: most seconds between refill passes
+        seed: seed for reproducible boards, or None
+        """
+        self.generate = generate
+        self.size = size
+        self.interval = interval
+        self.seed = seed
+        self.stats = {"hits": 0, "misses": 0, "generated": 0}
+        self._boards = {}  # config -> deque of Board
+        self._rngs = {}  # (config, purpose) -> random.Random
+        self._lock = threading.Lock()
+        self._socketio = None
+        self._wake = None
+
+    def init_app(self, socketio, configs=()):
+        """Start the refill task, filling the given configurations first."""
+        self._socketio = socketio
+        self._wake = socketio.server.eio.create_event()
+        with self._lock:
+            for config in configs:
+                self._boards.setdefault(config, deque())
+        self._wake.set()  # Fill up straight away
+        socketio.start_background_task(self._run)
+
+    def _rng(self, config, purpose="boards"):
+        # Callers hold the lock; random.Random is not safe to share
+        rng = self._rngs.get((config, purpose))
+        if rng is None:
+            seed = None if self.seed is None else f"{self.seed}:{config}:{purpose}"
+            rng = self._rngs[(config, purpose)] = random.Random(seed)
+        return rng
+
+    def _generate(self, config):
+        # Callers hold the lock, so each generator hands out boards in order
+        board = self.generate(config, self._rng(config))
+        self.stats["generated"] += 1
+        return board
+
+    def take(self, config):
+        """Return a new board for a configuration."""
+        with self._lock:
+            boards = self._boards.setdefault(config, deque())
+            if boards:
+                self.stats["hits"] += 1
+                board = boards.popleft()
+            else:
+                self.stats["misses"] += 1
+                board = self._generate(config)
+            low = len(boards) < self.size // 2
+        if low and self._wake is not None:
+            self._wake.set()
+        return board
+
+    def draw(self, config, fn, *args):
+        """
+        Return fn(*args, rng) called with the configuration's generator
+        for changes to a board taken from the pool.
+        """
+        with self._lock:
+            return fn(*args, self._rng(config, "changes"))
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.refill()
+            except Exception:
+                logger.exception("Board pool refill failed")
+
+    def refill(self):
+        """Top every configuration's pool up to size, one board at a time."""
+        for config in list(self._boards):
+            while True:
+                if command_queues.depth():
+                    return  # Busy; try again on the next pass
+                with self._lock:
+                    boards = self._boards[config]
+                    if len(boards) >= self.size:
+                        break
+                    boards.append(self._generate(config))
+                if self._socketio is not None:
+                    self._socketio.sleep(0)
+
+    def __len__(self):
+        return sum(len(boards) for boards in self._boards.values())
@@ -0,0 +1,156 @@
+# backend/utils/commands.py
+"""
+Per-lobby command queues.
+
+Everything that changes a lobby or its game runs as a command on that
+lobby's queue: socket events that carry a ``lobby_id`` and scheduled timers.
+Each queue is drained in order by one task, so commands for a lobby never
+interleave, while different lobbies are processed in parallel. A drain task
+only exists while its lobby has queued commands.
+
+Socket handlers wait for their command to finish, so acknowledgements and
+errors behave as if the handler had run directly.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+import greenlet
+from prometheus_client import Histogram
+
+from .metrics import LATENCY_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+COMMAND_WAIT_SECONDS = Histogram(
+    "lockout_command_queue_wait_seconds",
+    "Time commands spent queued behind others for the same lobby",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+# Connection events are not about one lobby and run directly
+UNQUEUED_EVENTS = ("connect", "disconnect")
+
+
+class Command:
+    __slots__ = ("args", "done", "error", "fn", "queued", "result")
+
+    def __init__(self, fn, args, done):
+        self.fn = fn
+        self.args = args
+        self.queued = time.monotonic()
+        self.done = done  # Event set once run, or None when nobody waits
+        self.result = None
+        self.error = None
+
+
+class CommandQueues:
+    """One ordered command queue per lobby."""
+
+    def __init__(self):
+        self._queues = {}  # lobby_id -> deque of Command
+        self._workers = {}  # lobby_id -> greenlet of the task draining it
+        self._lock = threading.Lock()
+        self._socketio = None
+
+    def init_app(self, socketio):
+        """
+        Run lobby socket events through the queues.
+
+        Must be called after every socket handler has been registered, and
+        after any other handler wrapping, so instrumentation measures the
+        command itself rather than its time in the queue.
+        """
+        self._socketio = socketio
+        for handlers in socketio.server.handlers.values():
+            for event, handler in list(handlers.items()):
+                if event not in UNQUEUED_EVENTS:
+                    handlers[event] = self.wrap(handler)
+
+    def wrap(self, handler):
+        def wrapper(sid, *args):
+            data = args[0] if args else None
+            lobby_id = data.get("lobby_id") if isinstance(data, dict) else None
+            if not lobby_id or not isinstance(lobby_id, str):
+                return handler(sid, *args)
+            return self.run(lobby_id, handler, sid, *args)
+
+        return wrapper
+
+    def submit(self, lobby_id, fn, *args, wait=False):
+        """
+        Queue fn(*args) for a lobby and return its Command.
+
+        Errors of commands nobody waits for are logged.
+        """
+        done = self._create_event() if wait else None
+        command = Command(fn, args, done)
+        with self._lock:
+            self._queues.setdefault(lobby_id, deque()).append(command)
+            start = lobby_id not in self._workers
+            if start:
+                self._workers[lobby_id] = None
+        if start:
+            if self._socketio is None:
+                self._drain(lobby_id)  # Not serving; run in the caller
+            else:
+                self._socketio.start_background_task(self._drain, lobby_id)
+        return command
+
+    def run(self, lobby_id, fn, *args):
+        """Run fn(*args) on a lobby's queue and return its result."""
+        if self._workers.get(lobby_id) is greenlet.getcurrent():
+            # Already running a command of this lobby
+            return fn(*args)
+        command = self.submit(lobby_id, fn, *args, wait=True)
+        command.done.wait()
+        if command.error is not None:
+            raise command.error
+        return command.result
+
+    def _create_event(self):
+        if self._socketio is None:
+            return threading.Event()
+        return self._socketio.server.eio.create_event()
+
+    def _drain(self, lobby_id):
+        with self._lock:
+            # Eventlet tasks are greenlets; so is each plain thread
+            self._workers[lobby_id] = greenlet.getcurrent()
+        while True:
+            with self._lock:
+                queue = self._queues.get(lobby_id)
+                if not queue:
+                    self._queues.pop(lobby_id, None)
+                    self._workers.pop(lobby_id, None)
+                    return
+                command = queue.popleft()
+            COMMAND_WAIT_SECONDS.observe(time.monotonic() - command.queued)
+            try:
+                command.result = command.fn(*command.args)
+            except Exception as exc:
+                command.error = exc
+                if command.done is None:
+                    logger.exception("Command for lobby %s failed", lobby_id)
+            finally:
+                if command.done is not None:
+                    command.done.set()
+
+    def depth(self):
+        """Commands queued across all lobbies, not counting running ones."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def max_depth(self):
+        """Commands queued for the busiest lobby."""
+        with self._lock:
+            return max((len(queue) for queue in self._queues.values()), default=0)
+
+    def active(self):
+        """Lobbies with a drain task running."""
+        return len(self._workers)
+
+
+command_queues = CommandQueues()
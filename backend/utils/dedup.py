@@ -0,0 +1,87 @@
+# backend/utils/dedup.py
+"""
+Results of recent client commands, for answering retries.
+
+Clients may attach a ``command_id`` to commands that must not run twice,
+such as keyword and guess submissions. The result of each such command is
+kept per lobby; a retry with the same id gets that result back without the
+command running again or anything being broadcast. Each lobby keeps a
+bounded number of results for a limited time, which is plenty for network
+retries.
+
+Commands of a lobby run one at a time on its command queue, so a retry
+always finds the result of the first attempt.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Longest command id accepted, so ids can't be used to fill memory
+MAX_COMMAND_ID_LENGTH = 64
+
+
+def command_key(event, user_id, command_id):
+    """Cache key of a command, or None if it can't be deduplicated."""
+    if not isinstance(command_id, str) or not command_id or len(command_id) > MAX_COMMAND_ID_LENGTH:
+        return None
+    return (event, user_id, command_id)
+
+
+class CommandResults:
+    def __init__(self, capacity=256, ttl=60):
+        """
+        capacity: results kept per lobby
+        ttl: seconds results are kept
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self._results = {}  # lobby_id -> OrderedDict of key -> (result, time)
+        self._lock = threading.Lock()
+
+    def get(self, lobby_id, key):
+        """Return (True, result) for a command seen before, else (False, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(lobby_id, {}).get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self.stats["hits"] += 1
+                return True, entry[0]
+            self.stats["misses"] += 1
+        return False, None
+
+    def put(self, lobby_id, key, result):
+        now = time.monotonic()
+        with self._lock:
+            results = self._results.get(lobby_id)
+            if results is None:
+                results = self._results[lobby_id] = OrderedDict()
+            results[key] = (result, now)
+            results.move_to_end(key)
+            self._expire(results, now)
+            while len(results) > self.capacity:
+                results.popitem(last=False)
+
+    def _expire(self, results, now):
+        # Oldest first, so stop at the first one still valid
+        while results and now - next(iter(results.values()))[1] > self.ttl:
+            results.popitem(last=False)
+
+    def prune(self):
+        """Drop expired results of every lobby."""
+        now = time.monotonic()
+        with self._lock:
+            for lobby_id in list(self._results):
+                self._expire(self._results[lobby_id], now)
+                if not self._results[lobby_id]:
+                    del self._results[lobby_id]
+
+    def discard(self, lobby_id):
+        with self._lock:
+            self._results.pop(lobby_id, None)
+
+    def __len__(self):
+        return sum(len(results) for results in self._results.values())
+
+
+command_results = CommandResults()
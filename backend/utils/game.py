@@ -1,48 +1,54 @@
 # backend/utils/game.py
 import random
 import time
+import uuid
 from ..constants import (
+    BOARD_PRESETS,
     CARD_TYPE_TEAM1,
     CARD_TYPE_TEAM2,
     CARD_TYPE_PENALTY,
-    CARD_TYPE_NEUTRAL,
-    TEAM1_CARD_COUNT,
-    TEAM2_CARD_COUNT,
-    PENALTY_CARD_COUNT,
-    NEUTRAL_CARD_COUNT,
+    DEFAULT_BOARD_PRESET,
+    DEFAULT_WORD_PACK,
     GAME_PHASE_KEYWORD_ENTRY,
+    FIELD_IS_TEAM_LEAD,
+    ROLE_LEADS,
+    ROLE_MEMBERS,
     TEAM1,
     TEAM2
 )
+from .board import Board
+from .board_pool import BoardPool
+from .serialization import view_cache
+from .store import get_game_store
+from .words import word_packs
 
-# Sample word list for game cards
-# This would typically be loaded from a file or database
-WORD_LIST = [
-    # Themed words that could work for various game skins
-    "ENCRYPT", "FIREWALL", "PROTOCOL", "TERMINAL", "BINARY", "CIPHER",
-    "EXPLOIT", "MALWARE", "VIRUS", "BREACH", "HACK", "SENTINEL",
-    "SERVER", "PASSWORD", "DATABASE", "ROUTER", "NETWORK", "SECURITY",
-    "ACCESS", "DECRYPT", "PROXY", "TROJAN", "PHISHING", "KEYLOGGER",
-    "BACKDOOR", "BUFFER", "COOKIE", "DOMAIN", "WORM", "SPYWARE",
-    "RANSOMWARE", "BOTNET", "BIOMETRIC", "AUTHENTICATION", "INJECTION", "TOKEN"
-]
+# Board configuration (preset, word pack theme) games use by default; each
+# configuration has its own pool of ready boards
+DEFAULT_BOARD = (DEFAULT_BOARD_PRESET, DEFAULT_WORD_PACK)
 
-# Dictionary to store all active games
-# Key: lobby_id, Value: game state dict
-active_games = {}
+# Scheduler key for the pending end of a turn after guess results are shown
+TIMER_END_TURN = "end_turn"
 
 
-def create_game(lobby_id):
-    """Create a new game state for a lobby"""
-    if lobby_id in active_games:
-        return active_games[lobby_id]
-    
-    # Generate a new game board with randomized word cards
-    board = generate_game_board()
+def new_game_state(lobby_id, config=DEFAULT_BOARD, exclude=()):
+    """
+    Build the initial game state for a lobby without storing it.
+
+    config is the (preset, word pack) to play with; words in exclude, such
+    as those of the lobby's previous game, are kept off the board.
+    """
+    # Take a ready-made board with randomized word cards
+    board = board_pool.take(config)
+    if exclude:
+        board_pool.draw(config, replace_repeated_words, board, config, exclude)
+    preset, word_pack = config
     
     # Create initial game state
-    game_state = {
+    return {
         "lobby_id": lobby_id,
+        "board_preset": preset,
+        "word_pack": word_pack,
+        "game_id": uuid.uuid4().hex,  # Tells games in the same lobby apart
         "active_team": TEAM1,  # Team 1 starts first
         "round_number": 1,
         "game_phase": GAME_PHASE_KEYWORD_ENTRY,
@@ -51,107 +57,119 @@ def create_game(lobby_id):
         "board": board,
         "game_over": False,
         "winner": None,
-        "selected_cards": {}  # Tracks real-time card selections: {user_id: [card_ids]}
+        "selected_cards": {},  # Tracks real-time card selections: {user_id: [card_ids]}
+        "seq": 0,  # Version of the state; bumped once per broadcast patch
+        "version": 0,  # Bumped on every change, including card selections
+        "pending_ops": []  # Patch operations not yet broadcast
     }
-    
-    active_games[lobby_id] = game_state
+
+
+def create_game(lobby_id, state=None, config=DEFAULT_BOARD, replace=False):
+    """
+    Create a new game state for a lobby.
+
+    An existing game is returned as is, unless replace is set; the new game
+    then avoids the words of the one it replaces. When a state session is
+    given the game is added to it, so it is written together with the
+    handler's other changes.
+    """
+    existing = state.game(lobby_id) if state else get_game(lobby_id)
+    if existing and not replace:
+        return existing
+    
+    exclude = set(existing["board"].words) if existing else ()
+    game_state = new_game_state(lobby_id, config, exclude)
+    if state:
+        state.add_game(lobby_id, game_state)
+    else:
+        get_game_store().put(lobby_id, game_state)
     return game_state
 
 
 def get_game(lobby_id):
     """Get the game state for a lobby"""
-    return active_games.get(lobby_id)
+    return get_game_store().get(lobby_id)
 
 
 def end_game(lobby_id):
     """End the game for a lobby"""
-    if lobby_id in active_games:
-        del active_games[lobby_id]
+    get_game_store().delete(lobby_id)
 
 
-def generate_game_board():
-    """Generate a randomized game board with the correct distribution of card types"""
-    # Create cards of each type
-    cards = []
-    
-    # Team 1 cards
-    for _ in range(TEAM1_CARD_COUNT):
-        cards.append({"type": CARD_TYPE_TEAM1})
-    
-    # Team 2 cards
-    for _ in range(TEAM2_CARD_COUNT):
-        cards.append({"type": CARD_TYPE_TEAM2})
-    
-    # Penalty card
-    for _ in range(PENALTY_CARD_COUNT):
-        cards.append({"type": CARD_TYPE_PENALTY})
+def board_config(lobby):
+    """The (preset, word pack) a lobby's games are played with."""
+    return (
+        lobby.get("board_preset", DEFAULT_BOARD_PRESET),
+        lobby.get("word_pack", DEFAULT_WORD_PACK),
+    )
+
+
+def generate_game_board(config=DEFAULT_BOARD, rng=random):
+    """Generate a randomized game board with the preset's distribution of card types"""
+    preset, word_pack = config
+    preset = BOARD_PRESETS[preset]
     
-    # Neutral cards
-    for _ in range(NEUTRAL_CARD_COUNT):
-        cards.append({"type": CARD_TYPE_NEUTRAL})
+    # Create cards of each type
+    card_types = [
+        card_type
+        for card_type, count in preset["cards"]
+        for _ in range(count)
+    ]
     
     # Randomly assign words to each card
-    random_words = random.sample(WORD_LIST, len(cards))
-    
-    for i, card in enumerate(cards):
-        card["id"] = i + 1
-        card["word"] = random_words[i]
-        card["revealed"] = False
+    random_words = word_packs.get(word_pack).sample(
+        len(card_types), rng, preset["max_word_length"]
+    )
+    cards = [
+        (i + 1, random_words[i], card_type)
+        for i, card_type in enumerate(card_types)
+    ]
     
     # Randomly shuffle the cards
-    random.shuffle(cards)
-    return cards
+    rng.shuffle(cards)
+    return Board.from_cards(cards)
+
+
+def replace_repeated_words(board, config, exclude, rng=random):
+    """Swap the board's words that are in exclude for others from its pack."""
+    repeated = [i for i, word in enumerate(board.words) if word in exclude]
+    if not repeated:
+        return
+    preset, word_pack = config
+    on_board = set(board.words)
+    fresh = word_packs.get(word_pack).sample(
+        len(repeated), rng, BOARD_PRESETS[preset]["max_word_length"], exclude | on_board
+    )
+    # A pack too small to avoid every repeat may hand back words in use
+    fresh = [word for word in fresh if word not in on_board]
+    for index, word in zip(repeated, fresh):
+        board.words[index] = word
+
 
+# Boards are generated ahead of time; see board_pool.py
+board_pool = BoardPool(generate_game_board)
 
-def get_sanitized_game_state(game_state, user_id, participants):
+
+def get_game_views(game_state):
     """
-    Return a sanitized version of the game state based on user role.
-    Team leads can see unrevealed card types, regular team members cannot.
-    Also counts remaining cards for each team based on unrevealed cards.
+    Build the sanitized game state for every role in one pass over the board.
+
+    Only two distinct views exist: team leads see unrevealed card types,
+    regular team members do not. Returns {ROLE_LEADS: view, ROLE_MEMBERS: view}.
     """
     if not game_state:
         return None
-        
-    # Find the user's role
-    user_participant = next((p for p in participants if p["id"] == user_id), None)
-    is_team_lead = user_participant and user_participant.get("is_team_lead", False) if user_participant else False
-    
-    # Copy the board, sanitizing as needed based on user role
-    sanitized_board = []
     
-    # Count unrevealed cards for each team
-    team1_remaining = 0
-    team2_remaining = 0
-    
-    for card in game_state["board"]:
-        card_copy = card.copy()
-        
-        # Count remaining cards for each team
-        if not card["revealed"]:
-            if card["type"] == CARD_TYPE_TEAM1:
-                team1_remaining += 1
-            elif card["type"] == CARD_TYPE_TEAM2:
-                team2_remaining += 1
-            
-            # If user is not a team lead, remove the type info
-            if not is_team_lead:
-                card_copy = {
-                    "id": card["id"],
-                    "word": card["word"],
-                    "revealed": card["revealed"]
-                }
-        
-        sanitized_board.append(card_copy)
+    board = game_state["board"]
+    lead_board, member_board = board.views()
     
-    # Create team data using counted values
-    team_data = {
-        TEAM1: {"remaining_cards": team1_remaining},
-        TEAM2: {"remaining_cards": team2_remaining}
-    }
+    # Remaining cards are kept up to date by the board as cards are revealed
+    team_data = board.team_data()
     
-    # Create a deep copy of the game state to avoid modifying the original
-    sanitized = {
+    # Fields shared by both views; copied so the original is never modified
+    shared = {
         "lobby_id": game_state["lobby_id"],
+        "board_columns": BOARD_PRESETS[game_state.get("board_preset", DEFAULT_BOARD_PRESET)]["columns"],
         "active_team": game_state["active_team"],
         "round_number": game_state["round_number"],
         "game_phase": game_state["game_phase"],
@@ -160,11 +178,87 @@ def get_sanitized_game_state(game_state, user_id, participants):
         "active_keyword": game_state["active_keyword"],
         "game_over": game_state["game_over"],
         "winner": game_state["winner"],
-        "board": sanitized_board,
-        "selected_cards": game_state.get("selected_cards", {})
+        "selected_cards": game_state.get("selected_cards", {}),
+        "seq": game_state.get("seq", 0)
     }
     
-    return sanitized
+    return {
+        ROLE_LEADS: {**shared, "board": lead_board},
+        ROLE_MEMBERS: {**shared, "board": member_board},
+    }
+
+
+def bump_version(game_state):
+    """Mark the game state as changed so cached views are re-encoded."""
+    game_state["version"] = game_state.get("version", 0) + 1
+
+
+def game_etag(game_state, role):
+    """ETag of a role's view of the game; changes with the state's version."""
+    game_id = game_state.get("game_id", game_state["lobby_id"])
+    return f"{game_id}.{game_state.get('version', 0)}.{role}"
+
+
+def encoded_game_view(game_state, role):
+    """The role's view of the game, encoded once per state version."""
+    game_id = game_state.get("game_id", game_state["lobby_id"])
+    return view_cache.get(
+        ("game", game_id, role),
+        game_state.get("version", 0),
+        lambda: get_game_views(game_state)[role],
+    )
+
+
+def get_user_role(lobby, user_id):
+    """Return ROLE_LEADS or ROLE_MEMBERS for a user in a lobby"""
+    user_participant = lobby.get_participant(user_id)
+    if user_participant and user_participant.get(FIELD_IS_TEAM_LEAD, False):
+        return ROLE_LEADS
+    return ROLE_MEMBERS
+
+
+def get_sanitized_game_state(game_state, user_id, lobby):
+    """
+    Return a sanitized version of the game state based on user role.
+    Team leads can see unrevealed card types, regular team members cannot.
+    """
+    if not game_state:
+        return None
+    
+    return get_game_views(game_state)[get_user_role(lobby, user_id)]
+
+
+def record_op(game_state, op, **fields):
+    """
+    Record a patch operation describing a change to the game state.
+
+    Operations only carry data every role may see, so one patch serves all
+    players. They are broadcast together by take_game_patch.
+    """
+    game_state.setdefault("pending_ops", []).append({"op": op, **fields})
+    bump_version(game_state)
+
+
+def take_game_patch(game_state):
+    """
+    Collect the operations recorded since the last patch.
+
+    Bumps the state's seq and returns {"lobby_id", "seq", "ops"}, or None if
+    nothing changed. Clients apply patches in seq order and request a full
+    snapshot when they see a gap.
+    """
+    ops = game_state.get("pending_ops")
+    if not ops:
+        return None
+    game_state["pending_ops"] = []
+    game_state["seq"] = game_state.get("seq", 0) + 1
+    bump_version(game_state)
+    return {"lobby_id": game_state["lobby_id"], "seq": game_state["seq"], "ops": ops}
+
+
+def count_remaining_cards(game_state):
+    """Return team data with the number of unrevealed cards for each team"""
+    return game_state["board"].team_data()
 
 
 def submit_keyword(game_state, keyword_data):
@@ -183,12 +277,8 @@ def submit_keyword(game_state, keyword_data):
     team = keyword_data["team"]
     count = keyword_data["point_count"]
     
-    # Count how many cards remain for this team
-    remaining_cards = 0
-    for card in game_state["board"]:
-        if not card["revealed"] and ((team == TEAM1 and card["type"] == CARD_TYPE_TEAM1) or 
-                                     (team == TEAM2 and card["type"] == CARD_TYPE_TEAM2)):
-            remaining_cards += 1
+    # How many cards remain for this team
+    remaining_cards = game_state["board"].remaining(team)
     
     # Validate team has enough cards remaining
     if count <= 0 or count > remaining_cards:
@@ -203,6 +293,9 @@ def submit_keyword(game_state, keyword_data):
     
     # Move to team guessing phase
     game_state["game_phase"] = "team_guessing"
+    
+    record_op(game_state, "keyword", active_keyword=game_state["active_keyword"])
+    record_op(game_state, "phase", game_phase=game_state["game_phase"])
     return True
 
 
@@ -222,11 +315,13 @@ def submit_guess(game_state, guess_data):
     active_team = game_state["active_team"]
     
     # Get the cards being guessed
+    board = game_state["board"]
     card_ids = guess_data["card_ids"]
     guessed_cards = []
     for card_id in card_ids:
-        card = next((c for c in game_state["board"] if c["id"] == card_id and not c["revealed"]), None)
-        if card:
+        # type() rather than isinstance(): True and False are ints too
+        card = board.card(card_id) if type(card_id) is int else None
+        if card and not card.revealed and all(c.id != card.id for c in guessed_cards):
             guessed_cards.append(card)
     
     # Validate we have the right number of cards
@@ -244,33 +339,37 @@ def submit_guess(game_state, guess_data):
     
     # Mark each guessed card as revealed
     for card in guessed_cards:
-        card["revealed"] = True
-        result["cards"].append(card)
+        board.reveal(card.id)
+        result["cards"].append(card.to_dict())
         
         # Check if guess was correct for the active team
-        if (active_team == TEAM1 and card["type"] == CARD_TYPE_TEAM1) or \
-           (active_team == TEAM2 and card["type"] == CARD_TYPE_TEAM2):
+        if (active_team == TEAM1 and card.type == CARD_TYPE_TEAM1) or \
+           (active_team == TEAM2 and card.type == CARD_TYPE_TEAM2):
             result["correct_guesses"] += 1
-        elif card["type"] == CARD_TYPE_PENALTY:
+        elif card.type == CARD_TYPE_PENALTY:
             result["penalty_triggered"] = True
         else:
             result["incorrect_guesses"] += 1
     
     # Check for win condition - if all of team's cards are revealed, they win
-    team_cards_remaining = 0
-    card_type_to_check = CARD_TYPE_TEAM1 if active_team == TEAM1 else CARD_TYPE_TEAM2
-    
-    for card in game_state["board"]:
-        if not card["revealed"] and card["type"] == card_type_to_check:
-            team_cards_remaining += 1
-    
-    if team_cards_remaining == 0:
+    if board.remaining(active_team) == 0:
         game_state["game_over"] = True
         game_state["winner"] = active_team
     
     # Move to reveal results phase
     game_state["game_phase"] = "reveal_results"
     
+    # Revealed card types are visible to every role
+    record_op(
+        game_state,
+        "reveal",
+        cards=[{"id": card.id, "type": card.type} for card in guessed_cards],
+        team_data=count_remaining_cards(game_state),
+    )
+    record_op(game_state, "phase", game_phase=game_state["game_phase"])
+    if game_state["game_over"]:
+        record_op(game_state, "game_over", winner=game_state["winner"])
+    
     return True, result
 
 
@@ -292,6 +391,14 @@ def end_turn(game_state):
     if game_state["active_team"] == TEAM1:
         game_state["round_number"] += 1
     
+    record_op(
+        game_state,
+        "turn",
+        active_team=game_state["active_team"],
+        round_number=game_state["round_number"],
+    )
+    record_op(game_state, "keyword", active_keyword=None)
+    record_op(game_state, "phase", game_phase=game_state["game_phase"])
     return True
 
 
@@ -322,4 +429,5 @@ def handle_card_selection(game_state, user_id, card_id, is_selected):
         if card_id in user_selections:
             user_selections.remove(card_id)
     
+    bump_version(game_state)
     return True
\ No newline at end of file
@@ -0,0 +1,223 @@
+# backend/utils/journal.py
+"""
+Append-only journal and snapshots for the in-memory state backend.
+
+Every lobby and game document that changes in a store session is appended to
+``journal.log`` as one line: ``seq<TAB>kind<TAB>key<TAB>json`` (``-`` for a
+delete). Lines are buffered and written in batches by a background task,
+optionally with fsync. Snapshots of every document go to ``snapshot.log``
+together with the last seq they include, and the journal is rotated, so
+recovery only replays the journal written since the last snapshot.
+
+The journal mirrors one process's memory, so only one process may use a
+directory; a second one, such as another worker, refuses to start.
+"""
+import atexit
+import fcntl
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = "journal.log"
+ROTATED_JOURNAL_FILE = "journal.old"
+SNAPSHOT_FILE = "snapshot.log"
+LOCK_FILE = "journal.lock"
+SNAPSHOT_HEADER = "snapshot"
+DELETED = "-"
+
+
+def _format(seq, kind, key, data):
+    return f"{seq}\t{kind}\t{key}\t{DELETED if data is None else data}\n"
+
+
+def _parse(line):
+    seq, kind, key, data = line.rstrip("\n").split("\t", 3)
+    return int(seq), kind, key, None if data == DELETED else data
+
+
+class Journal:
+    def __init__(self, directory, fsync=False, flush_interval=0.05, snapshot_interval=300):
+        """
+        directory: where the journal and snapshot files are kept
+        fsync: fsync the journal after every batch
+        flush_interval: seconds between batch writes
+        snapshot_interval: seconds between snapshots
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.stats = {
+            "records": 0,
+            "batches": 0,
+            "snapshots": 0,
+            "recovered_documents": 0,
+            "recovery_seconds": 0.0,
+        }
+        self._seq = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._socketio = None
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = self._acquire()
+
+    def _acquire(self):
+        """Lock the directory for this process, for as long as it runs."""
+        fd = os.open(self._path(LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise RuntimeError(
+                f"Journal directory {self.directory} is used by another process; "
+                "run a single worker or use STATE_BACKEND=sqlite"
+            ) from None
+        return fd
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def record(self, kind, key, data):
+        """Buffer a document write (or a delete when data is None)."""
+        with self._lock:
+            self._seq += 1
+            self._buffer.append(_format(self._seq, kind, key, data))
+
+    def flush(self):
+        """Write buffered records to the journal file."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            with open(self._path(JOURNAL_FILE), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.stats["records"] += len(lines)
+            self.stats["batches"] += 1
+
+    def snapshot(self, documents):
+        """
+        Write a snapshot of every document and start a new journal.
+
+        documents: callable returning [(kind, key, encoded)] for the whole
+        state; it is called under the journal lock so the snapshot lines up
+        exactly with the journal seq.
+        """
+        self.flush()
+        with self._lock:
+            seq = self._seq
+            lines = [_format(seq, kind, key, data) for kind, key, data in documents()]
+            self._rotate()
+
+        # Records newer than the snapshot are in the new journal, and older
+        # ones are skipped by seq, so a crash at any point here is safe
+        tmp = self._path(SNAPSHOT_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{SNAPSHOT_HEADER}\t{seq}\n")
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(SNAPSHOT_FILE))
+        rotated = self._path(ROTATED_JOURNAL_FILE)
+        if os.path.exists(rotated):
+            os.remove(rotated)
+        self.stats["snapshots"] += 1
+
+    def _rotate(self):
+        """Move the journal aside; called under the lock."""
+        journal = self._path(JOURNAL_FILE)
+        rotated = self._path(ROTATED_JOURNAL_FILE)
+        if not os.path.exists(journal):
+            return
+        if not os.path.exists(rotated):
+            os.replace(journal, rotated)
+            return
+        # A failed snapshot left its rotated journal behind, and it is still
+        # needed until a snapshot succeeds, so add the journal to it. Only
+        # whole records are copied, as a torn tail would corrupt the next one.
+        tmp = rotated + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for name in (ROTATED_JOURNAL_FILE, JOURNAL_FILE):
+                f.writelines(
+                    _format(seq, kind, key, data)
+                    for seq, kind, key, data in self._read(name, after=0)
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, rotated)
+        os.remove(journal)
+
+    def _read(self, name, after):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Torn write at the tail of the file
+                    break
+                seq, kind, key, data = _parse(line)
+                if seq > after:
+                    yield seq, kind, key, data
+
+    def recover(self):
+        """
+        Return {(kind, key): encoded} rebuilt from the latest snapshot and
+        the journal written after it. Deleted documents are left out.
+        """
+        started = time.monotonic()
+        state = {}
+        snapshot_seq = 0
+        path = self._path(SNAPSHOT_FILE)
+        if os.path.exists(path):
+            # Snapshots are renamed into place once complete, so never torn
+            with open(path, encoding="utf-8") as f:
+                _, seq = f.readline().rstrip("\n").split("\t")
+                snapshot_seq = int(seq)
+                for line in f:
+                    _, kind, key, data = _parse(line)
+                    state[(kind, key)] = data
+
+        last_seq = snapshot_seq
+        for name in (ROTATED_JOURNAL_FILE, JOURNAL_FILE):
+            for seq, kind, key, data in self._read(name, after=snapshot_seq):
+                if data is None:
+                    state.pop((kind, key), None)
+                else:
+                    state[(kind, key)] = data
+                last_seq = max(last_seq, seq)
+
+        with self._lock:
+            self._seq = max(self._seq, last_seq)
+        self.stats["recovered_documents"] = len(state)
+        self.stats["recovery_seconds"] = time.monotonic() - started
+        logger.info(
+            "Recovered %d documents in %.3fs",
+            len(state),
+            self.stats["recovery_seconds"],
+        )
+        return state
+
+    def init_app(self, socketio, documents):
+        """Start batch writes and periodic snapshots on a background task."""
+        self._socketio = socketio
+        socketio.start_background_task(self._run, documents)
+        # Don't lose the last batch on a clean shutdown
+        atexit.register(self.flush)
+
+    def _run(self, documents):
+        last_snapshot = time.monotonic()
+        while True:
+            self._socketio.sleep(self.flush_interval)
+            try:
+                self.flush()
+                if time.monotonic() - last_snapshot >= self.snapshot_interval:
+                    self.snapshot(documents)
+                    last_snapshot = time.monotonic()
+            except Exception:
+                logger.exception("Journal write failed")
@@ -0,0 +1,255 @@
+# backend/utils/lobby.py
+from flask_socketio import emit
+
+from ..constants import (
+    FIELD_CAN_START,
+    FIELD_IS_TEAM_LEAD,
+    FIELD_READY,
+    FIELD_TEAM,
+    LOBBY_PATCH,
+    LOBBY_READY,
+    LOBBY_UPDATE,
+    TEAM1,
+    TEAM2,
+)
+from .replay import STATE_LOBBY, broadcast, event_log
+from .serialization import view_cache
+
+
+class Lobby(dict):
+    """
+    Lobby document with participant indexes.
+
+    The lobby is still a plain dict as far as JSON encoding and the REST API
+    are concerned; ``participants`` stays the canonical, ordered list. On top
+    of it the lobby keeps id -> participant, per-team, team-lead and
+    readiness indexes so handlers can find and count users without scanning
+    the list.
+
+    Every change to participants or lobby fields must go through the
+    methods below, which keep the indexes consistent and record the change
+    as a patch operation. take_patch() collects them, so a change reaches
+    clients as a small diff rather than as the whole lobby.
+    """
+
+    __slots__ = ("_by_id", "_leads", "_ops", "_ready", "_teams")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setdefault("participants", [])
+        self._ops = []
+        self.reindex()
+
+    def reindex(self):
+        """Rebuild every index from the participants list."""
+        self._by_id = {}
+        self._teams = {TEAM1: {}, TEAM2: {}}
+        self._leads = {TEAM1: {}, TEAM2: {}}
+        self._ready = set()
+        for participant in self["participants"]:
+            self._index(participant)
+
+    def _index(self, participant):
+        user_id = participant["id"]
+        team = participant.get(FIELD_TEAM)
+        self._by_id[user_id] = participant
+        self._teams.setdefault(team, {})[user_id] = participant
+        if participant.get(FIELD_IS_TEAM_LEAD):
+            self._leads.setdefault(team, {})[user_id] = participant
+        if participant.get(FIELD_READY):
+            self._ready.add(user_id)
+
+    def _unindex(self, participant):
+        user_id = participant["id"]
+        team = participant.get(FIELD_TEAM)
+        self._by_id.pop(user_id, None)
+        self._teams.get(team, {}).pop(user_id, None)
+        self._leads.get(team, {}).pop(user_id, None)
+        self._ready.discard(user_id)
+
+    @property
+    def version(self):
+        """Counter identifying this state of the lobby for cached views."""
+        return self.get("version", 0)
+
+    def bump_version(self):
+        """Mark the lobby as changed; call once per broadcast change."""
+        self["version"] = self.version + 1
+        return self["version"]
+
+    def _record(self, op, **fields):
+        self._ops.append({"op": op, **fields})
+
+    def take_patch(self, lobby_id):
+        """
+        Collect the operations recorded since the last patch.
+
+        Bumps the lobby's version and returns {"lobby_id", "version", "ops"},
+        or None if nothing changed. Clients apply patches in version order
+        and request a full snapshot when they see a gap.
+        """
+        if not self._ops:
+            return None
+        ops, self._ops = self._ops, []
+        return {"lobby_id": lobby_id, "version": self.bump_version(), "ops": ops}
+
+    def get_participant(self, user_id):
+        """Return the participant dict for a user, or None."""
+        return self._by_id.get(user_id)
+
+    def has_participant(self, user_id):
+        return user_id in self._by_id
+
+    def team_members(self, team):
+        """Return {user_id: participant} for everyone on a team."""
+        return self._teams.get(team, {})
+
+    def team_leads(self, team):
+        """Return {user_id: participant} for the leads of a team."""
+        return self._leads.get(team, {})
+
+    def team_count(self, team):
+        return len(self._teams.get(team, ()))
+
+    def lead_count(self, team):
+        return len(self._leads.get(team, ()))
+
+    def ready_count(self):
+        return len(self._ready)
+
+    def smaller_team(self):
+        """The team with fewer members, TEAM1 when they are even."""
+        return TEAM1 if self.team_count(TEAM1) <= self.team_count(TEAM2) else TEAM2
+
+    def can_start(self):
+        """
+        Whether a game can be started: one lead per team, even teams and
+        everyone ready.
+        """
+        return (
+            self.lead_count(TEAM1) == 1
+            and self.lead_count(TEAM2) == 1
+            and self.team_count(TEAM1) == self.team_count(TEAM2)
+            and self.ready_count() == len(self._by_id)
+        )
+
+    def add_participant(self, participant):
+        """Append a participant, replacing any existing entry for the user."""
+        if participant["id"] in self._by_id:
+            self.remove_participant(participant["id"])
+        self["participants"].append(participant)
+        self._index(participant)
+        self._record("participant_added", participant=dict(participant))
+        return participant
+
+    def remove_participant(self, user_id):
+        """Remove a participant and return it, or None if not present."""
+        participant = self._by_id.get(user_id)
+        if participant is None:
+            return None
+        self._unindex(participant)
+        self["participants"].remove(participant)
+        self._record("participant_removed", id=user_id)
+        return participant
+
+    def update_participant(self, user_id, **fields):
+        """
+        Set fields of a participant other than team and team lead.
+
+        Returns the participant, or None if not present. Only fields whose
+        value changes are recorded.
+        """
+        participant = self._by_id.get(user_id)
+        if participant is None:
+            return None
+        changed = {key: value for key, value in fields.items() if participant.get(key) != value}
+        if changed:
+            participant.update(changed)
+            if FIELD_READY in changed:
+                if changed[FIELD_READY]:
+                    self._ready.add(user_id)
+                else:
+                    self._ready.discard(user_id)
+            self._record("participant_updated", id=user_id, fields=changed)
+        return participant
+
+    def update_fields(self, **fields):
+        """Set lobby level fields, such as game_in_progress."""
+        changed = {key: value for key, value in fields.items() if self.get(key) != value}
+        if changed:
+            self.update(changed)
+            self._record("lobby_updated", fields=changed)
+
+    def set_team(self, user_id, team):
+        """Move a participant to another team, demoting them if they led."""
+        participant = self._by_id.get(user_id)
+        if participant is None:
+            return None
+        self._unindex(participant)
+        changed = {FIELD_IS_TEAM_LEAD: False, FIELD_TEAM: team}
+        participant.update(changed)
+        self._index(participant)
+        self._record("participant_updated", id=user_id, fields=changed)
+        return participant
+
+    def set_team_lead(self, user_id, is_team_lead):
+        """Promote or demote a participant without touching other leads."""
+        participant = self._by_id.get(user_id)
+        if participant is None:
+            return None
+        self._unindex(participant)
+        participant[FIELD_IS_TEAM_LEAD] = is_team_lead
+        self._index(participant)
+        self._record("participant_updated", id=user_id, fields={FIELD_IS_TEAM_LEAD: is_team_lead})
+        return participant
+
+    def demote_team_leads(self, team):
+        """Demote every current lead of a team and return their ids."""
+        demoted = list(self.team_leads(team))
+        for user_id in demoted:
+            self.set_team_lead(user_id, False)
+        return demoted
+
+
+def lobby_etag(lobby_id, lobby):
+    """ETag of the lobby view; changes with the lobby's version."""
+    return f"{lobby_id}.{lobby.version}"
+
+
+def encoded_lobby_view(lobby_id, lobby):
+    """The lobby as sent to clients, with its id, encoded once per version."""
+    return view_cache.get(
+        ("lobby", lobby_id, None),
+        lobby.version,
+        lambda: {**lobby, "id": lobby_id},
+    )
+
+
+def broadcast_lobby_update(socketio, lobby_id, lobby):
+    """
+    Send the lobby's recorded changes to everyone in its room as a patch.
+
+    Every lobby change is broadcast through here, so this is where its
+    version moves on and cached encodings go stale. Nothing is sent when
+    nothing changed. When the changes decide whether the game can be
+    started, a lobby:ready event follows the patch.
+    """
+    can_start = lobby.can_start()
+    ready_changed = can_start != lobby.get(FIELD_CAN_START, False)
+    if ready_changed:
+        # Kept in the lobby so snapshots carry it; clients learn of the
+        # change from the lobby:ready event rather than from the patch
+        lobby[FIELD_CAN_START] = can_start
+    patch = lobby.take_patch(lobby_id)
+    if patch:
+        broadcast(socketio, lobby_id, LOBBY_PATCH, patch, state=(STATE_LOBBY, patch["version"]))
+    if ready_changed:
+        broadcast(socketio, lobby_id, LOBBY_READY, {"lobby_id": lobby_id, FIELD_CAN_START: can_start})
+
+
+def send_lobby_snapshot(lobby_id, lobby):
+    """
+    Send the whole lobby to the requesting client only, with the position
+    of the lobby's last broadcast event.
+    """
+    emit(LOBBY_UPDATE, (encoded_lobby_view(lobby_id, lobby), event_log.position(lobby_id)))
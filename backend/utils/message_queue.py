@@ -0,0 +1,179 @@
+# backend/utils/message_queue.py
+"""
+Socket.IO message-queue fan-out between workers.
+
+With a message queue configured, every emit is published to the queue so
+clients connected to other workers (or other hosts) receive it too. Remote
+emits are buffered for a few milliseconds and published together as one
+batch message, in the order they were made, which keeps queue traffic low
+however many emits a burst of activity makes.
+
+The ``local://`` URL selects an in-process broker that stands in for Redis
+in tests: several Socket.IO servers created in one process share it.
+"""
+import logging
+import pickle
+import threading
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+# Message method used for batched emits on the queue
+BATCH_METHOD = "batch"
+
+
+class LocalBroker:
+    """In-process publish/subscribe hub shared by local queue managers."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, queue):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(queue)
+
+    def publish(self, channel, message):
+        with self._lock:
+            queues = list(self._subscribers.get(channel, []))
+        for queue in queues:
+            queue.put(message)
+
+
+default_broker = LocalBroker()
+
+
+class BatchingMixin:
+    """
+    Buffers outbound emits and publishes them as one message.
+
+    Must be mixed in front of a ``socketio.PubSubManager`` subclass. All
+    pending emits are published together, and any non-emit message (room
+    changes, disconnects) flushes them first, so the receiving side sees
+    every message in the order it was made.
+    """
+
+    def __init__(self, *args, batch_interval=0.005, batch_max=64, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_interval = batch_interval
+        self.batch_max = batch_max
+        self._batch = []
+        self._batch_lock = threading.Lock()
+        self._wakeup = None
+
+    def initialize(self):
+        super().initialize()
+        if self.batch_interval > 0:
+            self._wakeup = self.server.eio.create_event()
+            self.server.start_background_task(self._flush_loop)
+
+    def _publish(self, data):
+        if self._wakeup is None or data.get("method") != "emit":
+            self.flush()
+            return super()._publish(data)
+        with self._batch_lock:
+            self._batch.append(data)
+            full = len(self._batch) >= self.batch_max
+        if full:
+            self.flush()
+        else:
+            self._wakeup.set()
+
+    def flush(self):
+        """Publish pending emits."""
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+        if len(batch) == 1:
+            super()._publish(batch[0])
+        elif batch:
+            super()._publish({"method": BATCH_METHOD, "messages": batch})
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let emits from the same handler accumulate before publishing
+            self.server.sleep(self.batch_interval)
+            try:
+                self.flush()
+            except Exception:
+                # Keep batching; the broker's client reconnects on its own
+                logger.exception("Publishing a batch of emits failed")
+
+    def _listen(self):
+        for message in super()._listen():
+            data = message
+            if isinstance(message, bytes):
+                try:
+                    data = pickle.loads(message)
+                except (pickle.UnpicklingError, EOFError):
+                    # Not one of ours; the manager tries it as JSON
+                    yield message
+                    continue
+            if isinstance(data, dict) and data.get("method") == BATCH_METHOD:
+                yield from data.get("messages", [])
+            else:
+                yield data
+
+
+class LocalQueueManager(socketio.PubSubManager):
+    """Client manager that fans out through a ``LocalBroker``."""
+
+    name = "local"
+
+    def __init__(self, broker=None, channel="socketio", write_only=False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.broker = broker or default_broker
+        self._queue = None
+
+    def initialize(self):
+        if not self.write_only:
+            self._queue = self.server.eio.create_queue()
+            self.broker.subscribe(self.channel, self._queue)
+        super().initialize()
+
+    def _publish(self, data):
+        # Pickle so each subscriber gets its own copy, as over a network
+        self.broker.publish(self.channel, pickle.dumps(data))
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+class BatchingLocalQueueManager(BatchingMixin, LocalQueueManager):
+    pass
+
+
+def _queue_manager_class(url):
+    if url.startswith("local://"):
+        return BatchingLocalQueueManager
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        base = socketio.RedisManager
+    elif url.startswith("kafka://"):
+        base = socketio.KafkaManager
+    elif url.startswith("zmq"):
+        base = socketio.ZmqManager
+    else:
+        base = socketio.KombuManager
+    return type(f"Batching{base.__name__}", (BatchingMixin, base), {})
+
+
+def create_client_manager(config):
+    """
+    Build the Socket.IO client manager for the configured message queue.
+
+    Returns None when no SOCKETIO_MESSAGE_QUEUE is set, in which case
+    Socket.IO keeps its default single-process manager.
+    """
+    url = getattr(config, "SOCKETIO_MESSAGE_QUEUE", None)
+    if not url:
+        return None
+    channel = getattr(config, "SOCKETIO_CHANNEL", "lockout-game")
+    batch_interval = getattr(config, "EMIT_BATCH_INTERVAL_MS", 5) / 1000.0
+    manager_class = _queue_manager_class(url)
+    if manager_class is BatchingLocalQueueManager:
+        return manager_class(channel=channel, batch_interval=batch_interval)
+    return manager_class(url, channel=channel, batch_interval=batch_interval)
@@ -0,0 +1,171 @@
+# backend/utils/metrics.py
+"""
+Prometheus metrics served at ``/metrics``.
+
+Request and event latency are recorded by wrapping the Flask app and the
+Socket.IO event handlers once at startup. Emit counts and sizes are taken
+from the packet encoder, which runs once per emit regardless of the number
+of recipients. Gauges such as active lobbies or pending timers are read
+from their sources only when Prometheus scrapes, so they cost nothing
+between scrapes.
+"""
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from socketio import packet
+
+# Drop the *_created series; nothing here needs counter start times
+disable_created_metrics()
+
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+SOCKET_EVENT_SECONDS = Histogram(
+    "lockout_socket_event_seconds",
+    "Time spent in Socket.IO event handlers",
+    ["event"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "lockout_http_request_seconds",
+    "Time spent serving REST requests",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+EMITS = Counter(
+    "lockout_emits",
+    "Socket.IO events emitted, counted once per emit call",
+    ["event"],
+    registry=REGISTRY,
+)
+EMIT_BYTES = Counter(
+    "lockout_emit_bytes",
+    "Encoded size of emitted Socket.IO events",
+    ["event"],
+    registry=REGISTRY,
+)
+SPECTATOR_JOINS = Counter(
+    "lockout_spectator_joins",
+    "Spectator join requests, by whether they were accepted",
+    ["result"],
+    registry=REGISTRY,
+)
+
+
+class SourceCollector:
+    """Reads gauges and counters from callables at scrape time."""
+
+    def __init__(self):
+        self._gauges = []  # (name, documentation, fn)
+        self._counters = []  # (name, documentation, fn, label)
+
+    def gauge(self, name, documentation, fn):
+        self._gauges.append((name, documentation, fn))
+
+    def counter(self, name, documentation, fn, label=None):
+        """fn returns a number, or {label value: number} when label is set."""
+        self._counters.append((name, documentation, fn, label))
+
+    def collect(self):
+        for name, documentation, fn in self._gauges:
+            yield GaugeMetricFamily(name, documentation, value=fn())
+        for name, documentation, fn, label in self._counters:
+            if label is None:
+                yield CounterMetricFamily(name, documentation, value=fn())
+                continue
+            family = CounterMetricFamily(name, documentation, labels=[label])
+            for value, count in fn().items():
+                family.add_metric([value], count)
+            yield family
+
+
+sources = SourceCollector()
+REGISTRY.register(sources)
+
+
+def metered_packet_class(base):
+    """Subclass a Socket.IO packet class to count emitted events and bytes."""
+
+    class MeteredPacket(base):
+        def encode(self):
+            encoded = super().encode()
+            if self.packet_type in (packet.EVENT, packet.BINARY_EVENT) and self.data:
+                event = self.data[0]
+                parts = encoded if isinstance(encoded, list) else [encoded]
+                EMITS.labels(event).inc()
+                # Text parts are str; count the UTF-8 bytes that go on the wire
+                EMIT_BYTES.labels(event).inc(
+                    sum(len(part.encode() if isinstance(part, str) else part) for part in parts)
+                )
+            return encoded
+
+    return MeteredPacket
+
+
+def timed_handler(event, handler):
+    histogram = SOCKET_EVENT_SECONDS.labels(event)
+
+    def wrapper(*args):
+        started = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def connection_count(server, namespace="/"):
+    """Number of clients connected to a namespace on this worker."""
+    return len(server.manager.rooms.get(namespace, {}).get(None, {}))
+
+
+def init_app(app, socketio):
+    """
+    Instrument the app and its Socket.IO server, and add ``/metrics``.
+
+    Must be called after every socket handler has been registered.
+    """
+    server = socketio.server
+    for handlers in server.handlers.values():
+        for event, handler in list(handlers.items()):
+            handlers[event] = timed_handler(event, handler)
+    server.packet_class = metered_packet_class(server.packet_class)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop("metrics_started", None)
+        # Socket.IO polling requests are handled by Engine.IO, not a route
+        if started is not None and request.url_rule is not None:
+            HTTP_REQUEST_SECONDS.labels(
+                request.method, request.url_rule.rule, response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
+
+    sources.gauge(
+        "lockout_socket_connections",
+        "Socket.IO clients connected to this worker",
+        lambda: connection_count(server),
+    )
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(generate_latest(REGISTRY), mimetype=CONTENT_TYPE_LATEST)
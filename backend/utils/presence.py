@@ -0,0 +1,192 @@
+# backend/utils/presence.py
+"""
+Connection registry and participant presence.
+
+Every socket that joins a lobby or game as a participant is registered as
+sid -> (lobby_id, user_id). A participant's ``presence`` field follows
+their connections:
+
+- ``connected``: at least one registered connection
+- ``away``: the last connection closed; they have a grace period to return
+- ``gone``: the grace period ran out; their card selections are dropped
+  and they are removed from the lobby
+
+Each change is broadcast as a lobby update. Socket.IO already drops closed
+connections from their rooms. The registry only sees this worker's
+connections, so deployments with several workers rely on sticky sessions
+keeping a client's connections on one worker.
+
+Connections don't survive a restart. When the memory backend restores
+lobbies from its journal, their participants are made away and get the
+usual grace period. Lobbies of a shared backend are left alone, as their
+participants may still be connected to other workers.
+"""
+import threading
+
+from ..constants import (
+    FIELD_PRESENCE,
+    GAME_CARD_SELECTION_UPDATE,
+    PRESENCE_AWAY,
+    PRESENCE_CONNECTED,
+)
+from .commands import command_queues
+from .game import bump_version
+from .lobby import broadcast_lobby_update
+from .replay import broadcast
+from .scheduler import scheduler
+from .store import state_session
+
+
+def presence_timer(user_id):
+    """Scheduler key for the end of a participant's grace period."""
+    return f"presence:{user_id}"
+
+
+class ConnectionRegistry:
+    """Maps connections to (lobby_id, user_id) and back."""
+
+    def __init__(self):
+        self._by_sid = {}  # sid -> (lobby_id, user_id)
+        self._by_user = {}  # (lobby_id, user_id) -> set of sids
+        self._lock = threading.Lock()
+
+    def add(self, sid, lobby_id, user_id):
+        """Register a connection, moving it if it was registered elsewhere."""
+        with self._lock:
+            self._remove_locked(sid)
+            self._by_sid[sid] = (lobby_id, user_id)
+            self._by_user.setdefault((lobby_id, user_id), set()).add(sid)
+
+    def remove(self, sid):
+        """
+        Unregister a connection.
+
+        Returns (lobby_id, user_id, connections the user still has), or None
+        if the connection was not registered.
+        """
+        with self._lock:
+            return self._remove_locked(sid)
+
+    def _remove_locked(self, sid):
+        entry = self._by_sid.pop(sid, None)
+        if entry is None:
+            return None
+        sids = self._by_user.get(entry)
+        sids.discard(sid)
+        if not sids:
+            del self._by_user[entry]
+        return (*entry, len(sids))
+
+    def is_connected(self, lobby_id, user_id):
+        return (lobby_id, user_id) in self._by_user
+
+    def __len__(self):
+        return len(self._by_sid)
+
+
+class Presence:
+    def __init__(self):
+        self.connections = ConnectionRegistry()
+        self.grace = 60.0
+        self._socketio = None
+
+    def init_app(self, socketio, grace):
+        """
+        socketio: server used for presence broadcasts
+        grace: seconds an away participant is kept before being removed
+        """
+        self._socketio = socketio
+        self.grace = grace
+
+    def recover(self, lobby_ids):
+        """
+        Start the grace period of every participant of lobbies restored
+        from the journal at startup; those who reconnect in time are
+        connected again.
+        """
+        for lobby_id in lobby_ids:
+            command_queues.submit(lobby_id, self._recover, lobby_id)
+
+    def _recover(self, lobby_id):
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
+            if not lobby:
+                return
+            away = [
+                participant["id"]
+                for participant in lobby["participants"]
+                if not self.connections.is_connected(lobby_id, participant["id"])
+            ]
+            changed = False
+            for user_id in away:
+                changed = self._set(lobby, user_id, PRESENCE_AWAY) or changed
+            if changed:
+                broadcast_lobby_update(self._socketio, lobby_id, lobby)
+        for user_id in away:
+            scheduler.schedule(lobby_id, presence_timer(user_id), self.grace, self._gone, lobby_id, user_id)
+
+    def _set(self, lobby, user_id, presence):
+        """Set a participant's presence and return whether it changed."""
+        participant = lobby.get_participant(user_id)
+        if participant is None or participant.get(FIELD_PRESENCE) == presence:
+            return False
+        lobby.update_participant(user_id, **{FIELD_PRESENCE: presence})
+        return True
+
+    def connected(self, sid, lobby_id, lobby, user_id):
+        """
+        Register a participant's connection and mark them connected.
+
+        Called from the participant's join handler with the loaded lobby.
+        Returns whether their presence changed; the caller broadcasts it.
+        """
+        self.connections.add(sid, lobby_id, user_id)
+        scheduler.cancel(lobby_id, presence_timer(user_id))
+        return self._set(lobby, user_id, PRESENCE_CONNECTED)
+
+    def left(self, sid):
+        """Forget a connection that left its lobby on purpose."""
+        self.connections.remove(sid)
+
+    def disconnected(self, sid):
+        """Handle a closed connection; its last one makes the user away."""
+        entry = self.connections.remove(sid)
+        if entry is None:
+            return
+        lobby_id, user_id, remaining = entry
+        if not remaining:
+            command_queues.submit(lobby_id, self._away, lobby_id, user_id)
+
+    def _away(self, lobby_id, user_id):
+        if self.connections.is_connected(lobby_id, user_id):
+            return  # Came back before this ran
+        with state_session() as state:
+            lobby = state.lobby(lobby_id)
+            if not lobby or not lobby.has_participant(user_id):
+                return
+            if self._set(lobby, user_id, PRESENCE_AWAY):
+                broadcast_lobby_update(self._socketio, lobby_id, lobby)
+        scheduler.schedule(lobby_id, presence_timer(user_id), self.grace, self._gone, lobby_id, user_id)
+
+    def _gone(self, lobby_id, user_id):
+        if self.connections.is_connected(lobby_id, user_id):
+            return
+        with state_session() as state:
+            lobby, game_state = state.load(lobby_id)
+            if not lobby or not lobby.has_participant(user_id):
+                return
+            if game_state:
+                selected = game_state.get("selected_cards", {}).pop(user_id, None)
+                if selected:
+                    bump_version(game_state)
+                    broadcast(
+                        self._socketio,
+                        lobby_id,
+                        GAME_CARD_SELECTION_UPDATE,
+                        {"selected": {}, "deselected": {user_id: selected}},
+                    )
+            lobby.remove_participant(user_id)
+            broadcast_lobby_update(self._socketio, lobby_id, lobby)
+
+
+presence = Presence()
@@ -0,0 +1,44 @@
+# backend/utils/ratelimit.py
+import time
+
+
+class TokenBucket:
+    """Allows ``rate`` actions per second with bursts of up to ``burst``."""
+
+    __slots__ = ("burst", "rate", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self, tokens=1):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+
+class RateLimiter:
+    """One token bucket per key, e.g. per Socket.IO connection."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+
+    def allow(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket.consume()
+
+    def forget(self, key):
+        self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
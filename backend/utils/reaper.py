@@ -0,0 +1,80 @@
+# backend/utils/reaper.py
+"""
+Background eviction of abandoned lobbies and their games.
+
+Write sessions record when each lobby was last active (see store.py). The
+reaper periodically removes lobbies that have been idle for longer than the
+configured TTL, then evicts the least recently active ones while there are
+more lobbies than the configured maximum.
+"""
+import logging
+import time
+
+from .dedup import command_results
+from .replay import event_log
+from .scheduler import scheduler
+from .store import KIND_LOBBY, get_lobby_store, state_session
+
+logger = logging.getLogger(__name__)
+
+
+class Reaper:
+    def __init__(self, idle_ttl, max_lobbies, interval):
+        """
+        idle_ttl: seconds without activity before a lobby is evicted
+        max_lobbies: most lobbies kept; the least recently active go first
+        interval: seconds between passes
+        """
+        self.idle_ttl = idle_ttl
+        self.max_lobbies = max_lobbies
+        self.interval = interval
+        self.stats = {"runs": 0, "evicted_idle": 0, "evicted_lru": 0}
+        self._socketio = None
+
+    def init_app(self, socketio):
+        """Start the eviction loop as a background task of the server."""
+        self._socketio = socketio
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self._socketio.sleep(self.interval)
+            try:
+                self.reap()
+            except Exception:
+                logger.exception("Lobby reaper pass failed")
+
+    def reap(self, now=None):
+        """Run one eviction pass and return the ids of evicted lobbies."""
+        now = time.time() if now is None else now
+        backend = get_lobby_store().backend
+
+        with state_session() as state:
+            # Least recently active first
+            activity = backend.activity(KIND_LOBBY)
+            idle = [key for key, ts in activity if now - ts > self.idle_ttl]
+            over = max(0, len(activity) - len(idle) - self.max_lobbies)
+            lru = [key for key, _ in activity[len(idle):len(idle) + over]]
+
+            for lobby_id in idle + lru:
+                state.delete_lobby(lobby_id)
+                state.delete_game(lobby_id)
+
+        for lobby_id in idle + lru:
+            scheduler.cancel(lobby_id)
+            event_log.discard(lobby_id)
+            command_results.discard(lobby_id)
+        # Expired replay events and command results of the lobbies that stay
+        event_log.prune()
+        command_results.prune()
+
+        self.stats["runs"] += 1
+        self.stats["evicted_idle"] += len(idle)
+        self.stats["evicted_lru"] += len(lru)
+        if idle or lru:
+            logger.info(
+                "Evicted %d idle and %d least recently used lobbies",
+                len(idle),
+                len(lru),
+            )
+        return idle + lru
@@ -0,0 +1,161 @@
+# backend/utils/replay.py
+"""
+Recent lobby broadcasts kept for replay after a reconnect.
+
+Events broadcast to a lobby (lobby updates, game patches, card selection
+frames, game start and end) are numbered per lobby and kept in a bounded
+ring buffer. They are emitted with two arguments: the payload and the
+event's position, ``{"epoch": str, "seq": int}``; handlers that only take
+the payload are unaffected.
+
+A reconnecting client sends the last position it saw and is sent the
+events it missed, or snapshots when they are no longer all in the buffer.
+Events are kept for a limited time as well as up to a count, since a
+client that was gone for long is better served by a snapshot. The buffer
+lives in this process's memory; ``epoch`` changes with every process, so
+positions from before a restart always get snapshots.
+
+With several workers, another worker may have broadcast changes this log
+never saw. The log therefore remembers the lobby version and game seq of
+the last patches it broadcast, and a replay is only trusted when they
+still match the stored lobby and game. Card selection frames are
+transient and carry no version, so they are not checked.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+
+from .serialization import RawJSON, dumps
+
+EPOCH = uuid.uuid4().hex[:12]
+
+# Versioned states whose last broadcast version the log keeps
+STATE_LOBBY = "lobby"
+STATE_GAME = "game"
+
+
+class EventLog:
+    def __init__(self, capacity=128, ttl=120):
+        """
+        capacity: events kept per lobby
+        ttl: seconds events are kept
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.stats = {"replays": 0, "replayed_events": 0, "snapshots": 0}
+        self._logs = {}  # lobby_id -> deque of (position, event, RawJSON payload, time)
+        self._seqs = {}  # lobby_id -> seq of the last recorded event
+        self._role_changes = {}  # lobby_id -> {user_id: last seq before the change}
+        self._states = {}  # lobby_id -> {state: version last broadcast}
+        self._lock = threading.Lock()
+
+    def record(self, lobby_id, event, payload, state=None):
+        """
+        Append an event for a lobby and return its position.
+
+        state: (STATE_LOBBY or STATE_GAME, version) when the event is a patch
+        that brings that state to version
+        """
+        with self._lock:
+            if state is not None:
+                name, version = state
+                self._states.setdefault(lobby_id, {})[name] = version
+            seq = self._seqs.get(lobby_id, 0) + 1
+            self._seqs[lobby_id] = seq
+            log = self._logs.get(lobby_id)
+            if log is None:
+                log = self._logs[lobby_id] = deque(maxlen=self.capacity)
+            position = {"epoch": EPOCH, "seq": seq}
+            log.append((position, event, payload, time.monotonic()))
+        return position
+
+    def mark_role_change(self, lobby_id, user_id):
+        """Note that a player's role view changed after the latest event."""
+        with self._lock:
+            self._role_changes.setdefault(lobby_id, {})[user_id] = self._seqs.get(lobby_id, 0)
+
+    def role_changed_since(self, lobby_id, user_id, position):
+        """Whether the player's role changed after the event at position."""
+        changed = self._role_changes.get(lobby_id, {}).get(user_id)
+        return changed is not None and changed >= position["seq"]
+
+    def position(self, lobby_id):
+        """Position of the last event recorded for a lobby."""
+        return {"epoch": EPOCH, "seq": self._seqs.get(lobby_id, 0)}
+
+    def since(self, lobby_id, position, states=None):
+        """
+        Return [(position, event, payload)] recorded after position, or None
+        if some of them are no longer kept (or position is not from here).
+
+        states: {STATE_LOBBY: version, STATE_GAME: seq} as stored; None is
+        returned as well when they moved on without this log seeing it.
+        """
+        self.prune(lobby_id)
+        if not isinstance(position, dict) or position.get("epoch") != EPOCH:
+            self._miss()
+            return None
+        seq = position.get("seq")
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            self._miss()
+            return None
+        with self._lock:
+            last = self._seqs.get(lobby_id, 0)
+            log = self._logs.get(lobby_id) or ()
+            if seq > last or (seq < last and (not log or log[0][0]["seq"] > seq + 1)):
+                self._miss()
+                return None
+            recorded = self._states.get(lobby_id, {})
+            if any(recorded.get(name, 0) != version for name, version in (states or {}).items()):
+                # Broadcast elsewhere, such as by another worker
+                self._miss()
+                return None
+            events = [entry[:3] for entry in log if entry[0]["seq"] > seq]
+        self.stats["replays"] += 1
+        self.stats["replayed_events"] += len(events)
+        return events
+
+    def _miss(self):
+        self.stats["snapshots"] += 1
+
+    def prune(self, lobby_id=None):
+        """Drop expired events of one lobby, or of every lobby."""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            lobby_ids = list(self._logs) if lobby_id is None else [lobby_id]
+            for key in lobby_ids:
+                log = self._logs.get(key)
+                while log and log[0][3] < cutoff:
+                    log.popleft()
+                if log is not None and not log:
+                    # Seqs carry on, so older positions still count as a gap
+                    del self._logs[key]
+
+    def discard(self, lobby_id):
+        with self._lock:
+            self._logs.pop(lobby_id, None)
+            self._seqs.pop(lobby_id, None)
+            self._role_changes.pop(lobby_id, None)
+            self._states.pop(lobby_id, None)
+
+    def __len__(self):
+        return len(self._logs)
+
+
+event_log = EventLog()
+
+
+def broadcast(socketio, lobby_id, event, payload, rooms=None, state=None):
+    """
+    Emit an event to a lobby's room (or the given rooms) and log it.
+
+    The payload is encoded once, however many rooms it goes to. state is
+    passed on to EventLog.record.
+    """
+    if not isinstance(payload, RawJSON):
+        payload = RawJSON(dumps(payload))
+    position = event_log.record(lobby_id, event, payload, state)
+    for room in rooms or (lobby_id,):
+        socketio.emit(event, (payload, position), to=room)
+    return position
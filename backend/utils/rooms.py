@@ -0,0 +1,67 @@
+# backend/utils/rooms.py
+"""
+Socket.IO room names used for lobby and game broadcasts.
+
+- ``{lobby_id}``: everyone in the lobby
+- ``{lobby_id}_{user_id}``: every connection of one player in a game
+- ``{lobby_id}:{role}``: every game connection that gets a given role view
+- ``{lobby_id}:spectators``: every spectator of a game, whatever their number
+"""
+from ..constants import ROLE_LEADS, ROLE_MEMBERS, ROLE_SPECTATORS
+from .replay import event_log
+
+GAME_ROLES = (ROLE_LEADS, ROLE_MEMBERS)
+# Every role room that receives game patches
+STREAM_ROLES = (*GAME_ROLES, ROLE_SPECTATORS)
+
+
+def player_room(lobby_id, user_id):
+    return f"{lobby_id}_{user_id}"
+
+
+def role_room(lobby_id, role):
+    return f"{lobby_id}:{role}"
+
+
+def join_role_room(server, sid, lobby_id, role, namespace="/"):
+    """Put a connection in the room for its role, leaving the other ones."""
+    for other in GAME_ROLES:
+        if other != role:
+            server.leave_room(sid, role_room(lobby_id, other), namespace=namespace)
+    server.enter_room(sid, role_room(lobby_id, role), namespace=namespace)
+
+
+def leave_game_rooms(server, sid, lobby_id, user_id=None, namespace="/"):
+    if user_id is not None:
+        server.leave_room(sid, player_room(lobby_id, user_id), namespace=namespace)
+    for role in STREAM_ROLES:
+        server.leave_room(sid, role_room(lobby_id, role), namespace=namespace)
+
+
+def room_size(server, room, namespace="/"):
+    """Number of this worker's connections in a room."""
+    return len(server.manager.rooms.get(namespace, {}).get(room, {}))
+
+
+def spectator_count(server, namespace="/"):
+    """Number of spectators connected to this worker across all games."""
+    suffix = f":{ROLE_SPECTATORS}"
+    rooms = server.manager.rooms.get(namespace, {})
+    return sum(len(sids) for room, sids in rooms.items() if room and room.endswith(suffix))
+
+
+def move_player_to_role(server, lobby_id, user_id, role, namespace="/"):
+    """
+    Move every game connection of a player to the room for a new role.
+
+    Called when a player is promoted, demoted or changes team so they stop
+    receiving the view for their old role. Only connections held by this
+    worker can be enumerated; players on other workers pick up the new
+    role the next time they join the game. The change is noted in the event
+    log so a player who resumes after it gets a snapshot of the new view.
+    """
+    event_log.mark_role_change(lobby_id, user_id)
+    room = player_room(lobby_id, user_id)
+    sids = [sid for sid, _ in server.manager.get_participants(namespace, room)]
+    for sid in sids:
+        join_role_room(server, sid, lobby_id, role, namespace=namespace)
@@ -0,0 +1,149 @@
+# backend/utils/scheduler.py
+"""
+Delayed game transitions driven by a single background task.
+
+Handlers schedule a callback for a lobby instead of sleeping, so waiting
+costs nothing. Timers are keyed by (lobby_id, key): scheduling the same key
+again replaces the pending timer, and timers can be cancelled per key or per
+lobby (for example when a turn is ended manually or the game ends).
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    __slots__ = ("args", "callback", "cancelled", "due", "key", "lobby_id", "order")
+
+    def __init__(self, due, order, lobby_id, key, callback, args):
+        self.due = due
+        self.order = order
+        self.lobby_id = lobby_id
+        self.key = key
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.due, self.order) < (other.due, other.order)
+
+
+class Scheduler:
+    """Heap of timers processed by one background task."""
+
+    def __init__(self):
+        self._heap = []
+        self._timers = {}  # (lobby_id, key) -> Timer
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._socketio = None
+        self._dispatch = None
+        self._wakeup = None
+        self._running = False
+
+    def init_app(self, socketio, dispatch=None):
+        """
+        Bind the scheduler to the Socket.IO server that runs its task.
+
+        dispatch(lobby_id, callback, *args) hands due callbacks elsewhere to
+        run, such as the lobby's command queue; by default they run on the
+        scheduler task.
+        """
+        self._socketio = socketio
+        self._dispatch = dispatch
+
+    def _ensure_running(self):
+        if self._running:
+            return
+        if self._socketio is None:
+            raise RuntimeError("Scheduler is not bound to a SocketIO server")
+        self._wakeup = self._socketio.server.eio.create_event()
+        self._running = True
+        self._socketio.start_background_task(self._run)
+
+    def schedule(self, lobby_id, key, delay, callback, *args, replace=True):
+        """
+        Run callback(*args) after delay seconds.
+
+        Replaces any pending timer with the same lobby_id and key, or keeps
+        it and returns it when replace is False.
+        """
+        with self._lock:
+            self._ensure_running()
+            if not replace and (lobby_id, key) in self._timers:
+                return self._timers[(lobby_id, key)]
+            self._cancel_locked(lobby_id, key)
+            timer = Timer(
+                time.monotonic() + delay,
+                next(self._order),
+                lobby_id,
+                key,
+                callback,
+                args,
+            )
+            self._timers[(lobby_id, key)] = timer
+            is_next = not self._heap or timer < self._heap[0]
+            heapq.heappush(self._heap, timer)
+        if is_next:
+            self._wakeup.set()
+        return timer
+
+    def _cancel_locked(self, lobby_id, key):
+        timer = self._timers.pop((lobby_id, key), None)
+        if timer is None:
+            return 0
+        timer.cancelled = True
+        return 1
+
+    def cancel(self, lobby_id, key=None):
+        """Cancel one timer, or every timer of a lobby when key is None."""
+        with self._lock:
+            if key is not None:
+                return self._cancel_locked(lobby_id, key)
+            keys = [k for (lid, k) in self._timers if lid == lobby_id]
+            return sum(self._cancel_locked(lobby_id, k) for k in keys)
+
+    def pending(self, lobby_id=None):
+        """Number of timers waiting to fire, overall or for one lobby."""
+        with self._lock:
+            if lobby_id is None:
+                return len(self._timers)
+            return sum(1 for (lid, _) in self._timers if lid == lobby_id)
+
+    def _pop_due(self, now):
+        """Return due timers and the delay until the next one (or None)."""
+        due = []
+        with self._lock:
+            while self._heap and (self._heap[0].cancelled or self._heap[0].due <= now):
+                timer = heapq.heappop(self._heap)
+                if timer.cancelled:
+                    continue
+                del self._timers[(timer.lobby_id, timer.key)]
+                due.append(timer)
+            delay = self._heap[0].due - now if self._heap else None
+        return due, delay
+
+    def _run(self):
+        while True:
+            due, delay = self._pop_due(time.monotonic())
+            for timer in due:
+                try:
+                    if self._dispatch is not None:
+                        self._dispatch(timer.lobby_id, timer.callback, *timer.args)
+                    else:
+                        timer.callback(*timer.args)
+                except Exception:
+                    logger.exception(
+                        "Timer %s for lobby %s failed", timer.key, timer.lobby_id
+                    )
+            if due:
+                continue
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,59 @@
+# backend/utils/selection.py
+"""
+Coalesced card selection broadcasts.
+
+Selection clicks are merged per lobby over a short window and sent as one
+diff frame, so selection traffic grows with the number of windows instead
+of the number of clicks. A frame looks like::
+
+    {"selected": {user_id: [card_id, ...]}, "deselected": {user_id: [...]}}
+
+Only the final state of each (user, card) pair within a window is sent.
+"""
+import threading
+
+from .scheduler import scheduler
+
+# Scheduler key for the pending selection flush of a lobby
+TIMER_SELECTION_FLUSH = "selection_flush"
+
+
+class SelectionCoalescer:
+    def __init__(self, window, send):
+        """
+        window: seconds selection changes are buffered per lobby
+        send: callable(lobby_id, frame) that broadcasts a diff frame
+        """
+        self.window = window
+        self.send = send
+        self._pending = {}  # lobby_id -> {(user_id, card_id): is_selected}
+        self._lock = threading.Lock()
+
+    def add(self, lobby_id, user_id, card_id, is_selected):
+        """Buffer a selection change, opening a window for the lobby if needed."""
+        with self._lock:
+            self._pending.setdefault(lobby_id, {})[(user_id, card_id)] = is_selected
+        scheduler.schedule(
+            lobby_id,
+            TIMER_SELECTION_FLUSH,
+            self.window,
+            self.flush,
+            lobby_id,
+            replace=False,
+        )
+
+    def flush(self, lobby_id):
+        """Send the buffered changes of a lobby as one frame."""
+        with self._lock:
+            changes = self._pending.pop(lobby_id, None)
+        if not changes:
+            return
+        frame = {"selected": {}, "deselected": {}}
+        for (user_id, card_id), is_selected in changes.items():
+            key = "selected" if is_selected else "deselected"
+            frame[key].setdefault(user_id, []).append(card_id)
+        self.send(lobby_id, frame)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
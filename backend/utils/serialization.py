@@ -0,0 +1,173 @@
+# backend/utils/serialization.py
+"""
+JSON encoding for REST responses and Socket.IO packets, and a cache of
+encoded lobby and game views.
+
+orjson is used when it is installed (and not turned off with
+``JSON_LIBRARY=json``); otherwise the standard library encodes the same
+JSON. Lobby and game views are encoded once per state version and role and
+reused until the state changes. A cached view is passed around as
+``RawJSON``: REST routes return its text as the body, and the Socket.IO
+codec splices it into the packet without encoding it again.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library is used instead
+    orjson = None
+
+_use_orjson = orjson is not None
+
+
+def configure(library):
+    """Select the JSON library: "orjson" (when installed) or "json"."""
+    global _use_orjson
+    _use_orjson = library == "orjson" and orjson is not None
+
+
+def library():
+    return "orjson" if _use_orjson else "json"
+
+
+def dumps(obj, default=None, sort_keys=False, indent=None):
+    """Encode obj as compact JSON text."""
+    if _use_orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option).decode()
+    return json.dumps(
+        obj,
+        default=default,
+        sort_keys=sort_keys,
+        indent=indent,
+        separators=None if indent else (",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def loads(s):
+    if _use_orjson:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class RawJSON:
+    """Already encoded JSON text, sent as is."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __len__(self):
+        return len(self.text)
+
+
+class SocketIOJSON:
+    """
+    The ``json`` module python-socketio encodes packets with.
+
+    A packet's data is the list ``[event, *args]``; arguments that are
+    RawJSON are joined into it as they are.
+    """
+
+    @staticmethod
+    def dumps(obj, **_kwargs):
+        if isinstance(obj, list) and any(isinstance(item, RawJSON) for item in obj):
+            return "[" + ",".join(
+                item.text if isinstance(item, RawJSON) else dumps(item) for item in obj
+            ) + "]"
+        return dumps(obj)
+
+    @staticmethod
+    def loads(s, **_kwargs):
+        return loads(s)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps() and loads() above."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys, indent=kwargs.get("indent"))
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+
+def raw_response(raw, status=200):
+    """A JSON response whose body is an already encoded view."""
+    return Response(raw.text, status=status, mimetype="application/json")
+
+
+def conditional_response(etag, encode):
+    """
+    Respond 304 when the request's If-None-Match already has etag, and with
+    the RawJSON returned by encode() otherwise.
+
+    encode is only called for a full response, so a client that is up to
+    date costs no sanitization or encoding.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = raw_response(encode())
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every request
+    response.cache_control.no_cache = True
+    return response
+
+
+class ViewCache:
+    """
+    Encoded views keyed by (kind, id, role), each tagged with the state
+    version it was encoded from.
+
+    Only the latest version of a view is kept; the least recently used
+    views are dropped once max_entries is reached.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()  # key -> (version, RawJSON)
+        self._lock = threading.Lock()
+
+    def get(self, key, version, build):
+        """Return the encoded view for key at version, calling build() on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+
+        raw = RawJSON(dumps(build()))
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = (version, raw)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return raw
+
+    def __len__(self):
+        return len(self._entries)
+
+
+view_cache = ViewCache()
+
+
+def init_app(app, config):
+    """Use the configured JSON library for Flask responses and request bodies."""
+    configure(getattr(config, "JSON_LIBRARY", "orjson"))
+    view_cache.max_entries = getattr(config, "VIEW_CACHE_SIZE", view_cache.max_entries)
+    app.json = FastJSONProvider(app)
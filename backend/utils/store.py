@@ -0,0 +1,573 @@
+# backend/utils/store.py
+"""
+Pluggable state stores for lobbies and games.
+
+Two backends are available:
+
+- ``memory``: live objects kept in dictionaries inside the worker process.
+  This is the default and only works with a single Gunicorn worker.
+- ``sqlite``: JSON documents kept in a WAL-mode SQLite file, so every worker
+  on a host sees the same lobbies and games.
+
+Handlers should go through ``state_session()``, which reads a lobby and its
+game in one query and writes every changed document back in one transaction.
+Write sessions also record when each lobby they used was last active, which
+the reaper uses to evict abandoned lobbies. Emits and room changes made
+during a write session are held back until it commits (see ``init_app``),
+so the transaction only spans loading, changing and storing the state.
+
+With ``JOURNAL_DIR`` set, the memory backend journals every document write
+(see journal.py) and rebuilds its state from the journal on startup.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .board import Board
+from .journal import Journal
+from .lobby import Lobby
+from .serialization import dumps, loads
+
+# Document kinds stored by the backends
+KIND_LOBBY = "lobby"
+KIND_GAME = "game"
+
+STATE_BACKEND_MEMORY = "memory"
+STATE_BACKEND_SQLITE = "sqlite"
+
+# Socket.IO server methods held back until the write session commits
+DEFERRED_SERVER_METHODS = ("emit", "enter_room", "leave_room", "close_room")
+
+# Calls waiting for the current task's outermost write session to commit
+_local = threading.local()
+
+
+class MemoryBackend:
+    """Keeps live objects in per-kind dictionaries."""
+
+    # Objects are handed out by reference, so nothing needs encoding
+    serializes = False
+    # Optional Journal that makes the state survive restarts
+    journal = None
+
+    def __init__(self):
+        self._data = {KIND_LOBBY: {}, KIND_GAME: {}}
+        self._activity = {KIND_LOBBY: {}, KIND_GAME: {}}
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    def fetch(self, keys):
+        """Return {(kind, key): document} for the keys that exist."""
+        found = {}
+        for kind, key in keys:
+            document = self._data[kind].get(key)
+            if document is not None:
+                found[(kind, key)] = document
+        return found
+
+    def write(self, documents, deletes=()):
+        """Store {(kind, key): document} and remove the given keys."""
+        for (kind, key), document in documents.items():
+            self._data[kind][key] = document
+        for kind, key in deletes:
+            self._data[kind].pop(key, None)
+            self._activity[kind].pop(key, None)
+
+    def touch(self, keys, when):
+        """Record the last activity time of existing documents."""
+        for kind, key in keys:
+            if key in self._data[kind]:
+                self._activity[kind][key] = when
+
+    def activity(self, kind):
+        """Return [(key, last_activity)] for a kind, least recent first."""
+        return sorted(self._activity[kind].items(), key=lambda item: item[1])
+
+    def keys(self, kind):
+        return list(self._data[kind])
+
+    def count(self, kind):
+        return len(self._data[kind])
+
+
+class SqliteBackend:
+    """Keeps JSON documents in a SQLite database shared by all workers."""
+
+    serializes = True
+    # The database file is already durable
+    journal = None
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._conn = None
+        self._pid = None
+        self._connection()
+
+    def _connection(self):
+        # Gunicorn forks workers, so every process opens its own connection
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (kind, key)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS activity ("
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " ts REAL NOT NULL,"
+                " PRIMARY KEY (kind, key)"
+                ") WITHOUT ROWID"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the database write lock for the duration of the block.
+
+        BEGIN IMMEDIATE makes read-modify-write cycles atomic across workers.
+        Nested transactions on the same thread join the outer one.
+        """
+        with self._lock:
+            depth = getattr(self._local, "depth", 0)
+            conn = self._connection()
+            if depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+            self._local.depth = depth + 1
+            try:
+                yield
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    conn.execute("ROLLBACK")
+                raise
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("COMMIT")
+
+    def fetch(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        clause = " OR ".join(["(kind = ? AND key = ?)"] * len(keys))
+        params = [part for pair in keys for part in pair]
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT kind, key, data FROM state WHERE {clause}", params
+            ).fetchall()
+        return {(kind, key): data for kind, key, data in rows}
+
+    def write(self, documents, deletes=()):
+        with self.transaction():
+            conn = self._connection()
+            if documents:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO state (kind, key, data) VALUES (?, ?, ?)",
+                    [(kind, key, data) for (kind, key), data in documents.items()],
+                )
+            if deletes:
+                deletes = list(deletes)
+                conn.executemany(
+                    "DELETE FROM state WHERE kind = ? AND key = ?", deletes
+                )
+                conn.executemany(
+                    "DELETE FROM activity WHERE kind = ? AND key = ?", deletes
+                )
+
+    def touch(self, keys, when):
+        keys = list(keys)
+        if not keys:
+            return
+        with self.transaction():
+            self._connection().executemany(
+                "INSERT OR REPLACE INTO activity (kind, key, ts)"
+                " SELECT kind, key, ? FROM state WHERE kind = ? AND key = ?",
+                [(when, kind, key) for kind, key in keys],
+            )
+
+    def activity(self, kind):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, ts FROM activity WHERE kind = ? ORDER BY ts", (kind,)
+            ).fetchall()
+        return rows
+
+    def keys(self, kind):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key FROM state WHERE kind = ?", (kind,)
+            ).fetchall()
+        return [key for (key,) in rows]
+
+    def count(self, kind):
+        with self._lock:
+            (total,) = self._connection().execute(
+                "SELECT COUNT(*) FROM state WHERE kind = ?", (kind,)
+            ).fetchone()
+        return total
+
+
+class DocumentStore:
+    """Typed access to one kind of document in a backend."""
+
+    kind = None
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def encode(self, document):
+        return dumps(document)
+
+    def decode(self, data):
+        return loads(data)
+
+    def _load(self, data):
+        return self.decode(data) if self.backend.serializes else data
+
+    def _dump(self, document):
+        return self.encode(document) if self.backend.serializes else document
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Load several documents with a single backend read."""
+        found = self.backend.fetch((self.kind, key) for key in keys)
+        return {key: self._load(data) for (_, key), data in found.items()}
+
+    def put(self, key, document):
+        self.put_many({key: document})
+
+    def put_many(self, documents):
+        """Store several documents with a single backend write."""
+        self.backend.write(
+            {(self.kind, key): self._dump(doc) for key, doc in documents.items()}
+        )
+        if self.backend.journal:
+            for key, doc in documents.items():
+                self.backend.journal.record(self.kind, key, self.encode(doc))
+
+    def delete(self, key):
+        self.backend.write({}, deletes=[(self.kind, key)])
+        if self.backend.journal:
+            self.backend.journal.record(self.kind, key, None)
+
+    def ids(self):
+        return self.backend.keys(self.kind)
+
+    def __contains__(self, key):
+        return bool(self.backend.fetch([(self.kind, key)]))
+
+    def __len__(self):
+        return self.backend.count(self.kind)
+
+
+class LobbyStore(DocumentStore):
+    """Lobby documents keyed by lobby_id."""
+
+    kind = KIND_LOBBY
+
+    def decode(self, data):
+        # Rebuild the participant indexes on load
+        return Lobby(loads(data))
+
+
+class GameStore(DocumentStore):
+    """Game state documents keyed by lobby_id."""
+
+    kind = KIND_GAME
+
+    def encode(self, document):
+        # The board is kept as a Board object and stored in its compact form
+        return super().encode({**document, "board": document["board"].to_dict()})
+
+    def decode(self, data):
+        document = loads(data)
+        document["board"] = Board.from_dict(document["board"])
+        return document
+
+
+class StateSession:
+    """
+    Unit of work over the lobby and game stores.
+
+    Documents loaded through the session are cached, and ``flush`` writes back
+    only those that were added or whose encoding changed, in one write. Every
+    lobby the session used is marked as active at the same time.
+    """
+
+    def __init__(self, lobby_store, game_store):
+        self.lobbies = lobby_store
+        self.games = game_store
+        self.backend = lobby_store.backend
+        self._stores = {KIND_LOBBY: lobby_store, KIND_GAME: game_store}
+        self._loaded = {}  # (kind, key) -> document or None
+        self._originals = {}  # (kind, key) -> encoded document as loaded
+        self._versions = {}  # (kind, key) -> version of a live document as loaded
+        self._added = set()
+        self._deleted = set()
+
+    def _fetch(self, keys):
+        missing = [k for k in keys if k not in self._loaded]
+        if missing:
+            found = self.backend.fetch(missing)
+            for kind, key in missing:
+                data = found.get((kind, key))
+                if data is None:
+                    self._loaded[(kind, key)] = None
+                    continue
+                self._loaded[(kind, key)] = self._stores[kind]._load(data)
+                if self.backend.serializes:
+                    self._originals[(kind, key)] = data
+                else:
+                    self._versions[(kind, key)] = self._loaded[(kind, key)].get("version", 0)
+        return [self._loaded[k] for k in keys]
+
+    def load(self, lobby_id):
+        """Return (lobby, game) for a lobby, fetched in a single read."""
+        lobby, game = self._fetch([(KIND_LOBBY, lobby_id), (KIND_GAME, lobby_id)])
+        return lobby, game
+
+    def lobby(self, lobby_id):
+        return self._fetch([(KIND_LOBBY, lobby_id)])[0]
+
+    def game(self, lobby_id):
+        return self._fetch([(KIND_GAME, lobby_id)])[0]
+
+    def _add(self, kind, key, document):
+        self._loaded[(kind, key)] = document
+        self._added.add((kind, key))
+        self._deleted.discard((kind, key))
+        return document
+
+    def add_lobby(self, lobby_id, lobby):
+        return self._add(KIND_LOBBY, lobby_id, lobby)
+
+    def add_game(self, lobby_id, game):
+        return self._add(KIND_GAME, lobby_id, game)
+
+    def _delete(self, kind, key):
+        self._loaded[(kind, key)] = None
+        self._added.discard((kind, key))
+        self._deleted.add((kind, key))
+
+    def delete_lobby(self, lobby_id):
+        self._delete(KIND_LOBBY, lobby_id)
+
+    def delete_game(self, lobby_id):
+        self._delete(KIND_GAME, lobby_id)
+
+    def flush(self):
+        """Write added and changed documents back in one backend write."""
+        documents = {}
+        journal = self.backend.journal
+        for (kind, key), document in self._loaded.items():
+            if document is None:
+                continue
+            if not self.backend.serializes:
+                if (kind, key) in self._added:
+                    documents[(kind, key)] = document
+                version = document.get("version", 0)
+                if journal and (
+                    (kind, key) in self._added or version != self._versions.get((kind, key))
+                ):
+                    # Live objects change in place, so the version (bumped on
+                    # every change, as cached views rely on) tells which
+                    # documents need journaling
+                    journal.record(kind, key, self._stores[kind].encode(document))
+                self._versions[(kind, key)] = version
+                continue
+            encoded = self._stores[kind].encode(document)
+            if (kind, key) in self._added or encoded != self._originals.get((kind, key)):
+                documents[(kind, key)] = encoded
+                self._originals[(kind, key)] = encoded
+        if documents or self._deleted:
+            self.backend.write(documents, deletes=self._deleted)
+        if journal:
+            for kind, key in self._deleted:
+                journal.record(kind, key, None)
+        self.backend.touch(
+            [
+                (kind, key)
+                for (kind, key), document in self._loaded.items()
+                if kind == KIND_LOBBY and document is not None
+            ],
+            time.time(),
+        )
+        self._added.clear()
+        self._deleted = set()
+
+
+_lobby_store = None
+_game_store = None
+_recovered_lobbies = []
+
+
+def create_backend(config):
+    """Build the state backend selected by the STATE_BACKEND setting."""
+    kind = getattr(config, "STATE_BACKEND", STATE_BACKEND_MEMORY)
+    if kind == STATE_BACKEND_MEMORY:
+        return MemoryBackend()
+    if kind == STATE_BACKEND_SQLITE:
+        return SqliteBackend(config.STATE_DB_PATH)
+    raise ValueError(f"Unknown STATE_BACKEND: {kind}")
+
+
+def configure_stores(config):
+    """Create the process-wide lobby and game stores from configuration."""
+    global _lobby_store, _game_store, _recovered_lobbies
+    backend = create_backend(config)
+    _recovered_lobbies = []
+    _lobby_store = LobbyStore(backend)
+    _game_store = GameStore(backend)
+
+    journal_dir = getattr(config, "JOURNAL_DIR", None)
+    if journal_dir and isinstance(backend, MemoryBackend):
+        backend.journal = Journal(
+            journal_dir,
+            fsync=getattr(config, "JOURNAL_FSYNC", False),
+            flush_interval=getattr(config, "JOURNAL_FLUSH_INTERVAL_MS", 50) / 1000,
+            snapshot_interval=getattr(config, "JOURNAL_SNAPSHOT_SECONDS", 300),
+        )
+        _recovered_lobbies = recover_state(backend)
+
+
+def recover_state(backend):
+    """
+    Load the journaled state into a memory backend and snapshot it.
+
+    Returns the ids of the lobbies that were restored.
+    """
+    stores = {KIND_LOBBY: _lobby_store, KIND_GAME: _game_store}
+    recovered = backend.journal.recover()
+    backend.write(
+        {
+            (kind, key): stores[kind].decode(data)
+            for (kind, key), data in recovered.items()
+        }
+    )
+    lobby_ids = [key for kind, key in recovered if kind == KIND_LOBBY]
+    # Recovered lobbies count as active from now on
+    backend.touch([(KIND_LOBBY, key) for key in lobby_ids], time.time())
+    # Start from a clean snapshot so older journal files can be dropped
+    backend.journal.snapshot(snapshot_documents)
+    return lobby_ids
+
+
+def recovered_lobbies():
+    """
+    Ids of the lobbies this process restored from its journal at startup.
+
+    Always empty for a shared backend: its lobbies may have participants
+    connected to other workers.
+    """
+    return list(_recovered_lobbies)
+
+
+def snapshot_documents():
+    """Return [(kind, key, encoded)] for every document in the memory backend."""
+    backend = get_lobby_store().backend
+    stores = {KIND_LOBBY: _lobby_store, KIND_GAME: _game_store}
+    return [
+        (kind, key, stores[kind].encode(document))
+        for kind, documents in backend._data.items()
+        for key, document in documents.items()
+    ]
+
+
+def get_journal():
+    """Return the journal of the memory backend, or None."""
+    return get_lobby_store().backend.journal
+
+
+def get_lobby_store():
+    if _lobby_store is None:
+        configure_stores(object())
+    return _lobby_store
+
+
+def get_game_store():
+    if _game_store is None:
+        configure_stores(object())
+    return _game_store
+
+
+def after_commit(fn, *args, **kwargs):
+    """
+    Call fn(*args, **kwargs) once the current write session commits, or
+    straight away outside one. Calls are dropped if the session fails.
+    """
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        fn(*args, **kwargs)
+    else:
+        pending.append((fn, args, kwargs))
+
+
+def init_app(socketio):
+    """
+    Hold back the server's emits and room changes made during a write
+    session until it commits, keeping their order.
+
+    Sending is then not part of the transaction, so the SQLite write lock
+    isn't held while events are encoded and fanned out.
+    """
+    server = socketio.server
+    for name in DEFERRED_SERVER_METHODS:
+        method = getattr(server, name)
+
+        def deferred(*args, _method=method, **kwargs):
+            after_commit(_method, *args, **kwargs)
+
+        setattr(server, name, deferred)
+
+
+@contextmanager
+def state_session(readonly=False):
+    """
+    Open a unit of work over the configured stores.
+
+    The whole block runs inside one backend transaction, so a handler's reads
+    and writes are atomic with respect to other workers. Read-only sessions
+    skip the transaction and never write. Nested write sessions join the
+    outer one.
+    """
+    lobby_store = get_lobby_store()
+    session = StateSession(lobby_store, get_game_store())
+    if readonly:
+        yield session
+        return
+    outer = getattr(_local, "pending", None) is None
+    if outer:
+        _local.pending = []
+    try:
+        with lobby_store.backend.transaction():
+            yield session
+            session.flush()
+        pending = _local.pending if outer else ()
+    finally:
+        if outer:
+            _local.pending = None
+    for fn, args, kwargs in pending:
+        fn(*args, **kwargs)
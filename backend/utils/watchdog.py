@@ -0,0 +1,192 @@
+# backend/utils/watchdog.py
+"""
+Event-loop lag and slow-handler detection.
+
+A heartbeat task sleeps on the eventlet hub at a fixed interval; how late it
+wakes up is the hub's scheduling lag. Socket and REST handlers are tracked
+while they run. A native OS thread, which keeps running when a handler
+blocks the hub, checks both against the budget:
+
+- a handler running for longer than the budget gets a stack sample,
+  logged once it finishes
+- a heartbeat overdue by more than the budget means the hub is blocked;
+  the stack of whatever is running is logged straight away
+
+Findings are logged and exported as Prometheus metrics.
+"""
+import logging
+import sys
+import time
+import traceback
+
+import greenlet
+from eventlet import patcher
+from flask import g, request
+from prometheus_client import Counter, Histogram
+
+from .metrics import LATENCY_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# The watchdog must run on a real thread even when eventlet monkey patches
+native_threading = patcher.original("threading")
+native_time = patcher.original("time")
+native_thread = patcher.original("_thread")
+
+LOOP_LAG_SECONDS = Histogram(
+    "lockout_event_loop_lag_seconds",
+    "How late the hub heartbeat woke up",
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+LOOP_STALLS = Counter(
+    "lockout_event_loop_stalls",
+    "Times the hub was blocked for longer than the handler budget",
+    registry=REGISTRY,
+)
+SLOW_HANDLERS = Counter(
+    "lockout_slow_handlers",
+    "Handlers that ran for longer than the budget",
+    ["handler"],
+    registry=REGISTRY,
+)
+
+
+class Running:
+    """A handler in progress."""
+
+    __slots__ = ("greenlet", "name", "stack", "started", "thread_id")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.greenlet = greenlet.getcurrent()
+        self.thread_id = native_thread.get_ident()
+        self.stack = None
+
+
+class Watchdog:
+    def __init__(self, budget, interval, stack_depth=20):
+        """
+        budget: seconds a handler may run, or the hub may stay blocked
+        interval: seconds between hub heartbeats
+        stack_depth: frames kept in stack samples
+        """
+        self.budget = budget
+        self.interval = interval
+        self.stack_depth = stack_depth
+        self._running = {}  # id(Running) -> Running
+        self._beat = time.monotonic()
+        self._hub_thread_id = None
+        self._stalled = False
+        self._socketio = None
+
+    def _stack(self, entry, frames=None):
+        # A suspended greenlet keeps its frame; the running one is the
+        # current frame of its OS thread
+        frame = entry.greenlet.gr_frame if entry.greenlet else None
+        if frame is None:
+            frames = frames if frames is not None else sys._current_frames()
+            frame = frames.get(entry.thread_id)
+        if frame is None:
+            return None
+        return "".join(traceback.format_stack(frame, limit=self.stack_depth))
+
+    def start(self, name):
+        entry = Running(name)
+        self._running[id(entry)] = entry
+        return entry
+
+    def finish(self, entry):
+        self._running.pop(id(entry), None)
+        elapsed = time.monotonic() - entry.started
+        if elapsed <= self.budget:
+            return
+        SLOW_HANDLERS.labels(entry.name).inc()
+        logger.warning(
+            "Slow handler %s took %.1f ms (budget %.0f ms)%s",
+            entry.name,
+            elapsed * 1000,
+            self.budget * 1000,
+            f"\nSampled stack:\n{entry.stack}" if entry.stack else "",
+        )
+
+    def wrap(self, name, handler):
+        def wrapper(*args):
+            entry = self.start(name)
+            try:
+                return handler(*args)
+            finally:
+                self.finish(entry)
+
+        return wrapper
+
+    def _heartbeat(self):
+        self._hub_thread_id = native_thread.get_ident()
+        while True:
+            started = time.monotonic()
+            self._socketio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG_SECONDS.observe(max(0.0, now - started - self.interval))
+            self._beat = now
+
+    def _check(self):
+        now = time.monotonic()
+        frames = None
+
+        for entry in list(self._running.values()):
+            if entry.stack is None and now - entry.started > self.budget:
+                frames = frames if frames is not None else sys._current_frames()
+                entry.stack = self._stack(entry, frames) or ""
+
+        if self._hub_thread_id is None:
+            return  # Heartbeat not started yet
+        blocked = now - self._beat - self.interval
+        if blocked > self.budget and not self._stalled:
+            self._stalled = True
+            LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._hub_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_depth)) if frame else ""
+            running = ", ".join(sorted({e.name for e in self._running.values()})) or "none"
+            logger.warning(
+                "Event loop blocked for %.1f ms (running handlers: %s)\nStack:\n%s",
+                blocked * 1000,
+                running,
+                stack,
+            )
+        elif blocked <= self.budget:
+            self._stalled = False
+
+    def _watch(self):
+        while True:
+            native_time.sleep(self.interval)
+            try:
+                self._check()
+            except Exception:
+                logger.exception("Watchdog check failed")
+
+    def init_app(self, app, socketio):
+        """
+        Track every socket and REST handler and start monitoring.
+
+        Must be called after every socket handler has been registered.
+        """
+        self._socketio = socketio
+        for handlers in socketio.server.handlers.values():
+            for event, handler in list(handlers.items()):
+                handlers[event] = self.wrap(event, handler)
+
+        @app.before_request
+        def start_watchdog_entry():
+            # Label by route rule so the metric keeps a bounded set of names
+            rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            g.watchdog_entry = self.start(f"{request.method} {rule}")
+
+        @app.teardown_request
+        def finish_watchdog_entry(_exc):
+            entry = g.pop("watchdog_entry", None)
+            if entry is not None:
+                self.finish(entry)
+
+        socketio.start_background_task(self._heartbeat)
+        native_threading.Thread(target=self._watch, name="watchdog", daemon=True).start()
@@ -0,0 +1,114 @@
+# backend/utils/words.py
+"""
+Word packs for game boards.
+
+Each pack is a text file named after its theme, such as ``security.txt``,
+with one word per line; blank lines and lines starting with ``#`` are
+ignored. Only the directory is listed at startup. A pack is read the first
+time a board needs it and then indexed by word length, so presets can ask
+for words that fit their tiles.
+"""
+import os
+import threading
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "words")
+WORD_PACK_SUFFIX = ".txt"
+
+
+class WordPack:
+    """The words of one theme, loaded on first use."""
+
+    def __init__(self, theme, path):
+        self.theme = theme
+        self.path = path
+        self._by_length = None  # length -> list of words
+        self._populations = {}  # max_length -> list of words up to it
+        self._lock = threading.Lock()
+
+    def _load(self):
+        by_length = {}
+        seen = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                word = line.strip().upper()
+                if not word or word.startswith("#") or word in seen:
+                    continue
+                seen.add(word)
+                by_length.setdefault(len(word), []).append(word)
+        return by_length
+
+    def words(self, max_length=None):
+        """Words of at most max_length letters (all of them for None)."""
+        population = self._populations.get(max_length)
+        if population is None:
+            with self._lock:
+                if self._by_length is None:
+                    self._by_length = self._load()
+                population = [
+                    word
+                    for length in sorted(self._by_length)
+                    if max_length is None or length <= max_length
+                    for word in self._by_length[length]
+                ]
+                self._populations[max_length] = population
+        return population
+
+    def sample(self, count, rng, max_length=None, exclude=()):
+        """
+        Pick count distinct words, avoiding those in the set exclude when
+        the pack has enough others.
+        """
+        population = self.words(max_length)
+        if len(population) < count:
+            raise ValueError(
+                f"Word pack {self.theme!r} has {len(population)} words "
+                f"of up to {max_length} letters, {count} needed"
+            )
+        # Sampling a few extra words is cheaper than building the population
+        # without the excluded ones
+        extra = min(len(exclude), len(population) - count)
+        picked = [word for word in rng.sample(population, count + extra) if word not in exclude]
+        if len(picked) < count:
+            # Too few other words; repeat some rather than fail
+            chosen = set(picked)
+            repeats = [word for word in population if word not in chosen]
+            picked += rng.sample(repeats, count - len(picked))
+        return picked[:count]
+
+    def __len__(self):
+        return len(self.words())
+
+
+class WordPacks:
+    """Word packs of a directory, keyed by theme."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self._packs = None  # theme -> WordPack
+
+    def _scan(self):
+        packs = {}
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(WORD_PACK_SUFFIX):
+                theme = name[: -len(WORD_PACK_SUFFIX)]
+                packs[theme] = WordPack(theme, os.path.join(self.directory, name))
+        return packs
+
+    def init_app(self, directory):
+        """Use the packs of another directory."""
+        self.directory = directory
+        self._packs = None
+
+    def themes(self):
+        if self._packs is None:
+            self._packs = self._scan()
+        return list(self._packs)
+
+    def get(self, theme):
+        """Return the pack for a theme, or None."""
+        if self._packs is None:
+            self._packs = self._scan()
+        return self._packs.get(theme)
+
+
+word_packs = WordPacks()
@@ -308,7 +308,7 @@ const GameBoard = forwardRef(
           </Typography>
         </Box>
 
-        <Grid container spacing={2}>
+        <Grid container spacing={2} columns={gameState?.boardColumns || 4}>
           {boardData.map((card) => {
             // Get other players who have selected this card (excluding current user)
             const otherPlayersSelections = Object.entries(
@@ -321,7 +321,7 @@ const GameBoard = forwardRef(
               .map(([userId]) => userId);
 
             return (
-              <Grid item xs={3} key={card.id}>
+              <Grid item xs={1} key={card.id}>
                 <GameTile
                   card={card}
                   isTeamLead={isUserTeamLead}
@@ -12,6 +12,9 @@ export const SOCKET_EVENTS = {
   LOBBY_FORCE_START: 'lobby:force_start',
   LOBBY_CHANGE_TEAM: 'lobby:change_team',
   LOBBY_END_GAME: 'lobby:end_game',
+  LOBBY_PATCH: 'lobby:patch',
+  LOBBY_SYNC: 'lobby:sync',
+  LOBBY_READY: 'lobby:ready',
 
   // Game events
   GAME_UPDATE: 'game:update',
@@ -23,6 +26,8 @@ export const SOCKET_EVENTS = {
   GAME_SELECT_CARD: 'game:select_card',
   GAME_CARD_SELECTION_UPDATE: 'game:card_selection_update',
   GAME_END_TURN: 'end_turn',
+  GAME_PATCH: 'game:patch',
+  GAME_SYNC: 'game:sync',
 };
 
 // Team constants
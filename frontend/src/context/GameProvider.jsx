@@ -1,83 +1,129 @@
 // src/context/GameProvider.jsx
-import React, { useState, useEffect, useMemo, useCallback } from 'react';
+import React, {
+  useState,
+  useEffect,
+  useMemo,
+  useCallback,
+  useRef,
+} from 'react';
 import PropTypes from 'prop-types';
+import { v4 as uuidv4 } from 'uuid';
 import { GameContext } from './GameContext';
 import { TEAMS, GAME_PHASE, SOCKET_EVENTS } from '../constants';
+import {
+  applyGamePatch,
+  applySelectionUpdate,
+  hasSeqGap,
+  readEventPosition,
+  transformGameState,
+} from '../utils/gamePatch';
+
+const INITIAL_GAME_STATE = {
+  activeTeam: TEAMS.TEAM1,
+  gamePhase: GAME_PHASE.KEYWORD_ENTRY,
+  activeKeyword: null,
+  board: [],
+  boardColumns: 4,
+  teamData: {
+    [TEAMS.TEAM1]: { remainingCards: 0 },
+    [TEAMS.TEAM2]: { remainingCards: 0 },
+  },
+  selectedCards: {}, // Tracks real-time card selections: {user_id: [card_ids]}
+  winner: null,
+  seq: -1, // No snapshot received yet, so any patch triggers a sync
+};
 
 /**
  * GameProvider manages game state and provides it via context.
  */
 export const GameProvider = ({ children, socket, lobbyId, user }) => {
-  const [gameState, setGameState] = useState({
-    activeTeam: TEAMS.TEAM1,
-    gamePhase: GAME_PHASE.KEYWORD_ENTRY,
-    activeKeyword: null,
-    board: [],
-    teamData: {
-      [TEAMS.TEAM1]: { remainingCards: 0 },
-      [TEAMS.TEAM2]: { remainingCards: 0 },
-    },
-    selectedCards: {}, // Tracks real-time card selections: {user_id: [card_ids]}
-    winner: null,
-  });
+  const [gameState, setGameState] = useState(INITIAL_GAME_STATE);
   const [notification, setNotification] = useState(null);
+  // Latest game state, read by socket handlers to apply patches in order
+  const gameStateRef = useRef(INITIAL_GAME_STATE);
+  // Position of the last lobby event seen, sent when resuming after a reconnect
+  const eventPositionRef = useRef(null);
 
   // Connect to backend socket events
   useEffect(() => {
     // Only set up listeners if socket is defined
     if (socket) {
-      // Setup game update listener
-      socket.on(SOCKET_EVENTS.GAME_UPDATE, (updatedGameState) => {
-        console.log('Received game update:', updatedGameState);
+      const commitGameState = (nextState) => {
+        gameStateRef.current = nextState;
+        setGameState(nextState);
+      };
 
-        // Transform backend data structure to match frontend expectations
-        const transformedState = {
-          activeTeam: updatedGameState.active_team,
-          gamePhase: updatedGameState.game_phase,
-          activeKeyword: updatedGameState.active_keyword
-            ? {
-                word: updatedGameState.active_keyword.word,
-                count: updatedGameState.active_keyword.point_count,
-                team: updatedGameState.active_keyword.team,
-              }
-            : null,
-          board: updatedGameState.board,
-          teamData: {
-            [TEAMS.TEAM1]: {
-              remainingCards:
-                updatedGameState.team_data?.[TEAMS.TEAM1]?.remaining_cards || 0,
-            },
-            [TEAMS.TEAM2]: {
-              remainingCards:
-                updatedGameState.team_data?.[TEAMS.TEAM2]?.remaining_cards || 0,
-            },
-          },
-          selectedCards: updatedGameState.selected_cards || {},
-          gameStartedAt: updatedGameState.game_started_at,
-          roundNumber: updatedGameState.round_number,
-          winner: updatedGameState.winner,
-        };
-
-        setGameState(transformedState);
-
-        // Notify the user based on the game state
+      const trackEventPosition = (position) => {
+        const eventPosition = readEventPosition(position);
+        if (eventPosition) eventPositionRef.current = eventPosition;
+      };
+
+      const joinGame = (resume) => {
+        if (!lobbyId || !user?.id) return;
+        socket.emit(SOCKET_EVENTS.GAME_JOIN, {
+          lobby_id: lobbyId,
+          user_id: user.id,
+          ...(resume ? { resume } : {}),
+        });
+      };
+
+      // After a reconnect only the events missed in between are replayed
+      const handleReconnect = () => joinGame(eventPositionRef.current);
+
+      // Notify the user based on the game state
+      const notifyForGameState = (state) => {
         if (
-          transformedState.gamePhase === GAME_PHASE.TEAM_GUESSING &&
-          transformedState.activeKeyword
+          state.gamePhase === GAME_PHASE.TEAM_GUESSING &&
+          state.activeKeyword
         ) {
           setNotification({
-            message: `Team ${transformedState.activeTeam === TEAMS.TEAM1 ? '1' : '2'} Team Lead has provided the keyword: "${transformedState.activeKeyword.word}" for ${transformedState.activeKeyword.count} cards`,
+            message: `Team ${state.activeTeam === TEAMS.TEAM1 ? '1' : '2'} Team Lead has provided the keyword: "${state.activeKeyword.word}" for ${state.activeKeyword.count} cards`,
             severity: 'info',
           });
         }
 
         // If game is over
-        if (transformedState.winner) {
+        if (state.winner) {
           setNotification({
-            message: `Team ${transformedState.winner === TEAMS.TEAM1 ? '1' : '2'} has won the game!`,
+            message: `Team ${state.winner === TEAMS.TEAM1 ? '1' : '2'} has won the game!`,
             severity: 'success',
           });
         }
+      };
+
+      // Setup game update listener (full snapshots)
+      socket.on(SOCKET_EVENTS.GAME_UPDATE, (updatedGameState, position) => {
+        console.log('Received game update:', updatedGameState);
+        trackEventPosition(position);
+
+        // Transform backend data structure to match frontend expectations
+        const transformedState = transformGameState(updatedGameState);
+        commitGameState(transformedState);
+        notifyForGameState(transformedState);
+      });
+
+      // Apply seq-numbered deltas; request a snapshot if one was missed
+      socket.on(SOCKET_EVENTS.GAME_PATCH, (patch, position) => {
+        const currentState = gameStateRef.current;
+        if (patch.seq <= currentState.seq) {
+          trackEventPosition(position); // Already applied
+          return;
+        }
+
+        if (hasSeqGap(currentState.seq, patch)) {
+          if (lobbyId && user?.id) {
+            socket.emit(SOCKET_EVENTS.GAME_SYNC, {
+              lobby_id: lobbyId,
+              user_id: user.id,
+            });
+          }
+          return;
+        }
+
+        const patchedState = applyGamePatch(currentState, patch);
+        trackEventPosition(position);
+        commitGameState(patchedState);
+        notifyForGameState(patchedState);
       });
 
       socket.on(SOCKET_EVENTS.GAME_ERROR, (error) => {
@@ -88,29 +134,38 @@ export const GameProvider = ({ children, socket, lobbyId, user }) => {
         });
       });
 
-      // Handle real-time card selection updates
-      socket.on(SOCKET_EVENTS.GAME_CARD_SELECTION_UPDATE, (selectionData) => {
-        console.log('Received card selection update:', selectionData);
-        setGameState((prevState) => ({
-          ...prevState,
-          selectedCards: selectionData.selected_cards || {},
-        }));
-      });
+      // Handle real-time card selection updates (merged diffs)
+      socket.on(
+        SOCKET_EVENTS.GAME_CARD_SELECTION_UPDATE,
+        (selectionData, position) => {
+          trackEventPosition(position);
+          const currentState = gameStateRef.current;
+          commitGameState({
+            ...currentState,
+            selectedCards: applySelectionUpdate(
+              currentState.selectedCards,
+              selectionData,
+            ),
+          });
+        },
+      );
+
+      socket.on('connect', handleReconnect);
 
-      // Join game when component mounts
-      if (lobbyId && user?.id) {
+      // Join game when component mounts; a socket still connecting joins
+      // from the connect handler instead, so the join isn't sent twice
+      if (socket.connected && lobbyId && user?.id) {
         console.log(`Joining game for lobby: ${lobbyId}`);
-        socket.emit(SOCKET_EVENTS.GAME_JOIN, {
-          lobby_id: lobbyId,
-          user_id: user.id,
-        });
+        joinGame();
       }
 
       // Cleanup listeners when component unmounts
       return () => {
         socket.off(SOCKET_EVENTS.GAME_UPDATE);
+        socket.off(SOCKET_EVENTS.GAME_PATCH);
         socket.off(SOCKET_EVENTS.GAME_ERROR);
         socket.off(SOCKET_EVENTS.GAME_CARD_SELECTION_UPDATE);
+        socket.off('connect', handleReconnect);
 
         if (lobbyId && user?.id) {
           socket.emit(SOCKET_EVENTS.GAME_LEAVE, {
@@ -132,9 +187,11 @@ export const GameProvider = ({ children, socket, lobbyId, user }) => {
 
       if (!socket) return;
 
+      // The command id lets the server ignore retries of this submission
       socket.emit(SOCKET_EVENTS.GAME_SUBMIT_KEYWORD, {
         lobby_id: lobbyId,
         user_id: user.id,
+        command_id: uuidv4(),
         keyword: {
           word: keyword.word,
           point_count: keyword.count,
@@ -150,6 +207,7 @@ export const GameProvider = ({ children, socket, lobbyId, user }) => {
       socket.emit(SOCKET_EVENTS.GAME_SUBMIT_GUESS, {
         lobby_id: lobbyId,
         user_id: user.id,
+        command_id: uuidv4(),
         card_ids: cardIds,
       });
     },
@@ -1,16 +1,25 @@
 // src/context/LobbyProvider.jsx
-import React, { useState, useEffect, useMemo, useCallback } from 'react';
+import React, {
+  useState,
+  useEffect,
+  useMemo,
+  useCallback,
+  useRef,
+} from 'react';
 import PropTypes from 'prop-types';
 import io from 'socket.io-client';
 import api from '../utils/api';
 import { SOCKET_EVENTS, ROUTES, TEAMS } from '../constants';
 import { LobbyContext } from './LobbyContext';
+import { applyLobbyPatch, hasVersionGap } from '../utils/lobbyPatch';
 
 /**
  * LobbyProvider manages lobby state and provides it via context.
  */
 export const LobbyProvider = ({ lobbyId, initialUser, children }) => {
   const [lobby, setLobby] = useState(null);
+  // Latest lobby, read by socket handlers to apply patches in order
+  const lobbyRef = useRef(null);
   const [loading, setLoading] = useState(true);
   const [joined, setJoined] = useState(false);
   const [gameStarted, setGameStarted] = useState(false);
@@ -47,7 +56,14 @@ export const LobbyProvider = ({ lobbyId, initialUser, children }) => {
     const fetchLobbyData = async () => {
       try {
         const data = await api.getLobby(lobbyId);
-        setLobby(data);
+        // A snapshot may have arrived over the socket in the meantime
+        if (
+          !lobbyRef.current ||
+          (lobbyRef.current.version ?? 0) < (data.version ?? 0)
+        ) {
+          lobbyRef.current = data;
+          setLobby(data);
+        }
 
         // Check if game is in progress from the lobby data
         if (data.game_in_progress) {
@@ -92,8 +108,34 @@ export const LobbyProvider = ({ lobbyId, initialUser, children }) => {
   }, [lobby, user, lobbyId]);
 
   useEffect(() => {
+    const commitLobby = (nextLobby) => {
+      lobbyRef.current = nextLobby;
+      setLobby(nextLobby);
+    };
+
+    // Full snapshots, sent on join and after a gap
     const handleUpdate = (data) => {
-      setLobby(data);
+      commitLobby(data);
+    };
+
+    // Apply versioned roster diffs; request a snapshot if one was missed
+    const handlePatch = (patch) => {
+      const current = lobbyRef.current;
+      // Already applied
+      if (current && patch.version <= (current.version ?? 0)) return;
+
+      if (!current || hasVersionGap(current.version, patch)) {
+        socket.emit(SOCKET_EVENTS.LOBBY_SYNC, { lobby_id: lobbyId });
+        return;
+      }
+
+      commitLobby(applyLobbyPatch(current, patch));
+    };
+
+    // Whether the game can be started, pushed when it changes
+    const handleReady = ({ can_start: canStart }) => {
+      if (!lobbyRef.current) return;
+      commitLobby({ ...lobbyRef.current, can_start: canStart });
     };
 
     const handleGameStart = () => {
@@ -105,15 +147,19 @@ export const LobbyProvider = ({ lobbyId, initialUser, children }) => {
     };
 
     socket.on(SOCKET_EVENTS.LOBBY_UPDATE, handleUpdate);
+    socket.on(SOCKET_EVENTS.LOBBY_PATCH, handlePatch);
+    socket.on(SOCKET_EVENTS.LOBBY_READY, handleReady);
     socket.on(SOCKET_EVENTS.LOBBY_START_GAME, handleGameStart);
     socket.on(SOCKET_EVENTS.LOBBY_END_GAME, handleGameEnd);
 
     return () => {
       socket.off(SOCKET_EVENTS.LOBBY_UPDATE, handleUpdate);
+      socket.off(SOCKET_EVENTS.LOBBY_PATCH, handlePatch);
+      socket.off(SOCKET_EVENTS.LOBBY_READY, handleReady);
       socket.off(SOCKET_EVENTS.LOBBY_START_GAME, handleGameStart);
       socket.off(SOCKET_EVENTS.LOBBY_END_GAME, handleGameEnd);
     };
-  }, [socket]);
+  }, [socket, lobbyId]);
 
   const joinLobby = useCallback(
     (userObj) => {
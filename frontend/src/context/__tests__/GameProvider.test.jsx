@@ -14,6 +14,7 @@ const mockSocket = {
   on: mockSocketOn,
   off: mockSocketOff,
   emit: mockSocketEmit,
+  connected: true,
 };
 
 // Mock console methods to prevent noise in test output
@@ -227,6 +228,142 @@ describe('GameProvider', () => {
     );
   });
 
+  it('applies GAME_PATCH deltas and requests a snapshot on a gap', async () => {
+    const TestConsumer = () => {
+      const context = React.useContext(GameContext);
+      return (
+        <div>
+          <div data-testid="game-phase">{context.gameState.gamePhase}</div>
+          <div data-testid="active-team">{context.gameState.activeTeam}</div>
+        </div>
+      );
+    };
+
+    await act(async () => {
+      render(
+        <GameProvider
+          socket={mockSocket}
+          lobbyId="test-lobby"
+          user={{ id: 'user-123', display_name: 'Test User' }}
+        >
+          <TestConsumer />
+        </GameProvider>,
+      );
+    });
+
+    // Full snapshot at seq 3
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.GAME_UPDATE]({
+        active_team: TEAMS.TEAM1,
+        game_phase: GAME_PHASE.KEYWORD_ENTRY,
+        active_keyword: null,
+        board: [],
+        team_data: {},
+        seq: 3,
+      });
+    });
+
+    // Next patch in sequence is applied
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.GAME_PATCH]({
+        seq: 4,
+        ops: [
+          { op: 'turn', active_team: TEAMS.TEAM2, round_number: 1 },
+          { op: 'phase', game_phase: GAME_PHASE.KEYWORD_ENTRY },
+        ],
+      });
+    });
+
+    expect(screen.getByTestId('active-team')).toHaveTextContent(TEAMS.TEAM2);
+    expect(mockSocketEmit).not.toHaveBeenCalledWith(
+      SOCKET_EVENTS.GAME_SYNC,
+      expect.anything(),
+    );
+
+    // A skipped seq is not applied; a snapshot is requested instead
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.GAME_PATCH]({
+        seq: 6,
+        ops: [{ op: 'phase', game_phase: GAME_PHASE.TEAM_GUESSING }],
+      });
+    });
+
+    expect(screen.getByTestId('game-phase')).toHaveTextContent(
+      GAME_PHASE.KEYWORD_ENTRY,
+    );
+    expect(mockSocketEmit).toHaveBeenCalledWith(SOCKET_EVENTS.GAME_SYNC, {
+      lobby_id: 'test-lobby',
+      user_id: 'user-123',
+    });
+  });
+
+  it('resumes from the last event position after a reconnect', async () => {
+    await act(async () => {
+      render(
+        <GameProvider
+          socket={mockSocket}
+          lobbyId="test-lobby"
+          user={{ id: 'user-123', display_name: 'Test User' }}
+        >
+          <div>Test</div>
+        </GameProvider>,
+      );
+    });
+
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.GAME_UPDATE](
+        {
+          active_team: TEAMS.TEAM1,
+          game_phase: GAME_PHASE.KEYWORD_ENTRY,
+          board: [],
+          team_data: {},
+          seq: 0,
+        },
+        { epoch: 'e1', seq: 7 },
+      );
+      mockSocketEvents[SOCKET_EVENTS.GAME_CARD_SELECTION_UPDATE](
+        { selected: { 'user-456': [1] }, deselected: {} },
+        { epoch: 'e1', seq: 8 },
+      );
+    });
+
+    await act(async () => {
+      mockSocketEvents.connect();
+    });
+
+    expect(mockSocketEmit).toHaveBeenLastCalledWith(SOCKET_EVENTS.GAME_JOIN, {
+      lobby_id: 'test-lobby',
+      user_id: 'user-123',
+      resume: { epoch: 'e1', seq: 8 },
+    });
+  });
+
+  it('joins only from the connect handler while the socket is connecting', async () => {
+    await act(async () => {
+      render(
+        <GameProvider
+          socket={{ ...mockSocket, connected: false }}
+          lobbyId="test-lobby"
+          user={{ id: 'user-123', display_name: 'Test User' }}
+        >
+          <div>Test</div>
+        </GameProvider>,
+      );
+    });
+
+    expect(mockSocketEmit).not.toHaveBeenCalled();
+
+    await act(async () => {
+      mockSocketEvents.connect();
+    });
+
+    expect(mockSocketEmit).toHaveBeenCalledTimes(1);
+    expect(mockSocketEmit).toHaveBeenCalledWith(SOCKET_EVENTS.GAME_JOIN, {
+      lobby_id: 'test-lobby',
+      user_id: 'user-123',
+    });
+  });
+
   it('shows error notifications when receiving GAME_ERROR events', async () => {
     const TestConsumer = () => {
       const context = React.useContext(GameContext);
@@ -309,6 +446,7 @@ describe('GameProvider', () => {
       {
         lobby_id: 'test-lobby',
         user_id: 'user-123',
+        command_id: expect.any(String),
         keyword: {
           word: 'security',
           point_count: 2,
@@ -464,6 +602,7 @@ describe('GameProvider', () => {
 
     // Should remove socket listeners
     expect(mockSocketOff).toHaveBeenCalledWith(SOCKET_EVENTS.GAME_UPDATE);
+    expect(mockSocketOff).toHaveBeenCalledWith(SOCKET_EVENTS.GAME_PATCH);
     expect(mockSocketOff).toHaveBeenCalledWith(SOCKET_EVENTS.GAME_ERROR);
 
     // Should emit leave event
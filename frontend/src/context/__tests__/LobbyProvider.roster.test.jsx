@@ -0,0 +1,157 @@
+// frontend/src/context/__tests__/LobbyProvider.roster.test.jsx
+import React from 'react';
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { screen, render, act } from '@testing-library/react';
+import { LobbyProvider } from '../LobbyProvider';
+import { LobbyContext } from '../LobbyContext';
+import { SOCKET_EVENTS } from '../../constants';
+
+// Mock localStorage
+const localStorageMock = {
+  getItem: vi.fn(),
+  setItem: vi.fn(),
+  removeItem: vi.fn(),
+  clear: vi.fn(),
+};
+global.localStorage = localStorageMock;
+
+// Create mock socket
+const mockSocketOn = vi.fn();
+const mockSocketOff = vi.fn();
+const mockSocketEmit = vi.fn();
+const mockSocket = {
+  on: mockSocketOn,
+  off: mockSocketOff,
+  emit: mockSocketEmit,
+};
+
+// Mock socket.io-client
+vi.mock('socket.io-client', () => ({
+  default: vi.fn(() => mockSocket),
+}));
+
+// Mock API
+vi.mock('../../utils/api', () => ({
+  default: {
+    getLobby: vi.fn().mockResolvedValue({
+      lobby_name: 'Test Lobby',
+      version: 1,
+      participants: [{ id: 'user1', display_name: 'Test User' }],
+    }),
+  },
+}));
+
+describe('LobbyProvider Roster Updates', () => {
+  let mockSocketEvents = {};
+
+  beforeEach(() => {
+    // Reset mocks
+    vi.clearAllMocks();
+    localStorageMock.getItem.mockReturnValue(null);
+
+    // Update on method to store event handlers
+    mockSocketOn.mockImplementation((event, handler) => {
+      mockSocketEvents[event] = handler;
+    });
+  });
+
+  const TestConsumer = () => {
+    const context = React.useContext(LobbyContext);
+    return (
+      <div data-testid="participants">
+        {context.lobby?.participants
+          ?.map((p) => `${p.display_name}${p.ready ? ' (ready)' : ''}`)
+          .join(', ')}
+      </div>
+    );
+  };
+
+  const renderProvider = async () => {
+    await act(async () => {
+      render(
+        <LobbyProvider
+          lobbyId="test-lobby"
+          initialUser={{ id: 'user1', display_name: 'Test User' }}
+        >
+          <TestConsumer />
+        </LobbyProvider>,
+      );
+    });
+  };
+
+  it('applies roster patches on top of the lobby snapshot', async () => {
+    await renderProvider();
+
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.LOBBY_PATCH]({
+        lobby_id: 'test-lobby',
+        version: 2,
+        ops: [
+          {
+            op: 'participant_added',
+            participant: { id: 'user2', display_name: 'Other User' },
+          },
+          { op: 'participant_updated', id: 'user1', fields: { ready: true } },
+        ],
+      });
+    });
+
+    expect(screen.getByTestId('participants')).toHaveTextContent(
+      'Test User (ready), Other User',
+    );
+    expect(mockSocketEmit).not.toHaveBeenCalledWith(
+      SOCKET_EVENTS.LOBBY_SYNC,
+      expect.anything(),
+    );
+  });
+
+  it('requests a snapshot when a patch was missed', async () => {
+    await renderProvider();
+
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.LOBBY_PATCH]({
+        lobby_id: 'test-lobby',
+        version: 4,
+        ops: [{ op: 'participant_removed', id: 'user1' }],
+      });
+    });
+
+    expect(mockSocketEmit).toHaveBeenCalledWith(SOCKET_EVENTS.LOBBY_SYNC, {
+      lobby_id: 'test-lobby',
+    });
+    expect(screen.getByTestId('participants')).toHaveTextContent('Test User');
+  });
+
+  it('keeps whether the game can start from lobby ready events', async () => {
+    const ReadyConsumer = () => {
+      const context = React.useContext(LobbyContext);
+      return (
+        <div data-testid="can-start">
+          {context.lobby?.can_start ? 'Can start' : 'Waiting'}
+        </div>
+      );
+    };
+
+    await act(async () => {
+      render(
+        <LobbyProvider
+          lobbyId="test-lobby"
+          initialUser={{ id: 'user1', display_name: 'Test User' }}
+        >
+          <ReadyConsumer />
+        </LobbyProvider>,
+      );
+    });
+
+    expect(screen.getByTestId('can-start')).toHaveTextContent('Waiting');
+
+    await act(async () => {
+      mockSocketEvents[SOCKET_EVENTS.LOBBY_READY]({
+        lobby_id: 'test-lobby',
+        can_start: true,
+      });
+    });
+
+    expect(screen.getByTestId('can-start')).toHaveTextContent('Can start');
+  });
+});
@@ -0,0 +1,134 @@
+import { describe, it, expect } from 'vitest';
+import {
+  applyGamePatch,
+  applySelectionUpdate,
+  hasSeqGap,
+  readEventPosition,
+  transformGameState,
+} from '../gamePatch';
+import { TEAMS, GAME_PHASE, CARD_TYPES } from '../../constants';
+
+const snapshot = {
+  active_team: TEAMS.TEAM1,
+  game_phase: GAME_PHASE.KEYWORD_ENTRY,
+  active_keyword: null,
+  board: [
+    { id: 1, word: 'CIPHER', revealed: false },
+    { id: 2, word: 'PROXY', revealed: false },
+  ],
+  team_data: {
+    [TEAMS.TEAM1]: { remaining_cards: 6 },
+    [TEAMS.TEAM2]: { remaining_cards: 5 },
+  },
+  selected_cards: {},
+  round_number: 1,
+  winner: null,
+  seq: 4,
+};
+
+describe('gamePatch utils', () => {
+  it('transforms a snapshot and keeps its seq', () => {
+    const state = transformGameState(snapshot);
+
+    expect(state.seq).toBe(4);
+    expect(state.teamData[TEAMS.TEAM1].remainingCards).toBe(6);
+    expect(state.activeKeyword).toBeNull();
+    // Boards from before presets existed are laid out four to a row
+    expect(state.boardColumns).toBe(4);
+    expect(
+      transformGameState({ ...snapshot, board_columns: 5 }).boardColumns,
+    ).toBe(5);
+  });
+
+  it('applies keyword and phase operations', () => {
+    const state = transformGameState(snapshot);
+    const next = applyGamePatch(state, {
+      seq: 5,
+      ops: [
+        {
+          op: 'keyword',
+          active_keyword: {
+            word: 'crypto',
+            point_count: 2,
+            team: TEAMS.TEAM1,
+          },
+        },
+        { op: 'phase', game_phase: GAME_PHASE.TEAM_GUESSING },
+      ],
+    });
+
+    expect(next.seq).toBe(5);
+    expect(next.gamePhase).toBe(GAME_PHASE.TEAM_GUESSING);
+    expect(next.activeKeyword).toEqual({
+      word: 'crypto',
+      count: 2,
+      team: TEAMS.TEAM1,
+    });
+    // The previous state is left untouched
+    expect(state.gamePhase).toBe(GAME_PHASE.KEYWORD_ENTRY);
+  });
+
+  it('reveals cards, updates counts and ends the game', () => {
+    const state = transformGameState(snapshot);
+    const next = applyGamePatch(state, {
+      seq: 5,
+      ops: [
+        {
+          op: 'reveal',
+          cards: [{ id: 2, type: CARD_TYPES.TEAM1_CARD }],
+          team_data: {
+            [TEAMS.TEAM1]: { remaining_cards: 0 },
+            [TEAMS.TEAM2]: { remaining_cards: 5 },
+          },
+        },
+        { op: 'game_over', winner: TEAMS.TEAM1 },
+      ],
+    });
+
+    expect(next.board[0]).toEqual(snapshot.board[0]);
+    expect(next.board[1]).toEqual({
+      id: 2,
+      word: 'PROXY',
+      revealed: true,
+      type: CARD_TYPES.TEAM1_CARD,
+    });
+    expect(next.teamData[TEAMS.TEAM1].remainingCards).toBe(0);
+    expect(next.winner).toBe(TEAMS.TEAM1);
+  });
+
+  it('applies turn operations', () => {
+    const next = applyGamePatch(transformGameState(snapshot), {
+      seq: 5,
+      ops: [{ op: 'turn', active_team: TEAMS.TEAM2, round_number: 1 }],
+    });
+
+    expect(next.activeTeam).toBe(TEAMS.TEAM2);
+    expect(next.roundNumber).toBe(1);
+  });
+
+  it('detects gaps in the patch sequence', () => {
+    expect(hasSeqGap(4, { seq: 5 })).toBe(false);
+    expect(hasSeqGap(4, { seq: 7 })).toBe(true);
+  });
+
+  it('merges selection diff frames into the selections map', () => {
+    const selectedCards = { u1: [1, 2], u2: [3] };
+    const next = applySelectionUpdate(selectedCards, {
+      selected: { u1: [2, 4], u3: [5] },
+      deselected: { u1: [1], u2: [3] },
+    });
+
+    expect(next).toEqual({ u1: [2, 4], u2: [], u3: [5] });
+    expect(selectedCards).toEqual({ u1: [1, 2], u2: [3] });
+  });
+
+  it('reads event positions sent with lobby broadcasts', () => {
+    expect(readEventPosition({ epoch: 'abc', seq: 3 })).toEqual({
+      epoch: 'abc',
+      seq: 3,
+    });
+    expect(readEventPosition(undefined)).toBeNull();
+    expect(readEventPosition({ seq: 3 })).toBeNull();
+    expect(readEventPosition({ epoch: 'abc', seq: '3' })).toBeNull();
+  });
+});
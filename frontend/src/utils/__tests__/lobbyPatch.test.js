@@ -0,0 +1,46 @@
+import { describe, it, expect } from 'vitest';
+import { applyLobbyPatch, hasVersionGap } from '../lobbyPatch';
+import { TEAMS } from '../../constants';
+
+const lobby = {
+  id: 'lobby-1',
+  lobby_name: 'Test Lobby',
+  game_in_progress: false,
+  version: 3,
+  participants: [
+    { id: 'host', display_name: 'Host', team: TEAMS.TEAM1, ready: false },
+    { id: 'u2', display_name: 'Two', team: TEAMS.TEAM2, ready: false },
+  ],
+};
+
+describe('lobbyPatch utils', () => {
+  it('applies roster and lobby operations in order', () => {
+    const next = applyLobbyPatch(lobby, {
+      lobby_id: 'lobby-1',
+      version: 4,
+      ops: [
+        {
+          op: 'participant_added',
+          participant: { id: 'u3', display_name: 'Three', team: TEAMS.TEAM1 },
+        },
+        { op: 'participant_updated', id: 'u2', fields: { ready: true } },
+        { op: 'participant_removed', id: 'host' },
+        { op: 'lobby_updated', fields: { game_in_progress: true } },
+      ],
+    });
+
+    expect(next.version).toBe(4);
+    expect(next.game_in_progress).toBe(true);
+    expect(next.participants.map((p) => p.id)).toEqual(['u2', 'u3']);
+    expect(next.participants[0].ready).toBe(true);
+    // The previous lobby is left untouched
+    expect(lobby.participants).toHaveLength(2);
+    expect(lobby.participants[1].ready).toBe(false);
+  });
+
+  it('detects version gaps', () => {
+    expect(hasVersionGap(3, { version: 4 })).toBe(false);
+    expect(hasVersionGap(3, { version: 6 })).toBe(true);
+    expect(hasVersionGap(undefined, { version: 1 })).toBe(false);
+  });
+});
@@ -0,0 +1,113 @@
+// src/utils/gamePatch.js
+import { TEAMS } from '../constants';
+
+const transformKeyword = (keyword) =>
+  keyword
+    ? {
+        word: keyword.word,
+        count: keyword.point_count,
+        team: keyword.team,
+      }
+    : null;
+
+const transformTeamData = (teamData) => ({
+  [TEAMS.TEAM1]: {
+    remainingCards: teamData?.[TEAMS.TEAM1]?.remaining_cards || 0,
+  },
+  [TEAMS.TEAM2]: {
+    remainingCards: teamData?.[TEAMS.TEAM2]?.remaining_cards || 0,
+  },
+});
+
+/**
+ * Transform a full game snapshot from the backend into the frontend shape.
+ */
+export const transformGameState = (updatedGameState) => ({
+  activeTeam: updatedGameState.active_team,
+  gamePhase: updatedGameState.game_phase,
+  activeKeyword: transformKeyword(updatedGameState.active_keyword),
+  board: updatedGameState.board,
+  boardColumns: updatedGameState.board_columns ?? 4,
+  teamData: transformTeamData(updatedGameState.team_data),
+  selectedCards: updatedGameState.selected_cards || {},
+  gameStartedAt: updatedGameState.game_started_at,
+  roundNumber: updatedGameState.round_number,
+  winner: updatedGameState.winner,
+  seq: updatedGameState.seq ?? 0,
+});
+
+/**
+ * Apply the operations of a `game:patch` frame to a transformed game state.
+ * Returns a new state object; the previous one is left untouched.
+ */
+export const applyGamePatch = (state, patch) => {
+  const next = { ...state, seq: patch.seq };
+
+  patch.ops.forEach((op) => {
+    switch (op.op) {
+      case 'keyword':
+        next.activeKeyword = transformKeyword(op.active_keyword);
+        break;
+      case 'phase':
+        next.gamePhase = op.game_phase;
+        break;
+      case 'turn':
+        next.activeTeam = op.active_team;
+        next.roundNumber = op.round_number;
+        break;
+      case 'reveal': {
+        const revealed = new Map(op.cards.map((card) => [card.id, card.type]));
+        next.board = next.board.map((card) =>
+          revealed.has(card.id)
+            ? { ...card, revealed: true, type: revealed.get(card.id) }
+            : card,
+        );
+        next.teamData = transformTeamData(op.team_data);
+        break;
+      }
+      case 'game_over':
+        next.winner = op.winner;
+        break;
+      default:
+        console.warn('Unknown game patch operation:', op.op);
+    }
+  });
+
+  return next;
+};
+
+/**
+ * Whether a patch can be applied on top of the given seq, or a full
+ * snapshot is needed because frames were missed.
+ */
+export const hasSeqGap = (currentSeq, patch) => patch.seq !== currentSeq + 1;
+
+/**
+ * Apply a merged `game:card_selection_update` frame to the selections map
+ * ({user_id: [card_ids]}). Returns a new map.
+ */
+export const applySelectionUpdate = (selectedCards, frame) => {
+  const next = { ...selectedCards };
+
+  Object.entries(frame.selected || {}).forEach(([userId, cardIds]) => {
+    const current = next[userId] || [];
+    next[userId] = [
+      ...current,
+      ...cardIds.filter((cardId) => !current.includes(cardId)),
+    ];
+  });
+
+  Object.entries(frame.deselected || {}).forEach(([userId, cardIds]) => {
+    if (!next[userId]) return;
+    next[userId] = next[userId].filter((cardId) => !cardIds.includes(cardId));
+  });
+
+  return next;
+};
+
+/**
+ * Return the position ({epoch, seq}) sent with a lobby broadcast as its
+ * last argument, or null if the event did not carry one.
+ */
+export const readEventPosition = (position) =>
+  position?.epoch && Number.isInteger(position.seq) ? position : null;
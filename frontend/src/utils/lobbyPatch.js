@@ -0,0 +1,44 @@
+// src/utils/lobbyPatch.js
+
+/**
+ * Apply the operations of a `lobby:patch` frame to a lobby snapshot.
+ * Returns a new lobby object; the previous one is left untouched.
+ */
+export const applyLobbyPatch = (lobby, patch) => {
+  const next = { ...lobby, version: patch.version };
+  let participants = lobby.participants || [];
+
+  patch.ops.forEach((op) => {
+    switch (op.op) {
+      case 'participant_added':
+        participants = [
+          ...participants.filter((p) => p.id !== op.participant.id),
+          op.participant,
+        ];
+        break;
+      case 'participant_updated':
+        participants = participants.map((p) =>
+          p.id === op.id ? { ...p, ...op.fields } : p,
+        );
+        break;
+      case 'participant_removed':
+        participants = participants.filter((p) => p.id !== op.id);
+        break;
+      case 'lobby_updated':
+        Object.assign(next, op.fields);
+        break;
+      default:
+        console.warn('Unknown lobby patch operation:', op.op);
+    }
+  });
+
+  next.participants = participants;
+  return next;
+};
+
+/**
+ * Whether a patch can be applied on top of the given lobby version, or a
+ * full snapshot is needed because patches were missed.
+ */
+export const hasVersionGap = (currentVersion, patch) =>
+  patch.version !== (currentVersion ?? 0) + 1;